@@ -2,13 +2,21 @@ import asyncio
 
 import uvicorn
 
-from src.api.models import init_models
+from src.api.models import engine, init_models, migrate_database
 from src.config import Config
 
 
+async def prepare_database() -> None:
+    await init_models()
+    await migrate_database()
+
+    # The server runs in another event loop.
+    await engine.dispose()
+
+
 def main() -> None:
 
-    asyncio.run(init_models())
+    asyncio.run(prepare_database())
 
     uvicorn.run(
         "src.api.app:get_app",
@@ -1,5 +1,6 @@
+import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -8,10 +9,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
-from src.api.middlewares import UserSessionMiddleware
-from src.api.models import AsyncSessionLocal
+from src.api.middlewares import MetricsMiddleware, UserSessionMiddleware
+from src.api.models import (
+    AsyncSessionLocal,
+    prune_command_history,
+    warm_up_database_pool,
+)
 from src.api.routers import get_router
 from src.api.services import AppService, DatabaseService, NetworkService
+from src.api.tools.history import history_writer
+from src.api.tools.ssh import close_connection_pools, warm_up_connection_pools
 from src.config import Config
 
 APP_ROOT = Path(__file__).parent
@@ -39,8 +46,10 @@ def get_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
     _app.add_middleware(UserSessionMiddleware)
+    _app.add_middleware(MetricsMiddleware)
 
     _app.include_router(get_router(_app))
 
@@ -56,8 +65,24 @@ def get_app() -> FastAPI:
         async with AsyncSessionLocal() as db_session:
             await NetworkService.sync_dokku_with_api_database(db_session)
 
+    async def prune_history_job():
+        async with AsyncSessionLocal() as db_session:
+            deleted = await prune_command_history(
+                timedelta(days=Config.API_HISTORY_RETENTION_DAYS),
+                db_session,
+                batch_size=Config.API_HISTORY_PRUNE_BATCH_SIZE,
+            )
+        logging.info(f"[prune_history_job]::Deleted {deleted} history records")
+
     @_app.on_event("startup")
     async def startup():
+        history_writer.start()
+        await warm_up_database_pool()
+
+        # Opening the SSH connections may take a while (or time out) when the
+        # Dokku host is slow or unreachable, so it must not delay the startup.
+        _app.state.ssh_warm_up = asyncio.create_task(warm_up_connection_pools())
+
         scheduler.start()
         scheduler.add_job(
             sync_apps_job,
@@ -87,4 +112,21 @@ def get_app() -> FastAPI:
             coalesce=True,
         )
 
+        if Config.API_HISTORY_RETENTION_DAYS > 0:
+            scheduler.add_job(
+                prune_history_job,
+                trigger=IntervalTrigger(hours=1),
+                id="prune_command_history",
+                replace_existing=True,
+                next_run_time=datetime.now(),
+                max_instances=1,
+                coalesce=True,
+            )
+
+    @_app.on_event("shutdown")
+    async def shutdown():
+        _app.state.ssh_warm_up.cancel()
+        await close_connection_pools()
+        await history_writer.stop()
+
     return _app
@@ -1 +1,2 @@
+from src.api.middlewares.metrics import MetricsMiddleware
 from src.api.middlewares.session import UserSessionMiddleware
@@ -0,0 +1,59 @@
+import time
+from typing import Dict
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.api.tools.metrics import http_request_duration
+
+
+class MetricsMiddleware:
+    """
+    This middleware exports the latency of the HTTP requests, by route.
+
+    It is a plain ASGI middleware, so the request and response bodies are
+    passed through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._routes: Dict = {}
+
+    def _get_route(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+
+        if endpoint is None:
+            return "unmatched"
+
+        if endpoint not in self._routes:
+            for route in getattr(scope.get("app"), "routes", []):
+                if getattr(route, "endpoint", None) is endpoint:
+                    self._routes[endpoint] = route.path
+                    break
+            else:
+                self._routes[endpoint] = "unmatched"
+
+        return self._routes[endpoint]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=self._get_route(scope),
+                status=str(status_code),
+            )
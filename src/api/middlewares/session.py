@@ -1,46 +1,128 @@
 import json
+from typing import Optional
 
-from fastapi import HTTPException, Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import HTTPException
+from starlette.datastructures import Headers
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from src.api.models import AsyncSessionLocal, get_user_by_access_token
+from src.api.models import (
+    get_user_by_access_token,
+    open_db_session,
+    request_session_scope,
+)
+from src.api.tools import hash_access_token
+from src.api.tools.session_cache import session_cache
+from src.api.tools.ssh import governor
 
 
-class UserSessionMiddleware(BaseHTTPMiddleware):
+class UserSessionMiddleware:
     """
-    This middleware checks for an access token in the request body and sets the session user accordingly.
+    This middleware checks for an access token and sets the session user accordingly.
+
+    The token is taken from the `Authorization: Bearer <token>` header or, if the
+    header is absent, from the `access_token` field of a JSON body. It is a plain
+    ASGI middleware: the body is only read when needed, and the read bytes are
+    passed downstream once.
+
+    The request shares a single database session (see `request_session_scope`),
+    available as `request.state.db_session` and through `get_db_session`.
     """
 
-    async def dispatch(self, request: Request, call_next):
-        request.state.session_user = None
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        if not request.headers.get("content-type", "").startswith("application/json"):
-            return await call_next(request)
+    @staticmethod
+    async def get_session_user(access_token: str):
+        hashed_access_token = hash_access_token(access_token)
+        session_user = session_cache.get(hashed_access_token)
 
-        body_bytes = await request.body()
+        if session_user is not None:
+            return session_user.copy()
 
-        try:
-            body = json.loads(body_bytes)
+        version = session_cache.version()
 
-            if isinstance(body, dict) and (access_token := body.get("access_token")):
-                async with AsyncSessionLocal() as db_session:
-                    request.state.session_user = await get_user_by_access_token(
-                        access_token,
-                        db_session,
-                    )
+        async with open_db_session() as db_session:
+            try:
+                session_user = await get_user_by_access_token(access_token, db_session)
+            finally:
+                # End the (read only) transaction, so the connection goes back
+                # to the pool until the route uses the session again.
+                await db_session.rollback()
+
+        session_cache.set(hashed_access_token, session_user, version)
+
+        return session_user.copy()
 
-        except HTTPException as error:
-            return JSONResponse(
-                status_code=error.status_code, content={"detail": error.detail}
-            )
+    @staticmethod
+    def get_header_access_token(headers: Headers) -> Optional[str]:
+        scheme, _, access_token = headers.get("authorization", "").partition(" ")
 
+        if scheme.lower() == "bearer" and access_token.strip():
+            return access_token.strip()
+
+    @staticmethod
+    def get_body_access_token(body: bytes) -> Optional[str]:
+        # Avoid decoding bodies that cannot have a token.
+        if b"access_token" not in body:
+            return None
+
+        try:
+            body = json.loads(body)
         except json.JSONDecodeError:
-            pass
+            return None
+
+        if isinstance(body, dict) and isinstance(body.get("access_token"), str):
+            return body["access_token"]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
 
-        async def receive():
-            return {"type": "http.request", "body": body_bytes, "more_body": False}
+        state = scope.setdefault("state", {})
+        state["session_user"] = None
+
+        headers = Headers(scope=scope)
+        access_token = self.get_header_access_token(headers)
+
+        if access_token is None and headers.get("content-type", "").startswith(
+            "application/json"
+        ):
+            messages = []
+
+            while True:
+                message = await receive()
+                messages.append(message)
+
+                if message["type"] != "http.request" or not message.get("more_body"):
+                    break
+
+            body = b"".join(message.get("body", b"") for message in messages)
+            access_token = self.get_body_access_token(body)
+
+            original_receive = receive
+
+            async def receive() -> Message:
+                # Replay the read messages once, then wait for the client
+                # disconnection (e.g. streaming responses listen for it).
+                if messages:
+                    return messages.pop(0)
+                return await original_receive()
+
+        async with request_session_scope() as request_session:
+            state["db_session"] = request_session
+
+            if access_token:
+                try:
+                    state["session_user"] = await self.get_session_user(access_token)
+
+                except HTTPException as error:
+                    response = JSONResponse(
+                        status_code=error.status_code, content={"detail": error.detail}
+                    )
+                    return await response(scope, receive, send)
 
-        request._receive = receive
+            session_user = state["session_user"]
 
-        return await call_next(request)
+            with governor.request_scope(session_user.email if session_user else None):
+                await self.app(scope, receive, send)
@@ -10,24 +10,36 @@ from src.api.models.base import (
 from src.api.models.session import (
     DATABASE_URL,
     AsyncSessionLocal,
+    RequestSession,
+    engine,
     get_db_session,
+    get_pool_stats,
     init_models,
+    migrate_database,
+    open_db_session,
+    request_session_scope,
+    warm_up_database_pool,
 )
 from src.api.models.tools import (
+    create_app_deployment_token,
     create_resource,
     create_take_over_access_token,
     create_user,
     delete_resource,
     delete_user,
     get_app_by_deploy_token,
-    get_app_deployment_token,
     get_command_history,
+    get_resource_cursor,
     get_resources,
     get_shared_app_users,
     get_user,
     get_user_by_access_token,
     get_users,
+    iter_command_history,
+    iter_resources,
     log_command,
+    log_commands,
+    prune_command_history,
     rename_resource,
     share_app,
     unshare_app,
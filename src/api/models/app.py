@@ -1,16 +1,17 @@
-import secrets
 from typing import Optional
 
 from sqlalchemy import Column, DateTime, ForeignKey, String
 from sqlalchemy.orm import relationship
 
 from src.api.models.resource import Resource
+from src.api.tools.token import hash_access_token
 
 
 class App(Resource):
     __tablename__ = "app"
     name = Column(String(255), primary_key=True)
-    deploy_token = Column(String(1024), nullable=True)
+    # Only the hash of the deploy token is stored (see hash_access_token).
+    deploy_token_hash = Column(String(128), nullable=True, unique=True, index=True)
 
     user_email = Column(String(255), ForeignKey("user.email"))
     user = relationship("User", back_populates="apps", foreign_keys=[user_email])
@@ -27,9 +28,8 @@ class App(Resource):
         created_at: Optional[DateTime] = None,
     ):
         self.name = name
-        self.deploy_token = deploy_token
+        self.deploy_token_hash = (
+            hash_access_token(deploy_token) if deploy_token is not None else None
+        )
         self.user_email = user_email
         self.created_at = created_at
-
-        if self.deploy_token is None:
-            self.deploy_token = f"{name}-{secrets.token_urlsafe(512)}"
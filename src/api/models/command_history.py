@@ -1,14 +1,21 @@
-from sqlalchemy import Column, DateTime, Integer, String, func
+from sqlalchemy import Column, DateTime, Index, Integer, String, func
 
 from src.api.models.base import Base
 
 
 class CommandHistory(Base):
     __tablename__ = "command_history"
+    __table_args__ = (
+        # The history is filtered by user and listed by date.
+        Index("ix_command_history_username_created_at", "username", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     command = Column(String(2048), nullable=False)
     username = Column(String(100), nullable=False)
+    # Set by the API in UTC when the command runs (stored without time zone).
+    # The server default is only a fallback for records written by other
+    # clients.
     created_at = Column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
     )
@@ -0,0 +1,199 @@
+"""
+Versioned schema migrations.
+
+`Base.metadata.create_all` only creates the missing tables, so the changes
+to existing tables (columns, indexes...) of existing installs are shipped as
+migrations. They run in order at startup, and the applied versions are
+recorded in the `schema_migration` table.
+
+The models declare the resulting schema too, so on new installs the tables
+are created up to date and the migrations only check it. Hence, every
+migration must be idempotent.
+"""
+
+import datetime
+import logging
+from typing import Callable, List, Sequence, Tuple
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.engine import Connection
+
+from src.api.tools import hash_access_token
+
+schema_migration = Table(
+    "schema_migration",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def create_index(
+    connection: Connection,
+    table_name: str,
+    name: str,
+    columns: Sequence[str],
+    unique: bool = False,
+) -> None:
+    """
+    Create an index, unless it already exists.
+    """
+    indexes = {index["name"] for index in inspect(connection).get_indexes(table_name)}
+
+    if name in indexes:
+        return
+
+    table = Table(table_name, MetaData(), autoload_with=connection)
+    Index(name, *[table.c[column] for column in columns], unique=unique).create(
+        connection
+    )
+
+
+def hash_deploy_tokens(connection: Connection) -> None:
+    """
+    Replace the raw deploy tokens by their hashes, in the uniquely indexed
+    `deploy_token_hash` column.
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("app")}
+
+    if "deploy_token" not in columns:
+        return
+
+    if "deploy_token_hash" not in columns:
+        connection.execute(
+            text("ALTER TABLE app ADD COLUMN deploy_token_hash VARCHAR(128)")
+        )
+
+    rows = connection.execute(
+        text("SELECT name, deploy_token FROM app WHERE deploy_token IS NOT NULL")
+    ).all()
+
+    for name, deploy_token in rows:
+        connection.execute(
+            text("UPDATE app SET deploy_token_hash = :hash WHERE name = :name"),
+            {"hash": hash_access_token(deploy_token), "name": name},
+        )
+
+    create_index(
+        connection, "app", "ix_app_deploy_token_hash", ["deploy_token_hash"], True
+    )
+    connection.execute(text("ALTER TABLE app DROP COLUMN deploy_token"))
+
+
+def index_command_history_created_at(connection: Connection) -> None:
+    create_index(
+        connection, "command_history", "ix_command_history_created_at", ["created_at"]
+    )
+
+
+def index_take_over_access_token(connection: Connection) -> None:
+    create_index(
+        connection,
+        "user",
+        "ix_user_take_over_access_token",
+        ["take_over_access_token"],
+    )
+
+
+def index_resources_user_email_name(connection: Connection) -> None:
+    for table_name in ("app", "service", "network"):
+        create_index(
+            connection,
+            table_name,
+            f"ix_{table_name}_user_email_name",
+            ["user_email", "name"],
+        )
+
+
+def index_resources_created_at_name(connection: Connection) -> None:
+    for table_name in ("app", "service", "network"):
+        create_index(
+            connection,
+            table_name,
+            f"ix_{table_name}_created_at_name",
+            ["created_at", "name"],
+        )
+
+
+def index_command_history_username_created_at(connection: Connection) -> None:
+    create_index(
+        connection,
+        "command_history",
+        "ix_command_history_username_created_at",
+        ["username", "created_at"],
+    )
+
+
+def normalize_command_history_created_at(connection: Connection) -> None:
+    """
+    Convert the history dates set by MySQL (`now()`, in the time zone of the
+    session) to UTC, like the dates set by the API.
+
+    The migrations run before the API starts, so every existing record was
+    dated by the database. SQLite dates were already in UTC.
+    """
+    if connection.dialect.name != "mysql":
+        return
+
+    # CONVERT_TZ returns NULL for named time zones when the time zone tables
+    # are not loaded: fall back to the current offset of the session.
+    connection.execute(
+        text(
+            "UPDATE command_history SET created_at = COALESCE("
+            "CONVERT_TZ(created_at, @@session.time_zone, '+00:00'), "
+            "created_at - INTERVAL TIMESTAMPDIFF(SECOND, UTC_TIMESTAMP(), NOW()) "
+            "SECOND)"
+        )
+    )
+
+
+# Append only: the versions of the applied migrations must never change.
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "hash_deploy_tokens", hash_deploy_tokens),
+    (2, "index_command_history_created_at", index_command_history_created_at),
+    (3, "index_take_over_access_token", index_take_over_access_token),
+    (4, "index_resources_user_email_name", index_resources_user_email_name),
+    (5, "index_resources_created_at_name", index_resources_created_at_name),
+    (
+        6,
+        "index_command_history_username_created_at",
+        index_command_history_username_created_at,
+    ),
+    (7, "normalize_command_history_created_at", normalize_command_history_created_at),
+]
+
+
+def run_migrations(connection: Connection) -> List[int]:
+    """
+    Apply the pending migrations in order and return their versions.
+    """
+    schema_migration.create(connection, checkfirst=True)
+
+    applied = set(connection.execute(select(schema_migration.c.version)).scalars())
+    pending = [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+    for version, name, migrate in pending:
+        logging.info(f"Applying schema migration {version}: {name}")
+        migrate(connection)
+
+        connection.execute(
+            schema_migration.insert().values(
+                version=version,
+                name=name,
+                applied_at=datetime.datetime.now(datetime.timezone.utc),
+            )
+        )
+
+    return [version for version, _, _ in pending]
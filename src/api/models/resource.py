@@ -1,4 +1,5 @@
-from sqlalchemy import Column, DateTime, func
+from sqlalchemy import Column, DateTime, Index, func
+from sqlalchemy.orm import declared_attr
 
 from src.api.models.base import Base
 
@@ -6,6 +7,15 @@ from src.api.models.base import Base
 class Resource(Base):
     __abstract__ = True
 
+    @declared_attr
+    def __table_args__(cls):
+        # The resources are looked up by owner and name, and listed by
+        # creation date (keyset pagination).
+        return (
+            Index(f"ix_{cls.__tablename__}_user_email_name", "user_email", "name"),
+            Index(f"ix_{cls.__tablename__}_created_at_name", "created_at", "name"),
+        )
+
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -1,7 +1,28 @@
+import asyncio
+import logging
+import math
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import event, exc
 from sqlalchemy.engine.url import make_url
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.api.models.base import Base
+from src.api.models.migrations import run_migrations
+from src.api.tools.metrics import (
+    db_pool_wait_duration,
+    db_query_duration,
+    db_session_duration,
+    get_query_operation,
+)
 from src.config import Config
 
 DB_USER = Config.DATABASE.DB_USER
@@ -27,16 +48,226 @@ if DATABASE_URL.startswith("mysql://"):
 
     DATABASE_URL = f"mysql+aiomysql://{user}:{password}@{host}{port}{database}"
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+
+class MeasuredQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that measures how long the checkouts wait for a connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+
+        try:
+            return super()._do_get()
+
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+
+        finally:
+            wait = time.perf_counter() - start
+
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+            db_pool_wait_duration.observe(wait)
+
+
+def get_worker_share(total: int, minimum: int = 1) -> int:
+    """
+    Split a limit shared by all the workers, as each one has its own pool.
+    """
+    return max(minimum, math.ceil(total / max(Config.API_WORKERS_COUNT, 1)))
+
+
+engine_options = {}
+
+# SQLite (local development and tests) keeps its own pooling.
+if make_url(DATABASE_URL).get_backend_name() != "sqlite":
+    engine_options = {
+        "poolclass": MeasuredQueuePool,
+        "pool_size": get_worker_share(Config.DATABASE.DB_POOL_SIZE),
+        "max_overflow": get_worker_share(Config.DATABASE.DB_MAX_OVERFLOW, 0),
+        "pool_timeout": Config.DATABASE.DB_POOL_TIMEOUT,
+        "pool_recycle": Config.DATABASE.DB_POOL_RECYCLE,
+        "pool_pre_ping": Config.DATABASE.DB_POOL_PRE_PING,
+    }
+
+engine = create_async_engine(DATABASE_URL, echo=False, **engine_options)
 
 AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
 
 
-async def get_db_session():
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    start = conn.info["query_start_time"].pop()
+    db_query_duration.observe(
+        time.perf_counter() - start, operation=get_query_operation(statement)
+    )
+
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _handle_error(context):
+    if context.connection is None:
+        return
+
+    start_times = context.connection.info.get("query_start_time")
+
+    if start_times:
+        start_times.pop()
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checkout_time"] = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _checkin(dbapi_connection, connection_record):
+    start = connection_record.info.pop("checkout_time", None)
+
+    if start is not None:
+        db_session_duration.observe(time.perf_counter() - start)
+
+
+class RequestSession:
+    """
+    Database session shared by everything a request runs, opened on first use
+    and closed once at the end of the request.
+
+    Only the task of the request uses it: an AsyncSession must not be used
+    concurrently, so tasks spawned by the request (gathered coroutines,
+    background jobs) open their own sessions.
+    """
+
+    def __init__(self):
+        self.task = asyncio.current_task()
+        self._session: Optional[AsyncSession] = None
+
+    @property
+    def opened(self) -> bool:
+        return self._session is not None
+
+    def get(self) -> AsyncSession:
+        if self._session is None:
+            self._session = AsyncSessionLocal()
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+_request_session: ContextVar[Optional[RequestSession]] = ContextVar(
+    "db_request_session", default=None
+)
+
+
+@asynccontextmanager
+async def request_session_scope() -> AsyncIterator[RequestSession]:
+    """
+    Share a lazily opened database session with the current request.
+    """
+    request_session = RequestSession()
+    token = _request_session.set(request_session)
+
+    try:
+        yield request_session
+    finally:
+        _request_session.reset(token)
+        await request_session.close()
+
+
+@asynccontextmanager
+async def open_db_session() -> AsyncIterator[AsyncSession]:
+    """
+    Use the session of the current request, or a new one outside of requests.
+    """
+    request_session = _request_session.get()
+
+    if request_session is not None and request_session.task is asyncio.current_task():
+        yield request_session.get()
+        return
+
     async with AsyncSessionLocal() as session:
         yield session
 
 
+async def get_db_session():
+    async with open_db_session() as session:
+        yield session
+
+
+def get_pool_stats() -> Dict:
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            {
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+            }
+        )
+
+    if isinstance(pool, MeasuredQueuePool):
+        stats.update(
+            {
+                "checkouts": pool.checkouts,
+                "timeouts": pool.timeouts,
+                "average_wait": (
+                    pool.total_wait / pool.checkouts if pool.checkouts else 0.0
+                ),
+                "max_wait": pool.max_wait,
+            }
+        )
+
+    return stats
+
+
+async def warm_up_database_pool() -> None:
+    """
+    Open the minimum connections of the pool.
+
+    A failure is only logged, the connections are opened on demand.
+    """
+    size = engine.pool.size() if isinstance(engine.pool, AsyncAdaptedQueuePool) else 1
+
+    try:
+        async with AsyncExitStack() as stack:
+            for _ in range(size):
+                await stack.enter_async_context(engine.connect())
+
+    except Exception as error:
+        logging.warning(f"Could not warm up the database connections: {error}")
+
+
 async def init_models():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+
+async def migrate_database() -> List[int]:
+    """
+    Apply the pending schema migrations (see `src.api.models.migrations`).
+    """
+    async with engine.begin() as conn:
+        return await conn.run_sync(run_migrations)
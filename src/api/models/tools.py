@@ -1,12 +1,13 @@
+import base64
 import datetime
+import json
 import secrets
 import time
-from typing import List, Optional, Tuple, Type
+from typing import AsyncIterator, List, Optional, Tuple, Type
 
 from fastapi import HTTPException
-from sqlalchemy import and_, select, update
+from sqlalchemy import and_, case, delete, func, insert, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from src.api.models.base import (
     USER_EAGER_LOAD,
@@ -20,10 +21,28 @@ from src.api.models.base import (
 )
 from src.api.schemas import UserSchema
 from src.api.tools import hash_access_token, validate_email_format
+from src.api.tools.session_cache import session_cache
+
+
+def get_user_schema(user: User, with_resources: bool = True) -> UserSchema:
+    # The values come from the database, so the (per item) validation of the
+    # resource lists is skipped.
+    if not with_resources:
+        return UserSchema.construct(
+            id=user.id,
+            email=user.email,
+            access_token=user.access_token,
+            access_token_expiration=user.access_token_expiration,
+            apps_quota=user.apps_quota,
+            services_quota=user.services_quota,
+            networks_quota=user.networks_quota,
+            created_at=user.created_at,
+            is_admin=user.is_admin,
+            take_over_access_token=user.take_over_access_token,
+            take_over_access_token_expiration=user.take_over_access_token_expiration,
+        )
 
-
-def get_user_schema(user: User) -> UserSchema:
-    return UserSchema(
+    return UserSchema.construct(
         id=user.id,
         email=user.email,
         access_token=user.access_token,
@@ -45,14 +64,140 @@ def get_user_schema(user: User) -> UserSchema:
 
 
 async def log_command(command: str, username: str, db_session: AsyncSession) -> None:
-    db_session.add(CommandHistory(command=command, username=username))
+    # Same clock as the history writer (see `log_commands`), so the records
+    # of both writers are ordered and pruned consistently.
+    created_at = datetime.datetime.now(datetime.timezone.utc)
+    db_session.add(
+        CommandHistory(command=command, username=username, created_at=created_at)
+    )
     await db_session.commit()
 
 
+async def log_commands(
+    records: List[Tuple[str, str, datetime.datetime]], db_session: AsyncSession
+) -> None:
+    if not records:
+        return None
+
+    await db_session.execute(
+        insert(CommandHistory).values(
+            [
+                {"command": command, "username": username, "created_at": created_at}
+                for command, username, created_at in records
+            ]
+        )
+    )
+    await db_session.commit()
+
+
+def to_utc(value: datetime.datetime) -> datetime.datetime:
+    """
+    Convert a date to naive UTC, as the history dates are stored (MySQL drops
+    the time zone). Naive dates are taken as UTC.
+    """
+    if value.tzinfo is None:
+        return value
+
+    return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def get_command_history_cursor(record: CommandHistory) -> str:
+    """
+    Cursor of the history continuing before (older than) the given record.
+    """
+    data = json.dumps([record.created_at.isoformat(), record.id]).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def parse_command_history_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return to_utc(datetime.datetime.fromisoformat(created_at)), int(id)
+
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def get_command_history_query(
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    username: Optional[str] = None,
+    subcommand: Optional[str] = None,
+    cursor: Optional[str] = None,
+):
+    """
+    Query the history from the newest record, within [since, until) and
+    continuing before `cursor`, if given.
+
+    The `subcommand` is a prefix of the Dokku command (e.g. "apps:"), with
+    or without the "dokku" of the commands run as root.
+    """
+    created_at, id = CommandHistory.created_at, CommandHistory.id
+    query = select(CommandHistory).order_by(created_at.desc(), id.desc())
+
+    if since is not None:
+        query = query.where(created_at >= to_utc(since))
+
+    if until is not None:
+        query = query.where(created_at < to_utc(until))
+
+    if username is not None:
+        query = query.where(CommandHistory.username == username)
+
+    if subcommand:
+        prefix = (
+            subcommand.removeprefix("dokku ")
+            .replace("\\", "\\\\")
+            .replace("%", "\\%")
+            .replace("_", "\\_")
+        )
+        query = query.where(
+            or_(
+                CommandHistory.command.like(f"{prefix}%", escape="\\"),
+                CommandHistory.command.like(f"dokku {prefix}%", escape="\\"),
+            )
+        )
+
+    if cursor is not None:
+        cursor_created_at, cursor_id = parse_command_history_cursor(cursor)
+        query = query.where(
+            or_(
+                created_at < cursor_created_at,
+                and_(created_at == cursor_created_at, id < cursor_id),
+            )
+        )
+
+    return query
+
+
+def format_command_history(record: CommandHistory) -> str:
+    return (
+        f"{record.created_at.strftime('[%Y-%m-%d %H:%M:%S]')} - "
+        f"SSH Command: {record.command}"
+    )
+
+
+def serialize_command_history(record: CommandHistory) -> dict:
+    return {
+        "id": record.id,
+        "created_at": record.created_at.isoformat(),
+        "username": record.username,
+        "command": record.command,
+    }
+
+
 async def get_command_history(
-    db_session: AsyncSession, limit: Optional[int] = 1000
-) -> List[str]:
-    query = select(CommandHistory).order_by(CommandHistory.created_at.desc())
+    db_session: AsyncSession,
+    limit: Optional[int] = 1000,
+    cursor: Optional[str] = None,
+    **filters,
+) -> Tuple[List[str], Optional[str]]:
+    """
+    Get the newest records of the history (see `get_command_history_query`
+    for the filters), formatted from the oldest one, and the cursor of the
+    previous page, if the page is full.
+    """
+    query = get_command_history_query(cursor=cursor, **filters)
 
     if limit is not None:
         query = query.limit(limit)
@@ -60,11 +205,67 @@ async def get_command_history(
     result = await db_session.execute(query)
     records = result.scalars().all()
 
-    return [
-        f"{record.created_at.strftime('[%Y-%m-%d %H:%M:%S]')} - "
-        f"SSH Command: {record.command}"
-        for record in reversed(records)
-    ]
+    next_cursor = None
+
+    if records and len(records) == limit:
+        next_cursor = get_command_history_cursor(records[-1])
+
+    return [format_command_history(record) for record in reversed(records)], next_cursor
+
+
+async def iter_command_history(
+    db_session: AsyncSession,
+    cursor: Optional[str] = None,
+    batch_size: int = 500,
+    **filters,
+) -> AsyncIterator[dict]:
+    """
+    Stream the history from the newest record, fetched by batches.
+    """
+    query = get_command_history_query(cursor=cursor, **filters)
+
+    result = await db_session.stream_scalars(
+        query.execution_options(yield_per=batch_size)
+    )
+
+    async for record in result:
+        yield serialize_command_history(record)
+
+
+async def prune_command_history(
+    max_age: datetime.timedelta, db_session: AsyncSession, batch_size: int = 1000
+) -> int:
+    """
+    Delete the records older than `max_age`, by batches of `batch_size` rows
+    (one transaction each), so the table is never locked for long. Return the
+    number of deleted records.
+    """
+    older_than = to_utc(datetime.datetime.now(datetime.timezone.utc)) - max_age
+    deleted = 0
+
+    while True:
+        result = await db_session.execute(
+            select(CommandHistory.id)
+            .where(CommandHistory.created_at < older_than)
+            .order_by(CommandHistory.created_at)
+            .limit(batch_size)
+        )
+        ids = result.scalars().all()
+
+        if not ids:
+            break
+
+        await db_session.execute(
+            delete(CommandHistory).where(CommandHistory.id.in_(ids))
+        )
+        await db_session.commit()
+
+        deleted += len(ids)
+
+        if len(ids) < batch_size:
+            break
+
+    return deleted
 
 
 async def get_users(db_session: AsyncSession, only_admin: bool = False) -> List[str]:
@@ -166,6 +367,8 @@ async def update_user(email: str, user: UserSchema, db_session: AsyncSession) ->
     await db_session.commit()
     await db_session.refresh(db_user)
 
+    session_cache.invalidate([email, user.email])
+
 
 async def delete_user(email: str, db_session: AsyncSession) -> None:
     result = await db_session.execute(select(User).filter_by(email=email))
@@ -177,24 +380,88 @@ async def delete_user(email: str, db_session: AsyncSession) -> None:
     await db_session.delete(db_user)
     await db_session.commit()
 
+    # The sharings of its apps are deleted too, so invalidate every user.
+    session_cache.invalidate()
 
-async def get_resources(
+
+def serialize_resource(resource: Resource) -> dict:
+    return {
+        "name": getattr(resource, "name", None),
+        "user_email": getattr(resource, "user_email", None),
+        "created_at": (
+            resource.created_at.isoformat()
+            if getattr(resource, "created_at", None)
+            else None
+        ),
+    }
+
+
+def get_resource_cursor(resource: dict) -> str:
+    """
+    Cursor of the listings continuing after the given (serialized) resource.
+    """
+    data = json.dumps([resource["created_at"], resource["name"]]).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def parse_resource_cursor(cursor: str) -> Tuple[datetime.datetime, str]:
+    try:
+        created_at, name = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.datetime.fromisoformat(created_at), str(name)
+
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def get_resources_query(
     resource_type: Type[Resource],
-    offset: int,
-    limit: Optional[int],
-    db_session: AsyncSession,
     asc_created_at: Optional[bool] = None,
-) -> List[dict]:
+    cursor: Optional[str] = None,
+):
+    """
+    Query the resources ordered by (created_at, name). With a cursor, the
+    query continues after it (keyset pagination).
+    """
     query = select(resource_type)
 
-    if asc_created_at is not None:
-        created_col = getattr(resource_type, "created_at", None)
+    if asc_created_at is None and cursor is None:
+        return query
+
+    created_at, name = resource_type.created_at, resource_type.name
+
+    if asc_created_at:
+        query = query.order_by(created_at.asc(), name.asc())
+    else:
+        query = query.order_by(created_at.desc(), name.desc())
+
+    if cursor is not None:
+        cursor_created_at, cursor_name = parse_resource_cursor(cursor)
 
         if asc_created_at:
-            query = query.order_by(created_col.asc())
+            after_cursor = or_(
+                created_at > cursor_created_at,
+                and_(created_at == cursor_created_at, name > cursor_name),
+            )
         else:
-            query = query.order_by(created_col.desc())
+            after_cursor = or_(
+                created_at < cursor_created_at,
+                and_(created_at == cursor_created_at, name < cursor_name),
+            )
+
+        query = query.where(after_cursor)
+
+    return query
 
+
+async def get_resources(
+    resource_type: Type[Resource],
+    offset: int,
+    limit: Optional[int],
+    db_session: AsyncSession,
+    asc_created_at: Optional[bool] = None,
+    cursor: Optional[str] = None,
+) -> List[dict]:
+    query = get_resources_query(resource_type, asc_created_at, cursor)
     query = query.offset(offset)
 
     if limit is not None:
@@ -203,19 +470,29 @@ async def get_resources(
     result = await db_session.execute(query)
     resources = result.scalars().all()
 
-    def serialize_resource(r: Resource) -> dict:
-        data = {
-            "name": getattr(r, "name", None),
-            "user_email": getattr(r, "user_email", None),
-            "created_at": (
-                r.created_at.isoformat() if getattr(r, "created_at", None) else None
-            ),
-        }
-        return data
-
     return [serialize_resource(r) for r in resources]
 
 
+async def iter_resources(
+    resource_type: Type[Resource],
+    db_session: AsyncSession,
+    asc_created_at: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    batch_size: int = 500,
+) -> AsyncIterator[dict]:
+    """
+    Stream all the resources, fetched by batches instead of loaded at once.
+    """
+    query = get_resources_query(resource_type, asc_created_at, cursor)
+
+    result = await db_session.stream_scalars(
+        query.execution_options(yield_per=batch_size)
+    )
+
+    async for resource in result:
+        yield serialize_resource(resource)
+
+
 async def create_resource(
     email: str,
     name: str,
@@ -224,39 +501,55 @@ async def create_resource(
 ) -> None:
     ResourceType = resource_type
 
+    quota_columns = {
+        App: User.apps_quota,
+        Service: User.services_quota,
+        Network: User.networks_quota,
+    }
+
+    # Lock the user row, so that concurrent creates of the same user are
+    # serialized and cannot overshoot the quota.
     user_result = await db_session.execute(
-        select(User).options(*USER_EAGER_LOAD).filter_by(email=email)
+        select(User.email, quota_columns[ResourceType])
+        .filter_by(email=email)
+        .with_for_update()
     )
-
-    db_user = user_result.scalar_one_or_none()
+    db_user = user_result.one_or_none()
 
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    existing_result = await db_session.execute(
-        select(ResourceType).filter_by(name=name, user_email=email)
+    quota = db_user[1]
+
+    # The transaction of the token lookup was ended (see
+    # `UserSessionMiddleware`), so this first plain read takes its snapshot
+    # after the lock of the user row, and sees the committed resources.
+    count_result = await db_session.execute(
+        select(
+            func.count(),
+            func.count(case((ResourceType.name == name, 1))),
+        ).where(ResourceType.user_email == email)
     )
+    used, existing = count_result.one()
 
-    if existing_result.scalar_one_or_none():
-        raise HTTPException(status_code=400, detail="Resource already exists")
+    if existing or quota <= used:
+        # Release the lock of the user row.
+        await db_session.rollback()
 
-    quota_map = {
-        App: (db_user.apps_quota, db_user.apps),
-        Service: (db_user.services_quota, db_user.services),
-        Network: (db_user.networks_quota, db_user.networks),
-    }
-    quota, resources = quota_map.get(ResourceType)
+        if existing:
+            raise HTTPException(status_code=400, detail="Resource already exists")
 
-    if quota <= len(resources):
         raise HTTPException(status_code=403, detail="Quota exceeded")
 
-    resource = ResourceType(name=name, user_email=db_user.email)
+    resource = ResourceType(name=name, user_email=email)
 
     db_session.add(resource)
 
     await db_session.commit()
     await db_session.refresh(resource)
 
+    session_cache.invalidate([email])
+
 
 async def rename_resource(
     email: str,
@@ -297,8 +590,11 @@ async def rename_resource(
         await db_session.commit()
         await db_session.refresh(resource)
 
+        session_cache.invalidate([email])
         return None
 
+    shared_users = await get_shared_app_users(old_name, db_session)
+
     # Update App name by creating a new App instance.
     new_app = App(
         name=new_name,
@@ -320,6 +616,8 @@ async def rename_resource(
     await db_session.commit()
     await db_session.refresh(new_app)
 
+    session_cache.invalidate([email] + shared_users)
+
 
 async def delete_resource(
     email: str,
@@ -341,34 +639,65 @@ async def delete_resource(
     if not resource:
         raise HTTPException(status_code=404, detail="Resource not found")
 
+    shared_users = []
+
+    if resource_type is App:
+        shared_users = await get_shared_app_users(name, db_session)
+
     await db_session.delete(resource)
     await db_session.commit()
 
+    session_cache.invalidate([email] + shared_users)
+
 
 async def get_app_by_deploy_token(
     deploy_token: str, db_session: AsyncSession
 ) -> Tuple[App, UserSchema]:
+    """
+    Get an app and its owner (without its resources) by deploy token.
+    """
     result = await db_session.execute(
-        select(App)
-        .options(selectinload(App.user).options(*USER_EAGER_LOAD))
-        .filter_by(deploy_token=deploy_token)
+        select(App, User)
+        .join(User, App.user_email == User.email)
+        .filter(App.deploy_token_hash == hash_access_token(deploy_token))
     )
-    app = result.scalar_one_or_none()
+    row = result.one_or_none()
 
-    if not app:
+    if not row:
         raise HTTPException(status_code=404, detail="App does not exist")
 
-    return app, get_user_schema(app.user)
+    app, user = row
+
+    return app, get_user_schema(user, with_resources=False)
 
 
-async def get_app_deployment_token(name: str, db_session: AsyncSession) -> str:
+async def create_app_deployment_token(
+    name: str, db_session: AsyncSession, rotate: bool = False
+) -> str:
+    """
+    Issue a deploy token for the app. If the app already has one, a new token
+    replaces (revokes) it only with `rotate`.
+
+    Only its hash is stored, so the token can only be returned here.
+    """
     result = await db_session.execute(select(App).filter_by(name=name))
     app = result.scalar_one_or_none()
 
     if not app:
         raise HTTPException(status_code=404, detail="App does not exist")
 
-    return app.deploy_token
+    if app.deploy_token_hash and not rotate:
+        raise HTTPException(
+            status_code=400,
+            detail="Deployment token already issued, rotate it to get a new one",
+        )
+
+    deploy_token = f"{name}-{secrets.token_urlsafe(512)}"
+    app.deploy_token_hash = hash_access_token(deploy_token)
+
+    await db_session.commit()
+
+    return deploy_token
 
 
 async def create_take_over_access_token(email: str, db_session: AsyncSession) -> str:
@@ -388,6 +717,8 @@ async def create_take_over_access_token(email: str, db_session: AsyncSession) ->
     await db_session.commit()
     await db_session.refresh(user)
 
+    session_cache.invalidate([email])
+
     return take_over_access_token
 
 
@@ -400,7 +731,7 @@ async def share_app(
 ) -> None:
     target_user = await get_user(email, db_session)
 
-    shared = (email, app_name) in target_user.shared_apps
+    shared = (email, app_name) in target_user.shared_app_set
 
     if shared:
         raise HTTPException(status_code=400, detail="App already shared with this user")
@@ -416,6 +747,8 @@ async def share_app(
     await db_session.commit()
     await db_session.refresh(shared_app)
 
+    session_cache.invalidate([email])
+
 
 async def get_shared_app_users(app_name: str, db_session: AsyncSession) -> List[str]:
     result = await db_session.execute(select(SharedApp).filter_by(app_name=app_name))
@@ -437,3 +770,5 @@ async def unshare_app(app_name: str, email: str, db_session: AsyncSession) -> No
 
     await db_session.delete(shared)
     await db_session.commit()
+
+    session_cache.invalidate([email])
@@ -1,13 +1,24 @@
+import json
 import os
 import signal
 from datetime import datetime
+from typing import Optional
 
 from fastapi import APIRouter, Depends, FastAPI, File, UploadFile, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.models import DATABASE_URL, get_command_history, get_db_session
-from src.api.tools.ssh import run_command
+from src.api.models import (
+    DATABASE_URL,
+    get_command_history,
+    get_db_session,
+    get_pool_stats,
+    iter_command_history,
+)
+from src.api.tools.cache import command_cache
+from src.api.tools.history import history_writer
+from src.api.tools.session_cache import session_cache
+from src.api.tools.ssh import governor, run_command, single_flight
 from src.config import Config
 
 
@@ -45,6 +56,19 @@ def get_router(app: FastAPI) -> APIRouter:
             content={
                 "workers_count": Config.API_WORKERS_COUNT,
                 "max_connections_per_request": Config.API_MAX_CONNECTIONS_PER_REQUEST,
+                "max_connections_per_user": Config.API_MAX_CONNECTIONS_PER_USER,
+                "max_connections": Config.API_MAX_CONNECTIONS,
+                "max_queued_commands": Config.API_MAX_QUEUED_COMMANDS,
+                "cache_ttl": Config.API_CACHE_TTL,
+                "cache_max_entries": Config.API_CACHE_MAX_ENTRIES,
+                "session_cache_ttl": Config.API_SESSION_CACHE_TTL,
+                "session_cache_max_entries": Config.API_SESSION_CACHE_MAX_ENTRIES,
+                "history_batch_size": Config.API_HISTORY_BATCH_SIZE,
+                "history_flush_interval": Config.API_HISTORY_FLUSH_INTERVAL,
+                "history_queue_size": Config.API_HISTORY_QUEUE_SIZE,
+                "history_drop_policy": Config.API_HISTORY_DROP_POLICY,
+                "history_retention_days": Config.API_HISTORY_RETENTION_DAYS,
+                "history_prune_batch_size": Config.API_HISTORY_PRUNE_BATCH_SIZE,
                 "reload": Config.API_RELOAD,
                 "log_level": Config.API_LOG_LEVEL,
                 "api_key": Config.API_KEY,
@@ -57,6 +81,9 @@ def get_router(app: FastAPI) -> APIRouter:
                     "hostname": Config.SSH_SERVER.SSH_HOSTNAME,
                     "port": Config.SSH_SERVER.SSH_PORT,
                     "key_path": Config.SSH_SERVER.SSH_KEY_PATH,
+                    "pool_size": Config.SSH_SERVER.SSH_POOL_SIZE,
+                    "pool_max_channels": Config.SSH_SERVER.SSH_POOL_MAX_CHANNELS,
+                    "keepalive_interval": Config.SSH_SERVER.SSH_KEEPALIVE_INTERVAL,
                 },
                 "database": {
                     "host": Config.DATABASE.HOST,
@@ -65,6 +92,11 @@ def get_router(app: FastAPI) -> APIRouter:
                     "user": Config.DATABASE.DB_USER,
                     "password": Config.DATABASE.DB_PASSWORD,
                     "url": DATABASE_URL,
+                    "pool_size": Config.DATABASE.DB_POOL_SIZE,
+                    "max_overflow": Config.DATABASE.DB_MAX_OVERFLOW,
+                    "pool_timeout": Config.DATABASE.DB_POOL_TIMEOUT,
+                    "pool_recycle": Config.DATABASE.DB_POOL_RECYCLE,
+                    "pool_pre_ping": Config.DATABASE.DB_POOL_PRE_PING,
                 },
                 "available_databases": Config.AVAILABLE_DATABASES,
             },
@@ -156,13 +188,67 @@ def get_router(app: FastAPI) -> APIRouter:
     @router.post("/ssh-history/", response_description="Check SSH command history")
     async def get_ssh_command_history(
         limit: int = 1000,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        username: Optional[str] = None,
+        subcommand: Optional[str] = None,
+        cursor: Optional[str] = None,
+        ndjson: bool = False,
         db_session: AsyncSession = Depends(get_db_session),
     ):
-        history = await get_command_history(db_session, limit=limit)
+        filters = {
+            "since": since,
+            "until": until,
+            "username": username,
+            "subcommand": subcommand,
+        }
 
+        if ndjson:
+
+            async def lines():
+                async for record in iter_command_history(
+                    db_session, cursor=cursor, **filters
+                ):
+                    yield json.dumps(record) + "\n"
+
+            return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+        history, next_cursor = await get_command_history(
+            db_session, limit=limit, cursor=cursor, **filters
+        )
+
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={"status": "ok", "history": history, "next_cursor": next_cursor},
+        )
+
+    @router.post(
+        "/ssh-stats/", response_description="Check SSH concurrency and queue stats"
+    )
+    async def get_ssh_stats():
         return JSONResponse(
             status_code=status.HTTP_200_OK,
-            content={"status": "ok", "history": history},
+            content={
+                "status": "ok",
+                "stats": governor.stats(),
+                "cache": command_cache.stats(),
+                "single_flight": single_flight.stats(),
+                "history": history_writer.stats(),
+                "session_cache": session_cache.stats(),
+            },
+        )
+
+    @router.post(
+        "/database-stats/",
+        response_description="Check the database connection pool stats",
+    )
+    async def get_database_stats():
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                "status": "ok",
+                "pool": get_pool_stats(),
+            },
         )
 
     @router.post("/shutdown/", response_description="Shutdown the API server")
@@ -1,8 +1,64 @@
+import json
+from typing import Optional, Type
+
 from fastapi import APIRouter, Depends, FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.models import App, Network, Service, get_db_session, get_resources
+from src.api.models import (
+    App,
+    Network,
+    Resource,
+    Service,
+    get_db_session,
+    get_resource_cursor,
+    get_resources,
+    iter_resources,
+)
+
+
+async def list_resources(
+    resource_type: Type[Resource],
+    offset: int,
+    limit: int,
+    asc_created_at: bool,
+    cursor: Optional[str],
+    ndjson: bool,
+    db_session: AsyncSession,
+):
+    """
+    List a page of resources, continuing after `cursor` if given. The cursor
+    of the next page is returned in the "X-Next-Cursor" header.
+
+    With `ndjson`, every resource (after `cursor`) is streamed instead, one
+    JSON object per line.
+    """
+    if ndjson:
+
+        async def lines():
+            async for resource in iter_resources(
+                resource_type, db_session, asc_created_at, cursor
+            ):
+                yield json.dumps(resource) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    resources = await get_resources(
+        resource_type,
+        offset,
+        limit,
+        db_session=db_session,
+        asc_created_at=asc_created_at,
+        cursor=cursor,
+    )
+    headers = {}
+
+    if resources and len(resources) == limit:
+        headers["X-Next-Cursor"] = get_resource_cursor(resources[-1])
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK, content=resources, headers=headers
+    )
 
 
 def get_router(app: FastAPI) -> APIRouter:
@@ -14,16 +70,13 @@ def get_router(app: FastAPI) -> APIRouter:
         offset: int = 0,
         limit: int = 20,
         asc_created_at: bool = False,
+        cursor: Optional[str] = None,
+        ndjson: bool = False,
         db_session: AsyncSession = Depends(get_db_session),
     ):
-        apps = await get_resources(
-            App,
-            offset,
-            limit,
-            db_session=db_session,
-            asc_created_at=asc_created_at,
+        return await list_resources(
+            App, offset, limit, asc_created_at, cursor, ndjson, db_session
         )
-        return JSONResponse(status_code=status.HTTP_200_OK, content=apps)
 
     @router.post("/services/", response_description="Get services from database")
     async def get_services(
@@ -31,16 +84,13 @@ def get_router(app: FastAPI) -> APIRouter:
         offset: int = 0,
         limit: int = 20,
         asc_created_at: bool = False,
+        cursor: Optional[str] = None,
+        ndjson: bool = False,
         db_session: AsyncSession = Depends(get_db_session),
     ):
-        services = await get_resources(
-            Service,
-            offset,
-            limit,
-            db_session=db_session,
-            asc_created_at=asc_created_at,
+        return await list_resources(
+            Service, offset, limit, asc_created_at, cursor, ndjson, db_session
         )
-        return JSONResponse(status_code=status.HTTP_200_OK, content=services)
 
     @router.post("/networks/", response_description="Get networks from database")
     async def get_networks(
@@ -48,15 +98,12 @@ def get_router(app: FastAPI) -> APIRouter:
         offset: int = 0,
         limit: int = 20,
         asc_created_at: bool = False,
+        cursor: Optional[str] = None,
+        ndjson: bool = False,
         db_session: AsyncSession = Depends(get_db_session),
     ):
-        networks = await get_resources(
-            Network,
-            offset,
-            limit,
-            db_session=db_session,
-            asc_created_at=asc_created_at,
+        return await list_resources(
+            Network, offset, limit, asc_created_at, cursor, ndjson, db_session
         )
-        return JSONResponse(status_code=status.HTTP_200_OK, content=networks)
 
     return router
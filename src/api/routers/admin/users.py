@@ -27,7 +27,6 @@ from src.api.models import (
 )
 from src.api.services import AppService, DatabaseService, NetworkService
 from src.api.tools import hash_access_token
-from src.api.tools.resource import ResourceName
 from src.api.tools.ssh import run_command_as_root
 
 
@@ -72,19 +71,16 @@ def get_router(app: FastAPI) -> APIRouter:
     ):
         user = await get_user(email, db_session)
 
-        for app_name in user.apps:
-            app_name = str(ResourceName(user, app_name, from_system=True))
+        for app_name in user.normalized_apps.values():
             await AppService.delete_app(user, app_name, db_session)
 
-        for service_name in user.services:
-            plugin_name, database_name = service_name.split(":", maxsplit=1)
-            database_name = str(ResourceName(user, database_name, from_system=True))
-            await DatabaseService.delete_database(
-                user, plugin_name, database_name, db_session
-            )
+        for plugin_name, services in user.services_by_plugin.items():
+            for database_name in services.values():
+                await DatabaseService.delete_database(
+                    user, plugin_name, database_name, db_session
+                )
 
-        for network_name in user.networks:
-            network_name = str(ResourceName(user, network_name, from_system=True))
+        for network_name in user.normalized_networks.values():
             await NetworkService.delete_network(user, network_name, db_session)
 
         await delete_user(email, db_session)
@@ -2,7 +2,7 @@ import os
 from typing import Optional
 
 from fastapi import APIRouter, Depends, FastAPI, Request, status
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.models import get_db_session
@@ -13,9 +13,9 @@ def get_router(app: FastAPI) -> APIRouter:
     router = APIRouter()
 
     @router.post("/list/", response_description="Return all applications")
-    async def list_apps(request: Request, return_info: bool = True):
+    async def list_apps(request: Request, return_info: bool = True, bulk: bool = False):
         success, result = await AppService.list_apps(
-            request.state.session_user, return_info
+            request.state.session_user, return_info, bulk
         )
 
         return JSONResponse(
@@ -270,15 +270,22 @@ def get_router(app: FastAPI) -> APIRouter:
 
     @router.post(
         "/{app_name}/deployment-token/",
-        response_description="Return the deployment token of an application",
+        response_description="Issue a new deployment token for an application",
+        description=(
+            "Only a hash of the deployment token is stored, so the token is "
+            "returned once, when it is issued. Fetching a token issues a new "
+            "one. If the application already has a token, `rotate` must be "
+            "set: the new token replaces the previous one, which stops working."
+        ),
     )
     async def get_deployment_token(
         request: Request,
         app_name: str,
+        rotate: bool = False,
         db_session: AsyncSession = Depends(get_db_session),
     ):
         success, result = await AppService.get_deployment_token(
-            request.state.session_user, app_name, db_session
+            request.state.session_user, app_name, db_session, rotate
         )
 
         return JSONResponse(
@@ -298,11 +305,15 @@ def get_router(app: FastAPI) -> APIRouter:
         app_name: str,
         n_lines: int = 2000,
         shared_by: Optional[str] = None,
+        stream: bool = False,
     ):
         success, result = await AppService.get_logs(
-            request.state.session_user, app_name, n_lines, shared_by
+            request.state.session_user, app_name, n_lines, shared_by, stream
         )
 
+        if stream and success:
+            return StreamingResponse(result, media_type="text/plain")
+
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
@@ -597,7 +608,7 @@ def get_router(app: FastAPI) -> APIRouter:
         shared_by: Optional[str] = None,
     ):
         success, result = await AppService.download_file(
-            request.state.session_user, app_name, filename, shared_by
+            request.state.session_user, app_name, filename, shared_by, stream=True
         )
 
         if not success:
@@ -609,8 +620,8 @@ def get_router(app: FastAPI) -> APIRouter:
                 },
             )
 
-        return Response(
-            content=result,
+        return StreamingResponse(
+            result,
             media_type="application/octet-stream",
             headers={
                 "Content-Disposition": f"attachment; filename={os.path.basename(filename)}",
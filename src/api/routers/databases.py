@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.models import get_db_session
@@ -10,9 +10,11 @@ def get_router(app: FastAPI) -> APIRouter:
     router = APIRouter()
 
     @router.post("/list/", response_description="Return all databases")
-    async def list_all_databases(request: Request, return_info: bool = True):
+    async def list_all_databases(
+        request: Request, return_info: bool = True, lightweight: bool = False
+    ):
         success, result = await DatabaseService.list_all_databases(
-            request.state.session_user, return_info
+            request.state.session_user, return_info, lightweight
         )
 
         return JSONResponse(
@@ -31,9 +33,10 @@ def get_router(app: FastAPI) -> APIRouter:
         request: Request,
         plugin_name: str,
         return_info: bool = True,
+        lightweight: bool = False,
     ):
         success, result = await DatabaseService.list_databases(
-            request.state.session_user, plugin_name, return_info
+            request.state.session_user, plugin_name, return_info, lightweight
         )
 
         return JSONResponse(
@@ -173,11 +176,21 @@ def get_router(app: FastAPI) -> APIRouter:
         request: Request,
         plugin_name: str,
         database_name: str,
+        stream: bool = False,
     ):
         success, result = await DatabaseService.export_as_dump(
-            request.state.session_user, plugin_name, database_name
+            request.state.session_user, plugin_name, database_name, stream
         )
 
+        if stream and success:
+            return StreamingResponse(
+                result,
+                media_type="application/octet-stream",
+                headers={
+                    "Content-Disposition": f"attachment; filename={database_name}.dump"
+                },
+            )
+
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
@@ -256,12 +269,19 @@ def get_router(app: FastAPI) -> APIRouter:
         response_description="Return the logs of a database",
     )
     async def get_logs(
-        request: Request, plugin_name: str, database_name: str, n_lines: int = 2000
+        request: Request,
+        plugin_name: str,
+        database_name: str,
+        n_lines: int = 2000,
+        stream: bool = False,
     ):
         success, result = await DatabaseService.get_logs(
-            request.state.session_user, plugin_name, database_name, n_lines
+            request.state.session_user, plugin_name, database_name, n_lines, stream
         )
 
+        if stream and success:
+            return StreamingResponse(result, media_type="text/plain")
+
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, FastAPI, status
+from fastapi.responses import PlainTextResponse
+
+from src.api.tools.metrics import registry
+
+
+def get_router(app: FastAPI) -> APIRouter:
+    router = APIRouter()
+
+    @router.get("/", response_description="Export metrics in the Prometheus format")
+    async def get_metrics():
+        return PlainTextResponse(
+            status_code=status.HTTP_200_OK,
+            content=registry.render(),
+            media_type="text/plain; version=0.0.4",
+        )
+
+    return router
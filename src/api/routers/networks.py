@@ -10,9 +10,11 @@ def get_router(app: FastAPI) -> APIRouter:
     router = APIRouter()
 
     @router.post("/list/", response_description="Return all networks")
-    async def list_networks(request: Request, return_info: bool = True):
+    async def list_networks(
+        request: Request, return_info: bool = True, with_apps: bool = False
+    ):
         success, result = await NetworkService.list_networks(
-            request.state.session_user, return_info
+            request.state.session_user, return_info, with_apps
         )
 
         return JSONResponse(
@@ -1,7 +1,7 @@
 from typing import Literal, Optional
 
 from fastapi import APIRouter, FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from src.api.services.nginx import NginxService
 
@@ -18,16 +18,20 @@ def get_router(app: FastAPI) -> APIRouter:
         app_name: str,
         type: Literal["access", "error"] = "access",
         shared_by: Optional[str] = None,
+        stream: bool = False,
     ):
         if type == "access":
             success, result = await NginxService.get_access_logs(
-                request.state.session_user, app_name, shared_by
+                request.state.session_user, app_name, shared_by, stream
             )
         else:
             success, result = await NginxService.get_error_logs(
-                request.state.session_user, app_name, shared_by
+                request.state.session_user, app_name, shared_by, stream
             )
 
+        if stream and success:
+            return StreamingResponse(result, media_type="text/plain")
+
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
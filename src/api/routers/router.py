@@ -10,6 +10,7 @@ from src.api.routers.databases import get_router as databases_router
 from src.api.routers.domains import get_router as domains_router
 from src.api.routers.git import get_router as git_router
 from src.api.routers.letsencrypt import get_router as letsencrypt_router
+from src.api.routers.metrics import get_router as metrics_router
 from src.api.routers.networks import get_router as networks_router
 from src.api.routers.nginx import get_router as nginx_router
 from src.api.routers.quota import get_router as quota_router
@@ -144,6 +145,14 @@ def get_router(app: FastAPI) -> APIRouter:
             Depends(validate_user_credentials),
         ],
     )
+    router.include_router(
+        metrics_router(app),
+        tags=["Metrics"],
+        prefix="/metrics",
+        dependencies=[
+            Depends(validate_admin),
+        ],
+    )
     router.include_router(
         admin_router(app),
         tags=["Admin"],
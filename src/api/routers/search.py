@@ -1,9 +1,56 @@
-from fastapi import APIRouter, FastAPI, Request, status
+import asyncio
+from typing import Any, Iterable, List, Optional, Tuple
+
+from fastapi import APIRouter, FastAPI, Query, Request, status
 from fastapi.responses import JSONResponse
 
 from src.api.schemas import UserSchema
-from src.api.services import AppService, DatabaseService
-from src.api.tools.resource import ResourceName
+from src.api.services import DatabaseService
+from src.api.services.apps import get_apps_info, get_shared_apps_info
+from src.api.services.databases import get_databases_info
+
+WORD_SEPARATORS = "-_:.@ "
+MAX_SEARCH_LIMIT = 500
+
+
+def get_match_quality(query: str, text: str) -> Optional[int]:
+    """
+    Quality of the match of the query in the text, from 0 (same text) to 3
+    (inside a word), or None if the text does not contain the query.
+    """
+    index = text.find(query)
+
+    if index < 0:
+        return None
+    if text == query:
+        return 0
+    if index == 0:
+        return 1
+    if text[index - 1] in WORD_SEPARATORS:
+        return 2
+    return 3
+
+
+def rank_matches(
+    query: str, candidates: Iterable[Tuple[Any, str, Iterable[str]]]
+) -> List[Tuple[Any, str]]:
+    """
+    Rank the candidates, as (key, name, texts to search), matching the query
+    on any of their texts. The best matches come first, then the shortest
+    names, in alphabetical order.
+    """
+    ranked = []
+
+    for key, name, texts in candidates:
+        qualities = [get_match_quality(query, text) for text in texts]
+        qualities = [quality for quality in qualities if quality is not None]
+
+        if qualities:
+            ranked.append((min(qualities), len(name), name, key))
+
+    ranked.sort(key=lambda match: match[:3])
+
+    return [(key, name) for _, _, name, key in ranked]
 
 
 def get_router(app: FastAPI) -> APIRouter:
@@ -13,74 +60,103 @@ def get_router(app: FastAPI) -> APIRouter:
         "/",
         response_description="Search for apps, services, networks, and more user's resources",
     )
-    async def search(request: Request, q: str):
+    async def search(
+        request: Request,
+        q: str,
+        include_details: bool = False,
+        offset: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=MAX_SEARCH_LIMIT),
+    ):
         query = q.strip().lower()
-        result = {}
-
         user: UserSchema = request.state.session_user
 
-        for app_name in user.apps:
-            app_name = str(ResourceName(user, app_name, from_system=True)).lower()
-
-            if query in app_name:
-                details = (await AppService.get_app_info(user, app_name))[1]
-                data = result.get("apps", []) + [
-                    {app_name: details},
-                ]
-                result["apps"] = data
-
-        for author_email, app_name in user.shared_apps:
-            if query in author_email.lower() or query in app_name.lower():
-                details = (
-                    await AppService.get_app_info(
-                        user, app_name, shared_by=author_email
-                    )
-                )[1]
-                data = result.get("share_apps", []) + [
-                    {f"{author_email}:{app_name}": details},
-                ]
-                result["share_apps"] = data
-
-        for service_name in user.services:
-            plugin_name, service_name = service_name.split(":", maxsplit=1)
-            service_name = str(
-                ResourceName(user, service_name, from_system=True)
-            ).lower()
-
-            if query in service_name:
-                details = (
-                    await DatabaseService.get_database_info(
-                        user, plugin_name, service_name
+        available_databases = (await DatabaseService.list_available_databases())[1]
+
+        matches = {
+            "apps": rank_matches(
+                query,
+                (
+                    (app_name, name.lower(), [name.lower()])
+                    for app_name, name in user.normalized_apps.items()
+                ),
+            ),
+            "share_apps": rank_matches(
+                query,
+                (
+                    (
+                        (author_email, app_name),
+                        f"{author_email}:{app_name}",
+                        [author_email.lower(), app_name.lower()],
                     )
-                )[1]
-                data = result.get("services", []) + [
-                    {service_name: details},
-                ]
-                result["services"] = data
-
-        for network_name in user.networks:
-            network_name = str(
-                ResourceName(user, network_name, from_system=True)
-            ).lower()
-
-            if query in network_name:
-                data = result.get("networks", []) + [
-                    network_name,
-                ]
-                result["networks"] = data
-
-        for available_database in (await DatabaseService.list_available_databases())[1]:
-            if query in available_database:
-                data = result.get("available_databases", []) + [
-                    available_database,
-                ]
-                result["available_databases"] = data
+                    for author_email, app_name in user.shared_apps
+                ),
+            ),
+            "services": rank_matches(
+                query,
+                (
+                    (service, name.lower(), [name.lower()])
+                    for service, name in user.normalized_services.items()
+                ),
+            ),
+            "networks": rank_matches(
+                query,
+                (
+                    (None, name.lower(), [name.lower()])
+                    for name in user.normalized_networks.values()
+                ),
+            ),
+            "available_databases": rank_matches(
+                query,
+                ((None, name, [name]) for name in available_databases),
+            ),
+        }
+        pages = {
+            category: category_matches[offset : offset + limit]
+            for category, category_matches in matches.items()
+            if category_matches
+        }
+        infos = {}
+
+        if include_details:
+            app_names = [key for key, _ in pages.get("apps", [])]
+            shared_apps = [key for key, _ in pages.get("share_apps", [])]
+            services = [key for key, _ in pages.get("services", [])]
+
+            app_infos, shared_app_infos, service_infos = await asyncio.gather(
+                get_apps_info(app_names),
+                get_shared_apps_info(user, shared_apps),
+                get_databases_info(services),
+            )
+            infos["apps"] = dict(zip(pages.get("apps", []), app_infos))
+            infos["share_apps"] = {
+                match: shared_app_infos.get(match[1])
+                for match in pages.get("share_apps", [])
+            }
+            infos["services"] = dict(zip(pages.get("services", []), service_infos))
+
+        result = {}
+
+        for category, page in pages.items():
+            if category in ("networks", "available_databases"):
+                result[category] = [name for _, name in page]
+                continue
+
+            result[category] = []
+
+            for match in page:
+                info = infos.get(category, {}).get(match)
+                result[category].append({match[1]: info[1] if info else {}})
 
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 "success": True,
                 "result": result,
+                "total": {
+                    category: len(category_matches)
+                    for category, category_matches in matches.items()
+                    if category_matches
+                },
             },
         )
 
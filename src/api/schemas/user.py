@@ -1,10 +1,12 @@
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 from src.config import Config
 
+INDEXED_FIELDS = ("id", "apps", "shared_apps", "services", "networks")
+
 
 class UserSchema(BaseModel):
     id: int
@@ -23,5 +25,111 @@ class UserSchema(BaseModel):
     services: List[str] = []
     networks: List[str] = []
 
+    # Indexes of the resource lists, built on first use. The lists are kept
+    # as they are, so the schema is exposed with the same shape.
+    _indexes: Dict = PrivateAttr(default_factory=dict)
+
     class Config:
         orm_mode = True
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+
+        # Copies share the indexes, so they are replaced and not cleared.
+        if name in INDEXED_FIELDS:
+            super().__setattr__("_indexes", {})
+
+    def _get_index(self, name: str, build):
+        if name not in self._indexes:
+            self._indexes[name] = build()
+        return self._indexes[name]
+
+    def _normalize(self, names: List[str]) -> Dict[str, str]:
+        from src.api.tools.resource import ResourceName
+
+        return {name: str(ResourceName(self, name, from_system=True)) for name in names}
+
+    @property
+    def app_set(self) -> FrozenSet[str]:
+        return self._get_index("app_set", lambda: frozenset(self.apps))
+
+    @property
+    def service_set(self) -> FrozenSet[str]:
+        return self._get_index("service_set", lambda: frozenset(self.services))
+
+    @property
+    def network_set(self) -> FrozenSet[str]:
+        return self._get_index("network_set", lambda: frozenset(self.networks))
+
+    @property
+    def shared_app_set(self) -> FrozenSet[Tuple[str, str]]:
+        return self._get_index(
+            "shared_app_set", lambda: frozenset(map(tuple, self.shared_apps))
+        )
+
+    @property
+    def normalized_apps(self) -> Dict[str, str]:
+        """
+        Normalized (client) names of the apps, by system name.
+        """
+        return self._get_index("normalized_apps", lambda: self._normalize(self.apps))
+
+    @property
+    def normalized_networks(self) -> Dict[str, str]:
+        """
+        Normalized (client) names of the networks, by system name.
+        """
+        return self._get_index(
+            "normalized_networks", lambda: self._normalize(self.networks)
+        )
+
+    @property
+    def normalized_services(self) -> Dict[str, str]:
+        """
+        Normalized (client) names of the services, by system service name
+        (e.g. "postgres:name").
+        """
+
+        def build():
+            names = [service.split(":", maxsplit=1)[1] for service in self.services]
+            normalized_names = self._normalize(names)
+
+            return {
+                service: normalized_names[name]
+                for service, name in zip(self.services, names)
+            }
+
+        return self._get_index("normalized_services", build)
+
+    @property
+    def services_by_plugin(self) -> Dict[str, Dict[str, str]]:
+        """
+        Normalized (client) names of the services, by plugin and system
+        service name.
+        """
+
+        def build():
+            services = {}
+
+            for service, name in self.normalized_services.items():
+                plugin_name = service.split(":", maxsplit=1)[0]
+                services.setdefault(plugin_name, {})[service] = name
+
+            return services
+
+        return self._get_index("services_by_plugin", build)
+
+    @property
+    def shared_apps_by_author(self) -> Dict[str, FrozenSet[str]]:
+        def build():
+            shared_apps = {}
+
+            for author_email, app_name in self.shared_apps:
+                shared_apps.setdefault(author_email, set()).add(app_name)
+
+            return {
+                author_email: frozenset(app_names)
+                for author_email, app_names in shared_apps.items()
+            }
+
+        return self._get_index("shared_apps_by_author", build)
@@ -3,7 +3,7 @@ import json
 import logging
 import re
 from abc import ABC
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,19 +11,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.api.models import (
     App,
     AsyncSessionLocal,
+    create_app_deployment_token,
     create_resource,
     delete_resource,
-    get_app_deployment_token,
-    get_resources,
     get_shared_app_users,
+    iter_resources,
     rename_resource,
     share_app,
     unshare_app,
 )
 from src.api.schemas import UserSchema
-from src.api.services.databases import DatabaseService
+from src.api.services.databases import get_services_links
 from src.api.tools.resource import ResourceName, check_shared_app
-from src.api.tools.ssh import run_command
+from src.api.tools.ssh import run_command, run_commands_batch, start_stream
 from src.config import Config
 
 
@@ -60,6 +60,59 @@ def parse_ps_report(text: str) -> Dict:
     return result
 
 
+def split_reports(text: str) -> Dict[str, str]:
+    """
+    Split the report of every app (e.g. `ps:report` without app) into the
+    report of each app, by their "=====> {app} ... information" headers.
+    """
+    reports = {}
+    app_name, lines = None, []
+
+    for line in text.strip().splitlines() + ["=====>"]:
+        if not line.startswith("=====>"):
+            lines.append(line)
+            continue
+
+        if app_name is not None:
+            reports[app_name] = "\n".join(lines)
+
+        title = line[len("=====>") :].split()
+        app_name, lines = (title[0] if title else None), []
+
+    return reports
+
+
+def parse_ps_reports(text: str) -> Dict[str, Dict]:
+    return {
+        app_name: parse_ps_report(report)
+        for app_name, report in split_reports(text).items()
+    }
+
+
+def parse_app_info(
+    app_name: str,
+    inspect_result: Tuple[bool, str],
+    report_result: Optional[Tuple[bool, str]] = None,
+) -> Tuple[bool, Dict]:
+    """
+    Build the app info from its `ps:inspect` result or, if that failed,
+    from its `ps:report` result.
+    """
+    success, message = inspect_result
+    result = {}
+
+    if success:
+        result["data"] = json.loads(message)
+        result["info_origin"] = "inspect"
+    else:
+        success, message = report_result
+        result["data"] = parse_ps_report(message) if success else None
+        result["info_origin"] = "report" if success else None
+
+    result["raw_name"] = app_name
+    return success, result
+
+
 def parse_network_info(session_user: UserSchema, text: str) -> Dict:
     result = {}
     lines = text.strip().split("\n")
@@ -129,6 +182,138 @@ def get_raw_app(name):
     return name
 
 
+async def get_apps_info(app_names: List[str]) -> List[Optional[Tuple[bool, Dict]]]:
+    """
+    Get the info of several apps (system names) with batched commands.
+
+    Apps whose info could not be parsed get None.
+    """
+    inspect_results = await run_commands_batch(
+        [f"ps:inspect {app_name}" for app_name in app_names]
+    )
+    failed = [index for index, result in enumerate(inspect_results) if not result[0]]
+
+    report_results = dict(
+        zip(
+            failed,
+            await run_commands_batch(
+                [f"ps:report {app_names[index]}" for index in failed]
+            ),
+        )
+    )
+    results = []
+
+    for index, app_name in enumerate(app_names):
+        try:
+            results.append(
+                parse_app_info(
+                    app_name, inspect_results[index], report_results.get(index)
+                )
+            )
+        except Exception:
+            results.append(None)
+
+    return results
+
+
+async def get_apps_report(
+    app_names: List[str],
+) -> List[Optional[Tuple[bool, Dict]]]:
+    """
+    Get the info of several apps (system names) from the report of every app,
+    with a single command. Apps missing from it fall back to `get_apps_info`.
+    """
+    success, message = await run_command("ps:report")
+    reports = parse_ps_reports(message) if success else {}
+
+    results = {
+        app_name: (
+            True,
+            {"data": reports[app_name], "info_origin": "report", "raw_name": app_name},
+        )
+        for app_name in app_names
+        if app_name in reports
+    }
+    missing = [app_name for app_name in app_names if app_name not in results]
+
+    if missing:
+        results.update(zip(missing, await get_apps_info(missing)))
+
+    return [results[app_name] for app_name in app_names]
+
+
+async def get_apps_network(
+    session_user: UserSchema, app_names: List[str]
+) -> Dict[str, Tuple[bool, Any]]:
+    """
+    Get the network of several apps (system names) of the user, keyed by app.
+
+    The networks of several apps come from the report of every app, with a
+    single command. A single app, or the apps missing from the report, use
+    their own `network:report`.
+    """
+    reports = {}
+
+    if len(app_names) > 1:
+        success, message = await run_command("network:report")
+        reports = split_reports(message) if success else {}
+
+    results = {
+        app_name: (True, parse_network_info(session_user, reports[app_name]))
+        for app_name in app_names
+        if app_name in reports
+    }
+    missing = [app_name for app_name in app_names if app_name not in results]
+
+    if missing:
+        messages = await run_commands_batch(
+            [f"network:report {app_name}" for app_name in missing]
+        )
+
+        for app_name, (success, message) in zip(missing, messages):
+            results[app_name] = (
+                (True, parse_network_info(session_user, message))
+                if success
+                else (False, message)
+            )
+
+    return results
+
+
+async def get_shared_apps_info(
+    session_user: UserSchema, shared_apps: List[Tuple[str, str]]
+) -> Dict[str, Optional[Tuple[bool, Dict]]]:
+    """
+    Get the info of several apps shared with the user, keyed by
+    "{author_email}:{app_name}", with batched commands.
+    """
+    owners = {}
+    system_names = {}
+
+    for author_email, app_name in shared_apps:
+        if author_email not in owners:
+            try:
+                owners[author_email] = await check_shared_app(
+                    session_user, app_name, author_email
+                )
+            except HTTPException:
+                owners[author_email] = None
+
+        owner = owners[author_email]
+
+        if owner is None:
+            continue
+
+        system_app_name = ResourceName(owner, app_name).for_system()
+
+        if system_app_name in owner.apps:
+            system_names[f"{author_email}:{app_name}"] = system_app_name
+
+    app_infos = await get_apps_info(list(system_names.values()))
+
+    return dict(zip(system_names, app_infos))
+
+
 def parse_xxd_to_bytes(text: str) -> bytes:
     """
     Convert standard `xxd` output into raw bytes.
@@ -170,6 +355,26 @@ def parse_xxd_to_bytes(text: str) -> bytes:
     return bytes(int(t, 16) for t in tokens)
 
 
+async def stream_xxd_to_bytes(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """
+    Convert standard `xxd` output into raw bytes as it arrives.
+
+    Only complete lines are decoded, the trailing partial line is kept until
+    the next chunk.
+    """
+    buffer = ""
+
+    async for chunk in chunks:
+        buffer += chunk
+        lines, _, buffer = buffer.rpartition("\n")
+
+        if lines:
+            yield parse_xxd_to_bytes(lines)
+
+    if buffer.strip():
+        yield parse_xxd_to_bytes(buffer)
+
+
 class AppService(ABC):
 
     staticmethod
@@ -177,7 +382,7 @@ class AppService(ABC):
     async def app_exists(session_user: UserSchema, app_name: str) -> Tuple[bool, Any]:
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             return False, f"App {app_name} does not exist on the API"
 
         return await run_command(f"apps:exists {app_name}")
@@ -198,7 +403,7 @@ class AppService(ABC):
             _, message = await run_command(f"apps:exists {clone_from}")
 
             if (
-                clone_from not in session_user.apps
+                clone_from not in session_user.app_set
                 or "does not exist" in message.lower()
             ):
                 raise HTTPException(
@@ -225,7 +430,7 @@ class AppService(ABC):
     ) -> Tuple[bool, Any]:
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         results = await get_shared_app_users(app_name, db_session)
@@ -252,7 +457,7 @@ class AppService(ABC):
     ) -> Tuple[bool, Any]:
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         await unshare_app(app_name, email, db_session)
@@ -273,7 +478,7 @@ class AppService(ABC):
 
         system_app_name = ResourceName(session_user, app_name).for_system()
 
-        if system_app_name not in session_user.apps:
+        if system_app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         await share_app(
@@ -325,13 +530,14 @@ class AppService(ABC):
         session_user: UserSchema,
         app_name: str,
         db_session: AsyncSession,
+        rotate: bool = False,
     ) -> Tuple[bool, Any]:
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
-        deploy_token = await get_app_deployment_token(app_name, db_session)
+        deploy_token = await create_app_deployment_token(app_name, db_session, rotate)
 
         return True, deploy_token
 
@@ -343,7 +549,7 @@ class AppService(ABC):
     ) -> Tuple[bool, Any]:
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         await delete_resource(session_user.email, app_name, App, db_session)
@@ -360,7 +566,7 @@ class AppService(ABC):
 
         system_app_name = ResourceName(session_user, app_name).for_system()
 
-        if system_app_name not in session_user.apps:
+        if system_app_name not in session_user.app_set:
             await create_resource(session_user.email, system_app_name, App, db_session)
 
         await run_command(f"apps:rename {app_name} {system_app_name}")
@@ -373,7 +579,7 @@ class AppService(ABC):
     ) -> Tuple[bool, Any]:
         system_app_name = ResourceName(session_user, app_name).for_system()
 
-        if system_app_name in session_user.apps:
+        if system_app_name in session_user.app_set:
             await delete_resource(session_user.email, system_app_name, App, db_session)
 
         await run_command(f"apps:rename {system_app_name} {app_name}")
@@ -392,7 +598,7 @@ class AppService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         return await run_command(f"enter {app_name} {container_type} {command}")
@@ -405,7 +611,7 @@ class AppService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         return await run_command(f"url {app_name}")
@@ -418,47 +624,41 @@ class AppService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
-        success, message = await run_command(f"ps:inspect {app_name}")
-        result = {}
+        inspect_result = await run_command(f"ps:inspect {app_name}")
+        report_result = None
 
-        if success:
-            result["data"] = json.loads(message)
-            result["info_origin"] = "inspect"
-        else:
-            success, message = await run_command(f"ps:report {app_name}")
-            result["data"] = parse_ps_report(message) if success else None
-            result["info_origin"] = "report" if success else None
+        if not inspect_result[0]:
+            report_result = await run_command(f"ps:report {app_name}")
 
-        result["raw_name"] = app_name
-        return success, result
+        return parse_app_info(app_name, inspect_result, report_result)
 
     @staticmethod
     async def list_apps(
-        session_user: UserSchema, return_info: bool = True
+        session_user: UserSchema, return_info: bool = True, bulk: bool = False
     ) -> Tuple[bool, Any]:
+        """
+        List the apps of the user. With `bulk`, their info comes from a single
+        `ps:report` of every app instead of one `ps:inspect` per app.
+        """
         result = {}
 
-        tasks = []
-        app_names = []
-
         if not return_info:
-            for app_name in session_user.apps:
-                app_name = str(ResourceName(session_user, app_name, from_system=True))
+            for app_name in session_user.normalized_apps.values():
                 result[app_name] = {}
             return True, result
 
-        for app_name in session_user.apps:
-            app_name = str(ResourceName(session_user, app_name, from_system=True))
-            app_names.append(app_name)
-            tasks.append(AppService.get_app_info(session_user, app_name))
+        app_names = session_user.normalized_apps
 
-        app_infos = await asyncio.gather(*tasks, return_exceptions=True)
+        if bulk:
+            app_infos = await get_apps_report(list(app_names))
+        else:
+            app_infos = await get_apps_info(list(app_names))
 
-        for name, info in zip(app_names, app_infos):
-            result[name] = {} if isinstance(info, Exception) else info[1]
+        for app_name, info in zip(app_names.values(), app_infos):
+            result[app_name] = {} if info is None else info[1]
 
         return True, result
 
@@ -468,24 +668,17 @@ class AppService(ABC):
     ) -> Tuple[bool, Any]:
         result = {}
 
-        tasks = []
-        app_names = []
-
         if not return_info:
             for author_email, app_name in session_user.shared_apps:
                 result[f"{author_email}:{app_name}"] = {}
             return True, result
 
-        for author_email, app_name in session_user.shared_apps:
-            app_names.append(f"{author_email}:{app_name}")
-            tasks.append(
-                AppService.get_app_info(session_user, app_name, shared_by=author_email)
-            )
-
-        app_infos = await asyncio.gather(*tasks, return_exceptions=True)
+        app_infos = await get_shared_apps_info(session_user, session_user.shared_apps)
 
-        for name, info in zip(app_names, app_infos):
-            result[name] = {} if isinstance(info, Exception) else info[1]
+        for author_email, app_name in session_user.shared_apps:
+            name = f"{author_email}:{app_name}"
+            info = app_infos.get(name)
+            result[name] = {} if info is None else info[1]
 
         return True, result
 
@@ -495,14 +688,20 @@ class AppService(ABC):
         app_name: str,
         n_lines: int = 2000,
         shared_by: Optional[str] = None,
+        stream: bool = False,
     ) -> Tuple[bool, Any]:
         session_user = await check_shared_app(session_user, app_name, shared_by)
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
+        if stream:
+            return await start_stream(
+                f"logs {app_name} --num {n_lines}", append_error=True
+            )
+
         return await run_command(f"logs {app_name} --num {n_lines}")
 
     @staticmethod
@@ -513,7 +712,7 @@ class AppService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         return await run_command(f"ps:start {app_name}")
@@ -526,7 +725,7 @@ class AppService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         return await run_command(f"ps:stop {app_name}")
@@ -539,7 +738,7 @@ class AppService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         return await run_command(f"ps:restart {app_name}")
@@ -552,7 +751,7 @@ class AppService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         return await run_command(f"ps:rebuild {app_name}")
@@ -565,7 +764,7 @@ class AppService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         success, message = await run_command(f"builder:report {app_name}")
@@ -597,7 +796,7 @@ class AppService(ABC):
 
         available_builders = ["herokuish", "dockerfile", "lambda", "pack"]
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         if builder not in available_builders:
@@ -619,15 +818,11 @@ class AppService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
-        success, message = await run_command(f"network:report {app_name}")
-
-        if not success:
-            return False, message
-
-        return True, parse_network_info(session_user, message)
+        networks = await get_apps_network(session_user, [app_name])
+        return networks[app_name]
 
     @staticmethod
     async def list_port_mappings(
@@ -639,7 +834,7 @@ class AppService(ABC):
         session_user = await check_shared_app(session_user, app_name, shared_by)
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         if use_proxy:
@@ -669,7 +864,7 @@ class AppService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         if use_proxy:
@@ -695,7 +890,7 @@ class AppService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         if use_proxy:
@@ -717,23 +912,17 @@ class AppService(ABC):
 
         sys_app_name = ResourceName(session_user, app_name).for_system()
 
-        if sys_app_name not in session_user.apps:
+        if sys_app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
-        result = {}
-
-        for db_name in session_user.services:
-            plugin_name, db_name = db_name.split(":", maxsplit=1)
-            db_name = str(ResourceName(session_user, db_name, from_system=True))
+        links = await get_services_links(list(session_user.normalized_services))
 
-            success, data = await DatabaseService.get_linked_apps(
-                session_user, plugin_name, db_name
-            )
+        result = {}
 
-            if success and app_name in data:
-                result[plugin_name] = result.get(plugin_name, []) + [
-                    db_name,
-                ]
+        for plugin_name, services in session_user.services_by_plugin.items():
+            for service, db_name in services.items():
+                if sys_app_name in links.get(service, ()):
+                    result.setdefault(plugin_name, []).append(db_name)
 
         return True, result
 
@@ -744,7 +933,7 @@ class AppService(ABC):
     ) -> Tuple[bool, Any]:
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         success, result = await run_command(f"storage:list {app_name}")
@@ -758,7 +947,7 @@ class AppService(ABC):
     ) -> Tuple[bool, Any]:
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         app_dir = f"{Config.VOLUME_DIR}/{app_name}"
@@ -773,7 +962,7 @@ class AppService(ABC):
     ) -> Tuple[bool, Any]:
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         app_dir = f"{Config.VOLUME_DIR}/{app_name}"
@@ -786,19 +975,28 @@ class AppService(ABC):
         app_name: str,
         filename: str,
         shared_by: Optional[str] = None,
+        stream: bool = False,
     ) -> Tuple[bool, Any]:
         """
         Run `xxd {filename}` inside the app's web container and reconstruct bytes.
 
         Returns (success, bytes) on success, else (False, error_message).
+        With `stream`, the bytes are returned as an async iterator decoded
+        while the xxd output arrives.
         """
         session_user = await check_shared_app(session_user, app_name, shared_by)
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
+        if stream:
+            success, xxd_stream = await start_stream(
+                f"enter {app_name} web xxd {filename}"
+            )
+            return success, (stream_xxd_to_bytes(xxd_stream) if success else xxd_stream)
+
         success, output = await run_command(f"enter {app_name} web xxd {filename}")
 
         if not success:
@@ -829,9 +1027,7 @@ class AppService(ABC):
         apps = parse_apps_list(message)
         apps = {name: True for name in apps if get_user_id_from_app(name) is not None}
 
-        db_apps = await get_resources(App, offset=0, limit=None, db_session=db_session)
-
-        for app in db_apps:
+        async for app in iter_resources(App, db_session):
             apps.pop(app["name"], None)
 
         for app_name in apps:
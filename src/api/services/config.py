@@ -37,7 +37,7 @@ class ConfigService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(
                 status_code=404,
                 detail="App does not exist",
@@ -57,7 +57,7 @@ class ConfigService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(
                 status_code=404,
                 detail="App does not exist",
@@ -76,7 +76,7 @@ class ConfigService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(
                 status_code=404,
                 detail="App does not exist",
@@ -98,7 +98,7 @@ class ConfigService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(
                 status_code=404,
                 detail="App does not exist",
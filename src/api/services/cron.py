@@ -55,7 +55,7 @@ class CronService(ABC):
         session_user = await check_shared_app(session_user, app_name, shared_by)
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         success, message = await run_command(f"cron:list {app_name}")
@@ -75,7 +75,7 @@ class CronService(ABC):
         session_user = await check_shared_app(session_user, app_name, shared_by)
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         return await run_command(f"cron:run {app_name} {cron_id}")
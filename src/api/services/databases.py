@@ -2,15 +2,15 @@ import asyncio
 import logging
 import re
 from abc import ABC
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
 
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.models import Service, create_resource, delete_resource, get_resources
+from src.api.models import Service, create_resource, delete_resource, iter_resources
 from src.api.schemas import UserSchema
 from src.api.tools.resource import ResourceName
-from src.api.tools.ssh import run_command
+from src.api.tools.ssh import run_command, run_commands_batch, start_stream
 from src.config import Config
 
 available_databases = Config.AVAILABLE_DATABASES
@@ -61,6 +61,87 @@ def extract_database_uri(text):
     return match.group(0) if match else None
 
 
+async def get_databases_info(services: List[str]) -> List[Tuple[bool, Any]]:
+    """
+    Get the info of several services ("{plugin_name}:{system_name}") with
+    batched commands.
+    """
+    services = [service.split(":", maxsplit=1) for service in services]
+
+    results = await run_commands_batch(
+        [f"{plugin_name}:info {name}" for plugin_name, name in services]
+    )
+    return [
+        (success, parse_service_info(plugin_name, message) if success else None)
+        for (plugin_name, _), (success, message) in zip(services, results)
+    ]
+
+
+async def get_databases_status(services: List[str]) -> List[Tuple[bool, Any]]:
+    """
+    Get the lightweight info (status, version and links) of several services
+    ("{plugin_name}:{system_name}") with batched `info --status/--version`
+    commands, instead of their full info. The links come from `get_services_links`.
+    """
+    split_services = [service.split(":", maxsplit=1) for service in services]
+    commands = []
+
+    for plugin_name, name in split_services:
+        commands.append(f"{plugin_name}:info {name} --status")
+        commands.append(f"{plugin_name}:info {name} --version")
+
+    results, links = await asyncio.gather(
+        run_commands_batch(commands), get_services_links(services)
+    )
+    infos = []
+
+    for index, (service, (plugin_name, _)) in enumerate(zip(services, split_services)):
+        (status_success, status), (version_success, version) = results[
+            2 * index : 2 * index + 2
+        ]
+
+        if not (status_success and version_success):
+            infos.append((False, None))
+            continue
+
+        infos.append(
+            (
+                True,
+                {
+                    "status": status.strip(),
+                    "version": version.strip(),
+                    "links": " ".join(sorted(links.get(service, ()))),
+                    "plugin_name": plugin_name,
+                },
+            )
+        )
+
+    return infos
+
+
+async def get_services_links(services: List[str]) -> Dict[str, FrozenSet[str]]:
+    """
+    Get the apps (system names) linked to several services
+    ("{plugin_name}:{system_name}"), with batched `links` commands. Their
+    results are cached by the command cache.
+
+    Services whose links could not be listed are left out.
+    """
+    results = await run_commands_batch(
+        [
+            "{0}:links {1}".format(*service.split(":", maxsplit=1))
+            for service in services
+        ]
+    )
+    links = {}
+
+    for service, (success, message) in zip(services, results):
+        if success:
+            links[service] = frozenset(app for app in message.split("\n") if app)
+
+    return links
+
+
 class DatabaseService(ABC):
 
     @staticmethod
@@ -91,7 +172,7 @@ class DatabaseService(ABC):
             _, message = await run_command(f"{plugin_name}:exists {clone_from}")
 
             if (
-                f"{plugin_name}:{clone_from}" not in session_user.services
+                f"{plugin_name}:{clone_from}" not in session_user.service_set
                 or f"service {clone_from} exists" not in message.lower()
             ):
                 raise HTTPException(
@@ -121,16 +202,41 @@ class DatabaseService(ABC):
 
     @staticmethod
     async def list_all_databases(
-        session_user: UserSchema, return_info: bool = True
+        session_user: UserSchema, return_info: bool = True, lightweight: bool = False
     ) -> Tuple[bool, Any]:
+        """
+        List the databases of the user, by plugin. The plugins are listed
+        concurrently, and the info is only fetched for the services listed
+        by a (batched) `{plugin_name}:list`.
+        """
         available_databases = (await DatabaseService.list_available_databases())[1]
-        result = {}
+        plugin_names = [
+            plugin_name
+            for plugin_name in available_databases
+            if session_user.services_by_plugin.get(plugin_name)
+        ]
+        existing_services = [None] * len(plugin_names)
 
-        for plugin_name in available_databases:
-            success, data = await DatabaseService.list_databases(
-                session_user, plugin_name, return_info
+        if return_info:
+            listings = await run_commands_batch(
+                [f"{plugin_name}:list" for plugin_name in plugin_names]
             )
+            existing_services = [
+                set(parse_service_list(message)) if success else None
+                for success, message in listings
+            ]
 
+        results = await asyncio.gather(
+            *[
+                DatabaseService.list_databases(
+                    session_user, plugin_name, return_info, lightweight, existing
+                )
+                for plugin_name, existing in zip(plugin_names, existing_services)
+            ]
+        )
+        result = {}
+
+        for plugin_name, (success, data) in zip(plugin_names, results):
             if success and data:
                 result[plugin_name] = data
 
@@ -138,43 +244,44 @@ class DatabaseService(ABC):
 
     @staticmethod
     async def list_databases(
-        session_user: UserSchema, plugin_name: str, return_info: bool = True
+        session_user: UserSchema,
+        plugin_name: str,
+        return_info: bool = True,
+        lightweight: bool = False,
+        existing_services: Optional[Set[str]] = None,
     ) -> Tuple[bool, Any]:
-        plugins = [
-            plugin
-            for plugin in session_user.services
-            if plugin.startswith(plugin_name + ":")
-        ]
-        databases = [plugin.split(":", maxsplit=1)[1] for plugin in plugins]
-
+        """
+        List the databases of the user for a plugin. With `lightweight`, only
+        their status, version and links are returned.
+
+        If `existing_services` (system names) is given, the databases missing
+        from it get no info, without running any command.
+        """
+        services = session_user.services_by_plugin.get(plugin_name, {})
         result = {}
 
-        tasks = []
-        database_names = []
-
         if not return_info:
-            for database_name in databases:
-                database_name = str(
-                    ResourceName(session_user, database_name, from_system=True)
-                )
+            for database_name in services.values():
                 result[database_name] = {}
             return True, result
 
-        for database_name in databases:
-            database_name = str(
-                ResourceName(session_user, database_name, from_system=True)
-            )
-            database_names.append(database_name)
-            tasks.append(
-                DatabaseService.get_database_info(
-                    session_user, plugin_name, database_name
-                )
-            )
+        listed_services = [
+            service
+            for service in services
+            if existing_services is None
+            or service.split(":", maxsplit=1)[1] in existing_services
+        ]
+
+        if lightweight:
+            database_infos = await get_databases_status(listed_services)
+        else:
+            database_infos = await get_databases_info(listed_services)
 
-        database_infos = await asyncio.gather(*tasks, return_exceptions=True)
+        infos = dict(zip(listed_services, database_infos))
 
-        for name, info in zip(database_names, database_infos):
-            result[name] = {} if isinstance(info, Exception) else info[1]
+        for service, database_name in services.items():
+            info = infos.get(service)
+            result[database_name] = None if info is None else info[1]
 
         return True, result
 
@@ -187,7 +294,7 @@ class DatabaseService(ABC):
     ) -> Tuple[bool, Any]:
         system_database_name = ResourceName(session_user, database_name).for_system()
 
-        if f"{plugin_name}:{system_database_name}" not in session_user.services:
+        if f"{plugin_name}:{system_database_name}" not in session_user.service_set:
             raise HTTPException(
                 status_code=404,
                 detail="Database does not exist",
@@ -197,10 +304,15 @@ class DatabaseService(ABC):
             session_user, plugin_name, database_name
         )
 
-        for app_name in linked_apps:
-            await DatabaseService.unlink_database(
-                session_user, plugin_name, database_name, app_name
-            )
+        # Run in parallel, within the SSH connections allowed to the request.
+        await asyncio.gather(
+            *[
+                DatabaseService.unlink_database(
+                    session_user, plugin_name, database_name, app_name
+                )
+                for app_name in linked_apps
+            ]
+        )
 
         await delete_resource(
             session_user.email,
@@ -220,7 +332,7 @@ class DatabaseService(ABC):
     ) -> Tuple[bool, Any]:
         database_name = ResourceName(session_user, database_name).for_system()
 
-        if f"{plugin_name}:{database_name}" not in session_user.services:
+        if f"{plugin_name}:{database_name}" not in session_user.service_set:
             raise HTTPException(
                 status_code=404,
                 detail="Database does not exist",
@@ -233,14 +345,21 @@ class DatabaseService(ABC):
         session_user: UserSchema,
         plugin_name: str,
         database_name: str,
+        stream: bool = False,
     ) -> Tuple[bool, Any]:
         database_name = ResourceName(session_user, database_name).for_system()
 
-        if f"{plugin_name}:{database_name}" not in session_user.services:
+        if f"{plugin_name}:{database_name}" not in session_user.service_set:
             raise HTTPException(
                 status_code=404,
                 detail="Database does not exist",
             )
+
+        if stream:
+            return await start_stream(
+                f"{plugin_name}:export {database_name}", encoding=None
+            )
+
         return await run_command(f"{plugin_name}:export {database_name}")
 
     @staticmethod
@@ -251,23 +370,21 @@ class DatabaseService(ABC):
     ) -> Tuple[bool, Any]:
         database_name = ResourceName(session_user, database_name).for_system()
 
-        if f"{plugin_name}:{database_name}" not in session_user.services:
+        if f"{plugin_name}:{database_name}" not in session_user.service_set:
             raise HTTPException(
                 status_code=404,
                 detail="Database does not exist",
             )
-        success, message = await run_command(f"{plugin_name}:links {database_name}")
-        result = (
-            [
-                str(ResourceName(session_user, app, from_system=True))
-                for app in message.split("\n")
-                if app
-            ]
-            if success
-            else []
-        )
+        service = f"{plugin_name}:{database_name}"
+        links = await get_services_links([service])
 
-        return success, result
+        if service not in links:
+            return False, []
+
+        return True, [
+            str(ResourceName(session_user, app, from_system=True))
+            for app in sorted(links[service])
+        ]
 
     @staticmethod
     async def link_database(
@@ -279,12 +396,12 @@ class DatabaseService(ABC):
         database_name = ResourceName(session_user, database_name).for_system()
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if f"{plugin_name}:{database_name}" not in session_user.services:
+        if f"{plugin_name}:{database_name}" not in session_user.service_set:
             raise HTTPException(
                 status_code=404,
                 detail="Database does not exist",
             )
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(
                 status_code=404,
                 detail="App does not exist",
@@ -303,12 +420,12 @@ class DatabaseService(ABC):
         database_name = ResourceName(session_user, database_name).for_system()
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if f"{plugin_name}:{database_name}" not in session_user.services:
+        if f"{plugin_name}:{database_name}" not in session_user.service_set:
             raise HTTPException(
                 status_code=404,
                 detail="Database does not exist",
             )
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(
                 status_code=404,
                 detail="App does not exist",
@@ -325,7 +442,7 @@ class DatabaseService(ABC):
     ) -> Tuple[bool, Any]:
         database_name = ResourceName(session_user, database_name).for_system()
 
-        if f"{plugin_name}:{database_name}" not in session_user.services:
+        if f"{plugin_name}:{database_name}" not in session_user.service_set:
             raise HTTPException(
                 status_code=404,
                 detail="Database does not exist",
@@ -344,15 +461,21 @@ class DatabaseService(ABC):
         plugin_name: str,
         database_name: str,
         n_lines: int = 2000,
+        stream: bool = False,
     ) -> Tuple[bool, Any]:
         database_name = ResourceName(session_user, database_name).for_system()
 
-        if f"{plugin_name}:{database_name}" not in session_user.services:
+        if f"{plugin_name}:{database_name}" not in session_user.service_set:
             raise HTTPException(
                 status_code=404,
                 detail="Database does not exist",
             )
 
+        if stream:
+            return await start_stream(
+                f"{plugin_name}:logs {database_name} --num {n_lines}", append_error=True
+            )
+
         success, message = await run_command(
             f"{plugin_name}:logs {database_name} --num {n_lines}"
         )
@@ -370,7 +493,7 @@ class DatabaseService(ABC):
     ) -> Tuple[bool, Any]:
         database_name = ResourceName(session_user, database_name).for_system()
 
-        if f"{plugin_name}:{database_name}" not in session_user.services:
+        if f"{plugin_name}:{database_name}" not in session_user.service_set:
             raise HTTPException(
                 status_code=404,
                 detail="Database does not exist",
@@ -391,7 +514,7 @@ class DatabaseService(ABC):
     ) -> Tuple[bool, Any]:
         database_name = ResourceName(session_user, database_name).for_system()
 
-        if f"{plugin_name}:{database_name}" not in session_user.services:
+        if f"{plugin_name}:{database_name}" not in session_user.service_set:
             raise HTTPException(
                 status_code=404,
                 detail="Database does not exist",
@@ -412,7 +535,7 @@ class DatabaseService(ABC):
     ) -> Tuple[bool, Any]:
         database_name = ResourceName(session_user, database_name).for_system()
 
-        if f"{plugin_name}:{database_name}" not in session_user.services:
+        if f"{plugin_name}:{database_name}" not in session_user.service_set:
             raise HTTPException(
                 status_code=404,
                 detail="Database does not exist",
@@ -451,11 +574,7 @@ class DatabaseService(ABC):
 
         logging.warning("[sync_dokku_w_service_database]::Syncing Dokku...")
 
-        db_services = await get_resources(
-            Service, offset=0, limit=None, db_session=db_session
-        )
-
-        for service in db_services:
+        async for service in iter_resources(Service, db_session):
             services.pop(service["name"], None)
 
         for service_name in services:
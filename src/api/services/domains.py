@@ -44,7 +44,7 @@ class DomainService(ABC):
     ) -> Tuple[bool, Any]:
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(
                 status_code=404,
                 detail="App does not exist",
@@ -58,7 +58,7 @@ class DomainService(ABC):
     ) -> Tuple[bool, Any]:
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(
                 status_code=404,
                 detail="App does not exist",
@@ -74,7 +74,7 @@ class DomainService(ABC):
     ) -> Tuple[bool, Any]:
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(
                 status_code=404,
                 detail="App does not exist",
@@ -89,7 +89,7 @@ class DomainService(ABC):
     ) -> Tuple[bool, Any]:
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(
                 status_code=404,
                 detail="App does not exist",
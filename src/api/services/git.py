@@ -279,7 +279,7 @@ class GitService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         success, message = await run_command(f"git:sync {app_name} {repo_url} {branch}")
@@ -297,7 +297,7 @@ class GitService(ABC):
 
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         success, message = await run_command(f"git:report {app_name}")
@@ -310,7 +310,7 @@ class GitService(ABC):
         session_user = await check_shared_app(session_user, app_name, shared_by)
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         SSH_HOSTNAME = Config.SSH_SERVER.SSH_HOSTNAME
@@ -19,7 +19,7 @@ class LetsencryptService(ABC):
         session_user = await check_shared_app(session_user, app_name, shared_by)
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(
                 status_code=404,
                 detail="App does not exist",
@@ -35,7 +35,7 @@ class LetsencryptService(ABC):
     ) -> Tuple[bool, Any]:
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(
                 status_code=404,
                 detail="App does not exist",
@@ -54,7 +54,7 @@ class LetsencryptService(ABC):
     ) -> Tuple[bool, Any]:
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(
                 status_code=404,
                 detail="App does not exist",
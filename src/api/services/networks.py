@@ -1,17 +1,16 @@
-import asyncio
 import logging
 import re
 from abc import ABC
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.models import Network, create_resource, delete_resource, get_resources
+from src.api.models import Network, create_resource, delete_resource, iter_resources
 from src.api.schemas import UserSchema
-from src.api.services import AppService
+from src.api.services.apps import get_apps_network
 from src.api.tools.resource import ResourceName
-from src.api.tools.ssh import run_command
+from src.api.tools.ssh import run_command, run_commands_batch
 from src.config import Config
 
 
@@ -79,7 +78,7 @@ class NetworkService(ABC):
     ) -> Tuple[bool, Any]:
         network_name = ResourceName(session_user, network_name).for_system()
 
-        if network_name not in session_user.networks:
+        if network_name not in session_user.network_set:
             raise HTTPException(status_code=404, detail="Network does not exist")
 
         await delete_resource(session_user.email, network_name, Network, db_session)
@@ -87,42 +86,37 @@ class NetworkService(ABC):
 
     @staticmethod
     async def list_networks(
-        session_user: UserSchema, return_info: bool = True
+        session_user: UserSchema, return_info: bool = True, with_apps: bool = False
     ) -> Tuple[bool, Any]:
+        """
+        List the networks of the user. With `with_apps`, the info of each
+        network includes its linked apps, resolved with a single command.
+        """
         result = {}
 
-        tasks = []
-        network_names = []
-        parsed_network_names = []
-
         if not return_info:
-            for network_name in session_user.networks:
-                parsed_network_name = ResourceName(
-                    session_user, network_name, from_system=True
-                )
-                parsed_network_name = str(parsed_network_name)
+            for parsed_network_name in session_user.normalized_networks.values():
                 result[parsed_network_name] = {}
             return True, result
 
-        for network_name in session_user.networks:
-            parsed_network_name = ResourceName(
-                session_user, network_name, from_system=True
-            )
-            parsed_network_name = str(parsed_network_name)
-
-            network_names.append(network_name)
-            parsed_network_names.append(parsed_network_name)
-            tasks.append(run_command(f"network:info {network_name}"))
+        network_names = session_user.normalized_networks
+        network_infos = await run_commands_batch(
+            [f"network:info {network_name}" for network_name in network_names]
+        )
 
-        network_infos = await asyncio.gather(*tasks, return_exceptions=True)
+        for parsed_network_name, (success, message) in zip(
+            network_names.values(), network_infos
+        ):
+            result[parsed_network_name] = (
+                parse_network_info(message) if success else None
+            )
 
-        for name, info in zip(parsed_network_names, network_infos):
-            result[name] = None
+        if with_apps:
+            linked_apps = await NetworkService.get_apps_by_network(session_user)
 
-            if not isinstance(info, Exception):
-                success, message = info
-                if success:
-                    result[name] = parse_network_info(message)
+            for parsed_network_name, info in result.items():
+                if info is not None:
+                    info["apps"] = linked_apps.get(parsed_network_name, [])
 
         return True, result
 
@@ -135,10 +129,10 @@ class NetworkService(ABC):
         network_name = ResourceName(session_user, network_name).for_system()
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if network_name not in session_user.networks:
+        if network_name not in session_user.network_set:
             raise HTTPException(status_code=404, detail="Network does not exist")
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         return await run_command(
@@ -152,7 +146,7 @@ class NetworkService(ABC):
     ) -> Tuple[bool, Any]:
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
         return await run_command(f'network:set {app_name} attach-post-create ""')
@@ -164,21 +158,30 @@ class NetworkService(ABC):
     ) -> Tuple[bool, Any]:
         sys_network_name = ResourceName(session_user, network_name).for_system()
 
-        if sys_network_name not in session_user.networks:
+        if sys_network_name not in session_user.network_set:
             raise HTTPException(status_code=404, detail="Network does not exist")
 
-        results = []
+        linked_apps = await NetworkService.get_apps_by_network(session_user)
 
-        for app_name in session_user.apps:
-            app_name = ResourceName(session_user, app_name, from_system=True)
-            app_name = str(app_name)
+        return True, linked_apps.get(network_name, [])
 
-            success, data = await AppService.get_network(session_user, app_name)
+    @staticmethod
+    async def get_apps_by_network(session_user: UserSchema) -> Dict[str, List[str]]:
+        """
+        Get the apps (normalized names) of the user, by network (normalized
+        name).
+        """
+        app_names = session_user.normalized_apps
+        networks = await get_apps_network(session_user, list(app_names))
+        results = {}
+
+        for app_name, parsed_app_name in app_names.items():
+            success, data = networks[app_name]
 
-            if success and data.get("network", "") == network_name:
-                results.append(app_name)
+            if success and data.get("network"):
+                results.setdefault(data["network"], []).append(parsed_app_name)
 
-        return True, results
+        return results
 
     @staticmethod
     async def sync_dokku_with_api_database(db_session: AsyncSession) -> None:
@@ -203,11 +206,7 @@ class NetworkService(ABC):
             if get_user_id_from_network(name) is not None
         }
 
-        db_networks = await get_resources(
-            Network, offset=0, limit=None, db_session=db_session
-        )
-
-        for network in db_networks:
+        async for network in iter_resources(Network, db_session):
             networks.pop(network["name"], None)
 
         for network_name in networks:
@@ -5,7 +5,7 @@ from fastapi import HTTPException
 
 from src.api.schemas import UserSchema
 from src.api.tools.resource import ResourceName, check_shared_app
-from src.api.tools.ssh import run_command
+from src.api.tools.ssh import run_command, start_stream
 
 
 class NginxService(ABC):
@@ -15,13 +15,19 @@ class NginxService(ABC):
         session_user: UserSchema,
         app_name: str,
         shared_by: Optional[str] = None,
+        stream: bool = False,
     ) -> Tuple[bool, Any]:
         session_user = await check_shared_app(session_user, app_name, shared_by)
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
+        if stream:
+            return await start_stream(
+                f"nginx:access-logs {app_name}", append_error=True
+            )
+
         return await run_command(f"nginx:access-logs {app_name}")
 
     @staticmethod
@@ -29,11 +35,15 @@ class NginxService(ABC):
         session_user: UserSchema,
         app_name: str,
         shared_by: Optional[str] = None,
+        stream: bool = False,
     ) -> Tuple[bool, Any]:
         session_user = await check_shared_app(session_user, app_name, shared_by)
         app_name = ResourceName(session_user, app_name).for_system()
 
-        if app_name not in session_user.apps:
+        if app_name not in session_user.app_set:
             raise HTTPException(status_code=404, detail="App does not exist")
 
+        if stream:
+            return await start_stream(f"nginx:error-logs {app_name}", append_error=True)
+
         return await run_command(f"nginx:error-logs {app_name}")
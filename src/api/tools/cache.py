@@ -0,0 +1,204 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.config import Config
+
+READ = "read"
+MUTATE = "mutate"
+NEUTRAL = "neutral"
+
+cacheable_subcommands = {
+    "builder:report",
+    "config:get",
+    "config:show",
+    "cron:list",
+    "domains:report",
+    "git:report",
+    "letsencrypt:active",
+    "network:info",
+    "network:report",
+    "ports:list",
+    "proxy:ports",
+    "ps:inspect",
+    "ps:report",
+    "storage:list",
+    "url",
+}
+cacheable_plugin_actions = {"info", "links"}
+
+# Mutations that also change other resources: the links of the services
+# linked to the app are removed or renamed with it.
+global_subcommands = {"apps:destroy", "apps:rename"}
+
+neutral_subcommands = {"enter", "logs", "version"}
+neutral_actions = {"access-logs", "error-logs", "exists", "export", "list", "logs"}
+
+
+def parse_command(command: str) -> Tuple[str, List[str], List[str]]:
+    """
+    Split a dokku command into its subcommand, positional arguments and flags.
+    """
+    tokens = command.split()
+    flags = []
+
+    while tokens and tokens[0].startswith("-"):
+        flags.append(tokens.pop(0))
+
+    if tokens and tokens[0] == "dokku":
+        tokens.pop(0)
+
+    subcommand = tokens[0] if tokens else ""
+    args = []
+
+    for token in tokens[1:]:
+        if token.startswith("-"):
+            flags.append(token)
+        else:
+            args.append(token)
+
+    return subcommand, args, flags
+
+
+def classify_command(command: str) -> Tuple[str, List[str]]:
+    """
+    Classify a dokku command as a cacheable read, a mutation or neither.
+
+    Returns the kind and the resources (apps, services, networks...) the
+    command reads or changes. A mutation without resources, or with the
+    `--global` flag, affects every resource.
+    """
+    subcommand, args, flags = parse_command(command)
+    plugin, _, action = subcommand.partition(":")
+
+    if subcommand in cacheable_subcommands or (
+        plugin in Config.AVAILABLE_DATABASES and action in cacheable_plugin_actions
+    ):
+        return READ, args[:1]
+
+    if subcommand in neutral_subcommands or action in neutral_actions:
+        return NEUTRAL, []
+
+    if "--global" in flags or subcommand in global_subcommands:
+        return MUTATE, []
+
+    return MUTATE, args
+
+
+class CommandCache:
+    """
+    TTL and LRU bounded cache of read-only dokku command results.
+
+    Entries are indexed by the resource they read, so that a mutating command
+    only invalidates the entries of the resources it changes. Reads that were
+    in flight during an invalidation are not stored.
+
+    The cache lives in the worker process: with several workers, a mutation
+    only invalidates the cache of the worker that ran it, and the other ones
+    serve stale results for at most the TTL.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict = OrderedDict()
+        self._commands_by_resource: Dict[Optional[str], set] = {}
+        self._versions: Dict[str, int] = {}
+        self._global_version = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(
+        self, command: str, max_staleness: Optional[float] = None
+    ) -> Optional[Tuple[bool, str]]:
+        """
+        Get a cached result not older than the TTL (or `max_staleness`).
+        """
+        entry = self._entries.get(command)
+        max_age = self.ttl if max_staleness is None else min(self.ttl, max_staleness)
+
+        if entry is None or time.monotonic() - entry[0] > max_age:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(command)
+        self.hits += 1
+
+        return entry[2]
+
+    def version(self, resource: Optional[str]) -> Tuple[int, int]:
+        return self._global_version, self._versions.get(resource, 0)
+
+    def set(
+        self,
+        command: str,
+        resource: Optional[str],
+        result: Tuple[bool, str],
+        version: Tuple[int, int],
+    ) -> None:
+        """
+        Store a result, unless its resource was invalidated since `version`.
+        """
+        if not self.enabled or self.version(resource) != version:
+            return
+
+        self._discard(command)
+        self._entries[command] = (time.monotonic(), resource, result)
+        self._commands_by_resource.setdefault(resource, set()).add(command)
+
+        while len(self._entries) > self.max_entries:
+            self._discard(next(iter(self._entries)))
+
+    def _discard(self, command: str) -> None:
+        entry = self._entries.pop(command, None)
+
+        if entry is None:
+            return
+
+        commands = self._commands_by_resource.get(entry[1])
+
+        if commands is not None:
+            commands.discard(command)
+
+            if not commands:
+                del self._commands_by_resource[entry[1]]
+
+    def invalidate(self, resources: Iterable[str]) -> None:
+        """
+        Invalidate the entries of the given resources, or every entry if no
+        resource is given. Entries without a resource are always invalidated.
+        """
+        resources = list(resources)
+        self.invalidations += 1
+
+        if not resources:
+            self._global_version += 1
+            self._entries.clear()
+            self._commands_by_resource.clear()
+            return
+
+        for resource in resources + [None]:
+            self._versions[resource] = self._versions.get(resource, 0) + 1
+
+            for command in list(self._commands_by_resource.get(resource, ())):
+                self._discard(command)
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+        }
+
+
+command_cache = CommandCache(Config.API_CACHE_TTL, Config.API_CACHE_MAX_ENTRIES)
@@ -0,0 +1,170 @@
+import asyncio
+import datetime
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from src.config import Config
+
+DROP_NEWEST = "drop-newest"
+DROP_OLDEST = "drop-oldest"
+BLOCK = "block"
+
+HistoryRecord = Tuple[str, str, datetime.datetime]
+
+
+async def _write_records(records: List[HistoryRecord]) -> None:
+    # Lazy import to avoid a circular import: the src.api.tools package is
+    # imported by src.api.models.tools.
+    from src.api.models import AsyncSessionLocal, log_commands
+
+    async with AsyncSessionLocal() as db_session:
+        await log_commands(records, db_session)
+
+
+class CommandHistoryWriter:
+    """
+    Buffered writer of the command history.
+
+    Records are put on a bounded queue and written by a background task with
+    a single multi-row INSERT, every `batch_size` records or `flush_interval`
+    milliseconds. When the queue is full (e.g. the database is slow), the
+    `drop_policy` decides whether the new record is dropped ("drop-newest"),
+    the oldest queued one is dropped ("drop-oldest") or the caller waits for
+    room ("block").
+
+    Until the writer is started, records are written directly.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval: int,
+        max_queued: int,
+        drop_policy: str = DROP_NEWEST,
+    ):
+        if drop_policy not in (DROP_NEWEST, DROP_OLDEST, BLOCK):
+            raise ValueError(f"Invalid command history drop policy: {drop_policy}")
+
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval / 1000
+        self.max_queued = max_queued
+        self.drop_policy = drop_policy
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return None
+
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the background task after flushing the queued records.
+        """
+        if not self.running:
+            return None
+
+        await self._queue.put(None)
+        await self._task
+
+        records = []
+
+        while not self._queue.empty():
+            records.append(self._queue.get_nowait())
+
+        await self._flush([record for record in records if record is not None])
+
+    async def record(self, command: str, username: str) -> None:
+        """
+        Queue a command to be saved to the history.
+        """
+        record = (command, username, datetime.datetime.now(datetime.timezone.utc))
+
+        if not self.running:
+            await self._flush([record])
+            return None
+
+        if self.drop_policy == BLOCK:
+            await self._queue.put(record)
+            return None
+
+        if self._queue.full():
+            self.dropped += 1
+
+            if self.drop_policy == DROP_NEWEST:
+                logging.warning(f"Command history queue is full, dropped: {command}")
+                return None
+
+            dropped_record = self._queue.get_nowait()
+            logging.warning(
+                f"Command history queue is full, dropped: {dropped_record[0]}"
+            )
+
+        self._queue.put_nowait(record)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            records = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+
+            while records[-1] is not None and len(records) < self.batch_size:
+                timeout = deadline - loop.time()
+
+                if timeout <= 0:
+                    break
+                try:
+                    records.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # None is queued by `stop` to flush the pending records and stop.
+            if records[-1] is None:
+                records.pop()
+                stopping = True
+
+            await self._flush(records)
+
+    async def _flush(self, records: List[HistoryRecord]) -> None:
+        if not records:
+            return None
+
+        try:
+            await _write_records(records)
+            self.written += len(records)
+
+        except Exception as error:
+            self.failed += len(records)
+            logging.warning(
+                f"Failed to save {len(records)} command(s) to history: {error}"
+            )
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+history_writer = CommandHistoryWriter(
+    Config.API_HISTORY_BATCH_SIZE,
+    Config.API_HISTORY_FLUSH_INTERVAL,
+    Config.API_HISTORY_QUEUE_SIZE,
+    Config.API_HISTORY_DROP_POLICY,
+)
@@ -0,0 +1,241 @@
+import bisect
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+default_buckets = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    labels = ",".join(
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)
+    )
+    return f"{{{labels}}}" if labels else ""
+
+
+class Metric:
+    """
+    Base class of the metrics exported in the Prometheus text format.
+
+    Values are kept per label values tuple. The metrics live in the worker
+    process, so each worker exports its own series.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+        # Database events can be emitted from the sync engine threads.
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = default_buckets,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+        # Label values -> (bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            counts, total, count = self._values.get(
+                key, ([0] * (len(self.buckets) + 1), 0.0, 0)
+            )
+            counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def get_count(self, **labels: str) -> int:
+        value = self._values.get(self._key(labels))
+        return value[2] if value else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(
+                (key, (list(counts), total, count))
+                for key, (counts, total, count) in self._values.items()
+            )
+
+        lines = []
+
+        for key, (counts, total, count) in values:
+            cumulative = 0
+
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                labels = _format_labels(
+                    self.labels + ("le",), key + (_format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+ssh_command_duration = registry.register(
+    Histogram(
+        "dokku_api_ssh_command_duration_seconds",
+        "Latency of the commands executed over SSH.",
+        ("subcommand",),
+    )
+)
+ssh_commands = registry.register(
+    Counter(
+        "dokku_api_ssh_commands_total",
+        "Commands executed over SSH.",
+        ("subcommand", "status"),
+    )
+)
+ssh_commands_in_flight = registry.register(
+    Gauge(
+        "dokku_api_ssh_commands_in_flight",
+        "Commands currently executing over SSH.",
+    )
+)
+ssh_output_bytes = registry.register(
+    Counter(
+        "dokku_api_ssh_output_bytes_total",
+        "Bytes of output returned by the commands executed over SSH.",
+        ("subcommand",),
+    )
+)
+db_query_duration = registry.register(
+    Histogram(
+        "dokku_api_db_query_duration_seconds",
+        "Latency of the database queries.",
+        ("operation",),
+    )
+)
+db_session_duration = registry.register(
+    Histogram(
+        "dokku_api_db_session_duration_seconds",
+        "Time a database session holds a pooled connection.",
+    )
+)
+db_pool_wait_duration = registry.register(
+    Histogram(
+        "dokku_api_db_pool_wait_duration_seconds",
+        "Time waited to check out a pooled database connection.",
+    )
+)
+http_request_duration = registry.register(
+    Histogram(
+        "dokku_api_http_request_duration_seconds",
+        "Latency of the HTTP requests, by route.",
+        ("method", "route", "status"),
+    )
+)
+
+
+def get_query_operation(statement: Optional[str]) -> str:
+    operation = (statement or "").lstrip().split(" ", 1)[0].upper()
+
+    if operation in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+        return operation
+    return "OTHER"
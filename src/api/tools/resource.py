@@ -3,7 +3,7 @@ from typing import Optional
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.models import AsyncSessionLocal, get_user
+from src.api.models import get_user, open_db_session
 from src.api.schemas import UserSchema
 from src.config import Config
 
@@ -64,7 +64,7 @@ async def check_shared_app(
     if shared_by is None or session_user.email == shared_by:
         return session_user
 
-    if (shared_by, app_name) not in session_user.shared_apps:
+    if (shared_by, app_name) not in session_user.shared_app_set:
         raise HTTPException(
             status_code=404,
             detail="App does not exist or not shared by the owner",
@@ -73,5 +73,5 @@ async def check_shared_app(
     if db_session is not None:
         return await get_user(shared_by, db_session)
 
-    async with AsyncSessionLocal() as db_session:
+    async with open_db_session() as db_session:
         return await get_user(shared_by, db_session)
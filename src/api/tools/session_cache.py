@@ -0,0 +1,130 @@
+import datetime
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from src.api.schemas import UserSchema
+from src.config import Config
+
+
+class SessionCache:
+    """
+    TTL and LRU bounded cache of the authenticated users, by hashed token.
+
+    An entry never outlives the expiration of its token. The functions that
+    change a user (resources, sharing, quotas, tokens...) invalidate its
+    entries, and users loaded during an invalidation are not stored.
+
+    The cache lives in the worker process: with several workers, a change
+    only invalidates the cache of the worker that made it, and the other
+    ones serve the stale user for at most the TTL.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict = OrderedDict()
+        self._tokens_by_email: Dict[str, set] = {}
+        self._version = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, hashed_access_token: str) -> Optional[UserSchema]:
+        entry = self._entries.get(hashed_access_token)
+
+        if entry is None or time.monotonic() > entry[0]:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(hashed_access_token)
+        self.hits += 1
+
+        return entry[1]
+
+    def version(self) -> int:
+        return self._version
+
+    def set(self, hashed_access_token: str, user: UserSchema, version: int) -> None:
+        """
+        Store a user, unless the cache was invalidated since `version`.
+        """
+        if not self.enabled or self._version != version:
+            return
+
+        if hashed_access_token == user.access_token:
+            expiration = user.access_token_expiration
+        else:
+            expiration = user.take_over_access_token_expiration
+
+        expires_at = time.monotonic() + self.ttl
+
+        if expiration is not None:
+            if expiration.tzinfo is None:
+                expiration = expiration.replace(tzinfo=datetime.timezone.utc)
+
+            now = datetime.datetime.now(datetime.timezone.utc)
+            expires_at = min(
+                expires_at, time.monotonic() + (expiration - now).total_seconds()
+            )
+
+        self._discard(hashed_access_token)
+        self._entries[hashed_access_token] = (expires_at, user)
+        self._tokens_by_email.setdefault(user.email, set()).add(hashed_access_token)
+
+        while len(self._entries) > self.max_entries:
+            self._discard(next(iter(self._entries)))
+
+    def _discard(self, hashed_access_token: str) -> None:
+        entry = self._entries.pop(hashed_access_token, None)
+
+        if entry is None:
+            return
+
+        tokens = self._tokens_by_email.get(entry[1].email)
+
+        if tokens is not None:
+            tokens.discard(hashed_access_token)
+
+            if not tokens:
+                del self._tokens_by_email[entry[1].email]
+
+    def invalidate(self, emails: Iterable[str] = ()) -> None:
+        """
+        Invalidate the entries of the given users, or every entry if no user
+        is given.
+        """
+        emails = list(emails)
+
+        self._version += 1
+        self.invalidations += 1
+
+        if not emails:
+            self._entries.clear()
+            self._tokens_by_email.clear()
+            return
+
+        for email in emails:
+            for hashed_access_token in list(self._tokens_by_email.get(email, ())):
+                self._discard(hashed_access_token)
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+        }
+
+
+session_cache = SessionCache(
+    Config.API_SESSION_CACHE_TTL, Config.API_SESSION_CACHE_MAX_ENTRIES
+)
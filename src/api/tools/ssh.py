@@ -1,31 +1,505 @@
+import asyncio
 import logging
-from typing import Tuple
+import secrets
+import shlex
+import time
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import asyncssh
+from fastapi import HTTPException
 
+from src.api.tools.cache import (
+    MUTATE,
+    READ,
+    classify_command,
+    command_cache,
+    parse_command,
+)
+from src.api.tools.history import history_writer
+from src.api.tools.metrics import (
+    ssh_command_duration,
+    ssh_commands,
+    ssh_commands_in_flight,
+    ssh_output_bytes,
+)
 from src.config import Config
 
 ssh_hostname = Config.SSH_SERVER.SSH_HOSTNAME
 ssh_port = Config.SSH_SERVER.SSH_PORT
 ssh_key_path = Config.SSH_SERVER.SSH_KEY_PATH
+ssh_pool_size = Config.SSH_SERVER.SSH_POOL_SIZE
+ssh_pool_max_channels = Config.SSH_SERVER.SSH_POOL_MAX_CHANNELS
+ssh_keepalive_interval = Config.SSH_SERVER.SSH_KEEPALIVE_INTERVAL
 
+command_timeout = 10 * 60
+batch_max_commands = 100
+root_login_retry_interval = 60 * 60
+stream_chunk_size = 64 * 1024
 
-async def _log_command(command: str, username: str) -> None:
+
+class SSHQueueFullError(HTTPException):
     """
-    Save an executed command to the history (database).
+    Raised when too many SSH commands are already waiting for a free slot.
+    """
+
+    def __init__(self):
+        super().__init__(
+            status_code=503, detail="Too many SSH commands queued, try again later"
+        )
+
+
+class _RequestScope:
+    def __init__(self, user: Optional[str], max_connections: int):
+        self.user = user
+        self.semaphore = (
+            asyncio.Semaphore(max_connections) if max_connections > 0 else None
+        )
+
+
+_request_scope: ContextVar[Optional[_RequestScope]] = ContextVar(
+    "ssh_request_scope", default=None
+)
+
+
+class SSHGovernor:
+    """
+    Bound the SSH commands in flight per request, per user and globally.
+
+    Slots are always taken in that order (request, user, global), so a command
+    never holds a wider slot while waiting for a narrower one. When the global
+    limit is reached and too many commands are already waiting for it, new
+    commands of a request are shed with a 503. Commands that do not belong to
+    a request (scheduled jobs) are never shed.
+
+    A limit lower than 1 disables it.
+    """
+
+    def __init__(
+        self,
+        max_per_request: int,
+        max_per_user: int,
+        max_global: int,
+        max_queued: int,
+    ):
+        self.max_per_request = max_per_request
+        self.max_per_user = max_per_user
+        self.max_global = max_global
+        self.max_queued = max_queued
+
+        self._global = asyncio.Semaphore(max_global) if max_global > 0 else None
+        self._users: Dict[str, List] = {}
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.global_waiting = 0
+        self.executed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @contextmanager
+    def request_scope(self, user: Optional[str] = None) -> Iterator[None]:
+        """
+        Bind the SSH commands run by the current request to its limits.
+        """
+        token = _request_scope.set(_RequestScope(user, self.max_per_request))
+        try:
+            yield
+        finally:
+            _request_scope.reset(token)
+
+    @asynccontextmanager
+    async def _user_slot(self, user: str) -> AsyncIterator[None]:
+        entry = self._users.get(user)
+
+        if entry is None:
+            entry = self._users[user] = [asyncio.Semaphore(self.max_per_user), 0]
+
+        entry[1] += 1
+
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+
+            if not entry[1]:
+                del self._users[user]
+
+    async def _acquire(
+        self, stack: AsyncExitStack, scope: Optional[_RequestScope]
+    ) -> None:
+        if scope is not None and scope.semaphore is not None:
+            await stack.enter_async_context(scope.semaphore)
+
+        if scope is not None and scope.user and self.max_per_user > 0:
+            await stack.enter_async_context(self._user_slot(scope.user))
+
+        if self._global is None:
+            return
+
+        if (
+            scope is not None
+            and self._global.locked()
+            and 0 < self.max_queued <= self.global_waiting
+        ):
+            self.rejected += 1
+            raise SSHQueueFullError()
+
+        self.global_waiting += 1
+        try:
+            await stack.enter_async_context(self._global)
+        finally:
+            self.global_waiting -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Wait for a free slot to run one SSH command.
+        """
+        scope = _request_scope.get()
+        started_at = time.monotonic()
+
+        async with AsyncExitStack() as stack:
+            self.waiting += 1
+            try:
+                await self._acquire(stack, scope)
+            finally:
+                self.waiting -= 1
+
+            wait_time = time.monotonic() - started_at
+
+            self.executed += 1
+            self.total_wait += wait_time
+            self.max_wait = max(self.max_wait, wait_time)
+
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "queue_depth": self.global_waiting,
+            "active_users": len(self._users),
+            "executed": self.executed,
+            "rejected": self.rejected,
+            "average_wait_ms": (
+                round(self.total_wait / self.executed * 1000, 3)
+                if self.executed
+                else 0.0
+            ),
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "limits": {
+                "per_request": self.max_per_request,
+                "per_user": self.max_per_user,
+                "global": self.max_global,
+                "queue_depth": self.max_queued,
+            },
+        }
+
+
+governor = SSHGovernor(
+    Config.API_MAX_CONNECTIONS_PER_REQUEST,
+    Config.API_MAX_CONNECTIONS_PER_USER,
+    Config.API_MAX_CONNECTIONS,
+    Config.API_MAX_QUEUED_COMMANDS,
+)
+
+
+class SingleFlight:
+    """
+    Coalesce identical in-flight calls into a single execution.
+
+    The first caller of a key starts the call, and later callers of the same
+    key await its result until it completes. The call runs in its own task,
+    so a cancelled caller does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.saved = 0
+
+    async def run(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+
+        if future is not None:
+            self.saved += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(function())
+        future.add_done_callback(lambda _: self._calls.pop(key, None))
+
+        self._calls[key] = future
+        self.executed += 1
+
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "saved": self.saved,
+        }
+
+
+single_flight = SingleFlight()
+
+
+class SSHConnectionPool:
+    """
+    Pool of authenticated SSH connections for a single SSH username.
+
+    Connections are opened lazily (or by `warm_up`) and kept alive, and every
+    command runs on a new channel over one of them. A connection that gets
+    closed by the server or misses its keepalives is dropped from the pool
+    and reopened on the next use.
+    """
+
+    def __init__(self, username: str, size: int, max_channels: int):
+        self.username = username
+        self.size = max(size, 1)
+        self.max_channels = max(max_channels, 1)
+
+        self._connections: List[Optional[asyncssh.SSHClientConnection]] = [
+            None
+        ] * self.size
+        self._channels = [0] * self.size
+        self._connect_locks = [asyncio.Lock() for _ in range(self.size)]
+        self._available = asyncio.Condition()
+
+    async def _connect(self) -> asyncssh.SSHClientConnection:
+        return await asyncssh.connect(
+            host=ssh_hostname,
+            port=ssh_port,
+            username=self.username,
+            client_keys=[ssh_key_path],
+            known_hosts=None,
+            connect_timeout=30,
+            keepalive_interval=ssh_keepalive_interval,
+            keepalive_count_max=3,
+        )
+
+    def _discard(self, index: int, conn: asyncssh.SSHClientConnection) -> None:
+        if self._connections[index] is conn:
+            self._connections[index] = None
 
-    The write uses its own session and any failure is only logged, so that
-    recording the history never interrupts the command execution.
+    async def _get_connection(self, index: int) -> asyncssh.SSHClientConnection:
+        async with self._connect_locks[index]:
+            conn = self._connections[index]
+
+            if conn is None:
+                conn = await self._connect()
+                self._connections[index] = conn
+
+                closed = asyncio.ensure_future(conn.wait_closed())
+                closed.add_done_callback(lambda _: self._discard(index, conn))
+
+            return conn
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[asyncssh.SSHClientConnection]:
+        """
+        Reserve a channel on the least busy pooled connection.
+        """
+        async with self._available:
+            while True:
+                index = min(
+                    range(self.size),
+                    key=lambda i: (self._channels[i], self._connections[i] is None),
+                )
+                if self._channels[index] < self.max_channels:
+                    break
+                await self._available.wait()
+
+            self._channels[index] += 1
+
+        try:
+            yield await self._get_connection(index)
+        finally:
+            async with self._available:
+                self._channels[index] -= 1
+                self._available.notify()
+
+    def invalidate(self, conn: asyncssh.SSHClientConnection) -> None:
+        """
+        Drop a broken connection, so that it is reopened on the next use.
+        """
+        for index, pooled_conn in enumerate(self._connections):
+            if pooled_conn is conn:
+                self._connections[index] = None
+        conn.close()
+
+    async def warm_up(self) -> None:
+        """
+        Open every connection of the pool ahead of the first command.
+        """
+        await asyncio.gather(*[self._get_connection(i) for i in range(self.size)])
+
+    async def close(self) -> None:
+        connections = [conn for conn in self._connections if conn is not None]
+        self._connections = [None] * self.size
+
+        for conn in connections:
+            conn.close()
+
+        await asyncio.gather(
+            *[conn.wait_closed() for conn in connections], return_exceptions=True
+        )
+
+
+_connection_pools: Dict[str, SSHConnectionPool] = {}
+
+
+def get_connection_pool(username: str) -> SSHConnectionPool:
+    """
+    Get the connection pool of a SSH username, creating it on first use.
     """
-    # Lazy import to avoid a circular import: the src.api.tools package is
-    # imported by src.api.models.tools.
-    from src.api.models import AsyncSessionLocal, log_command
+    if username not in _connection_pools:
+        _connection_pools[username] = SSHConnectionPool(
+            username, ssh_pool_size, ssh_pool_max_channels
+        )
+    return _connection_pools[username]
+
+
+async def warm_up_connection_pools() -> None:
+    """
+    Open the pooled connections of every SSH username used by the API.
+
+    A failure is only logged, the connections are retried on demand.
+    """
+    for username in ("dokku", "root"):
+        try:
+            await get_connection_pool(username).warm_up()
+        except Exception as error:
+            logging.warning(
+                f"Could not warm up SSH connections for {username}: {error}"
+            )
+
+
+async def close_connection_pools() -> None:
+    for pool in _connection_pools.values():
+        await pool.close()
+    _connection_pools.clear()
+
+
+@asynccontextmanager
+async def _open_process(
+    command: str, username: str, **kwargs
+) -> AsyncIterator[asyncssh.SSHClientProcess]:
+    """
+    Start a command on a new channel over a pooled connection.
+
+    If the channel cannot be opened, the command never started on the server,
+    so the connection is replaced and the command is retried once.
+    """
+    pool = get_connection_pool(username)
+
+    for attempt in range(2):
+        async with pool.connection() as conn:
+            try:
+                process = await conn.create_process(command, **kwargs)
+            except (asyncssh.Error, OSError):
+                pool.invalidate(conn)
+
+                if attempt:
+                    raise
+                continue
+
+            try:
+                yield process
+            finally:
+                process.close()
+            return
+
+
+async def _run_on_pool(command: str, username: str) -> asyncssh.SSHCompletedProcess:
+    """
+    Run a command over a pooled connection and wait for all of its output.
+    """
+    async with _open_process(command, username) as process:
+        return await process.wait(timeout=command_timeout)
+
+
+def _format_result(
+    exit_status: Optional[int], stdout: Optional[str], stderr: Optional[str]
+) -> Tuple[bool, str]:
+    """
+    Build the `(success, output)` tuple returned for an executed command.
+    """
+    output = stdout.strip() if stdout else ""
+
+    if exit_status == 0:
+        return (True, output)
+
+    error = stderr.strip() if stderr else f"Command failed with exit code {exit_status}"
+    output = f"{output}\n{error}" if output else error
+
+    return (False, output)
+
+
+def _output_size(*outputs: Union[str, bytes, None]) -> int:
+    return sum(
+        len(output.encode() if isinstance(output, str) else output)
+        for output in outputs
+        if output
+    )
+
+
+@asynccontextmanager
+async def _observe_command(command: str) -> AsyncIterator[Dict]:
+    """
+    Export the latency, result and output size of a command to the metrics.
+
+    The block must set the `result` and may set the `output_size` of the
+    yielded observation.
+    """
+    subcommand = parse_command(command)[0]
+    observation = {"result": (False, ""), "output_size": 0}
+
+    ssh_commands_in_flight.inc()
+    start = time.perf_counter()
 
     try:
-        async with AsyncSessionLocal() as db_session:
-            await log_command(command, username, db_session)
-    except Exception as error:
-        logging.warning(f"Failed to save command to history: {error}")
+        yield observation
+    finally:
+        ssh_commands_in_flight.dec()
+        ssh_command_duration.observe(time.perf_counter() - start, subcommand=subcommand)
+
+    ssh_commands.inc(
+        subcommand=subcommand,
+        status="success" if observation["result"][0] else "failure",
+    )
+    ssh_output_bytes.inc(observation["output_size"], subcommand=subcommand)
+
+
+async def _log_command(command: str, username: str) -> None:
+    """
+    Save an executed command to the history (database).
+
+    The record is buffered and written in bulk by the history writer, and any
+    failure is only logged, so that recording the history never interrupts
+    the command execution.
+    """
+    await history_writer.record(command, username)
 
 
 async def __execute_command(
@@ -52,38 +526,74 @@ async def __execute_command(
     if dry_run:
         return True, ""
 
-    try:
-        async with asyncssh.connect(
-            host=ssh_hostname,
-            port=ssh_port,
-            username=username,
-            client_keys=[ssh_key_path],
-            known_hosts=None,
-            connect_timeout=30,
-        ) as conn:
-            result = await conn.run(command, timeout=10 * 60)
-
-            if result.exit_status == 0:
-                output = result.stdout.strip() if result.stdout else ""
-                return (True, output)
-            else:
-                output = result.stdout.strip() if result.stdout else ""
-                error = (
-                    result.stderr.strip()
-                    if result.stderr
-                    else f"Command failed with exit code {result.exit_status}"
-                )
+    async with governor.slot(), _observe_command(command) as observation:
+        try:
+            result = await _run_on_pool(command, username)
+            observation["output_size"] = _output_size(result.stdout, result.stderr)
+            observation["result"] = _format_result(
+                result.exit_status, result.stdout, result.stderr
+            )
+
+        except Exception as error:
+            observation["result"] = False, str(error)
+
+    return observation["result"]
+
+
+async def _execute_cached_command(
+    command: str,
+    username: str,
+    use_log: bool,
+    dry_run: bool,
+    max_staleness: Optional[float],
+    use_cache: bool,
+) -> Tuple[bool, str]:
+    """
+    Execute a command, serving read-only commands from the command cache and
+    invalidating the cached results of the resources changed by mutations.
+
+    Identical read-only commands already in flight are not executed again:
+    the later callers await the result of the running one.
+    """
+    kind, resources = classify_command(command)
+    resource = resources[0] if resources else None
+
+    if kind == READ and use_cache and not dry_run:
+        cached = command_cache.get(command, max_staleness)
+
+        if cached is not None:
+            return cached
+
+    if kind != READ or dry_run:
+        success, message = await __execute_command(
+            command, username, use_log=use_log, dry_run=dry_run
+        )
+
+        if kind == MUTATE and not dry_run:
+            command_cache.invalidate(resources)
+
+        return success, message
 
-                output = f"{output}\n{error}" if output else error
+    version = command_cache.version(resource)
 
-                return (False, output)
+    async def execute() -> Tuple[bool, str]:
+        result = await __execute_command(command, username, use_log=use_log)
 
-    except Exception as error:
-        return False, str(error)
+        if result[0]:
+            command_cache.set(command, resource, result, version)
+        return result
+
+    # Identical reads started after an invalidation must not join the ones
+    # started before it, hence the cache version in the key.
+    return await single_flight.run((username, command, version), execute)
 
 
 async def run_command(
-    command: str, use_log: bool = True, dry_run: bool = False
+    command: str,
+    use_log: bool = True,
+    dry_run: bool = False,
+    max_staleness: Optional[float] = None,
+    use_cache: bool = True,
 ) -> Tuple[bool, str]:
     """
     Run a command on the remote server via SSH.
@@ -92,12 +602,15 @@ async def run_command(
         command (str): The command to execute.
         use_log (bool): If True, save the command to the command history (database).
         dry_run (bool): If True, the command is not actually executed.
+        max_staleness (Optional[float]): Maximum age, in seconds, of a cached
+            result for read-only commands. Defaults to the cache TTL.
+        use_cache (bool): If False, always execute the command.
     Returns:
         Tuple[bool, str]: A tuple containing a boolean indicating success
         or failure and the output or error message.
     """
-    success, message = await __execute_command(
-        command, "dokku", use_log=use_log, dry_run=dry_run
+    success, message = await _execute_cached_command(
+        command, "dokku", use_log, dry_run, max_staleness, use_cache
     )
 
     if success:
@@ -108,7 +621,11 @@ async def run_command(
 
 
 async def run_command_as_root(
-    command: str, use_log: bool = True, dry_run: bool = False
+    command: str,
+    use_log: bool = True,
+    dry_run: bool = False,
+    max_staleness: Optional[float] = None,
+    use_cache: bool = True,
 ) -> Tuple[bool, str]:
     """
     Run a command on the remote server via SSH as root.
@@ -117,12 +634,15 @@ async def run_command_as_root(
         command (str): The command to execute.
         use_log (bool): If True, save the command to the command history (database).
         dry_run (bool): If True, the command is not actually executed.
+        max_staleness (Optional[float]): Maximum age, in seconds, of a cached
+            result for read-only commands. Defaults to the cache TTL.
+        use_cache (bool): If False, always execute the command.
     Returns:
         Tuple[bool, str]: A tuple containing a boolean indicating success
         or failure and the output or error message.
     """
-    success, message = await __execute_command(
-        command, "root", use_log=use_log, dry_run=dry_run
+    success, message = await _execute_cached_command(
+        command, "root", use_log, dry_run, max_staleness, use_cache
     )
 
     if success:
@@ -131,3 +651,402 @@ async def run_command_as_root(
         logging.warning(f"Command execution failed: {command}\nError: {message}")
 
     return success, message
+
+
+def _quote_command(command: str) -> str:
+    """
+    Quote every argument of a dokku command, so the shell runs it as is.
+    """
+    try:
+        arguments = shlex.split(command)
+    except ValueError:
+        arguments = command.split()
+
+    return " ".join(shlex.quote(argument) for argument in arguments)
+
+
+def _build_batch_script(commands: List[str], delimiter: str) -> str:
+    """
+    Build a shell script that runs every command and frames its results.
+
+    Each command is framed by `OUT`, `ERR` and `END` marker lines, and the
+    `END` marker carries the exit status of the command. The arguments are
+    quoted, since the script runs as root.
+    """
+    lines = ["error_file=$(mktemp)", "trap 'rm -f \"$error_file\"' EXIT"]
+
+    for index, command in enumerate(commands):
+        lines += [
+            f"echo '{delimiter} OUT {index}'",
+            f'dokku {_quote_command(command)} < /dev/null 2> "$error_file"',
+            "status=$?",
+            "echo",
+            f"echo '{delimiter} ERR {index}'",
+            'cat "$error_file"',
+            "echo",
+            f'echo "{delimiter} END {index} $status"',
+        ]
+
+    return "\n".join(lines)
+
+
+def _parse_batch_output(
+    output: str, delimiter: str, count: int
+) -> List[Optional[Tuple[bool, str]]]:
+    """
+    Split the output of a batch script into one result per command.
+
+    Commands that started (`OUT` marker) without ending (`END` marker) may have
+    run partially, so they fail. Commands that never started get None.
+    """
+    results: List[Optional[Tuple[bool, str]]] = [None] * count
+    sections: Dict[Tuple[int, str], List[str]] = {}
+    current = None
+
+    for line in output.split("\n"):
+        if not line.startswith(delimiter):
+            if current is not None:
+                sections[current].append(line)
+            continue
+
+        marker = line[len(delimiter) :].split()
+
+        if len(marker) < 2 or not marker[1].isdigit() or int(marker[1]) >= count:
+            current = None
+            continue
+
+        kind, index = marker[0], int(marker[1])
+
+        if kind == "END" and len(marker) == 3:
+            results[index] = _format_result(
+                int(marker[2]),
+                "\n".join(sections.get((index, "OUT"), [])),
+                "\n".join(sections.get((index, "ERR"), [])),
+            )
+            current = None
+        elif kind in ("OUT", "ERR"):
+            current = (index, kind)
+            sections[current] = []
+
+    for index, _ in sections:
+        if results[index] is None:
+            results[index] = (False, "The command was interrupted")
+
+    return results
+
+
+# Time (monotonic) of the last refused root login, per host.
+_root_login_refused: Dict[str, float] = {}
+
+
+def _root_login_allowed() -> bool:
+    refused_at = _root_login_refused.get(ssh_hostname)
+    return (
+        refused_at is None or time.monotonic() - refused_at > root_login_retry_interval
+    )
+
+
+async def _run_batch(commands: List[str], use_log: bool) -> List[Tuple[bool, str]]:
+    delimiter = f"__DOKKU_API_BATCH_{secrets.token_hex(16)}__"
+    results: List[Optional[Tuple[bool, str]]] = [None] * len(commands)
+
+    # A refused root login is remembered, so the batches go straight to the
+    # dokku user instead of paying a failed authentication every time.
+    root_login_allowed = _root_login_allowed()
+
+    if use_log:
+        for command in commands:
+            await _log_command(
+                f"dokku {command}", "root" if root_login_allowed else "dokku"
+            )
+
+    # Whether the commands without a result surely did not run. Otherwise,
+    # only the read-only ones are run again.
+    not_started = True
+
+    if root_login_allowed:
+        async with governor.slot(), _observe_command("batch") as observation:
+            try:
+                result = await _run_on_pool(
+                    _build_batch_script(commands, delimiter), "root"
+                )
+                results = _parse_batch_output(
+                    result.stdout or "", delimiter, len(commands)
+                )
+                observation["output_size"] = _output_size(result.stdout, result.stderr)
+
+            except asyncssh.PermissionDenied as error:
+                logging.warning(f"Root login refused, batches are disabled: {error}")
+                _root_login_refused[ssh_hostname] = time.monotonic()
+
+            except asyncssh.ProcessError as error:
+                # E.g. a timeout: the script may still be running.
+                logging.warning(f"Batch of SSH commands interrupted: {error}")
+                results = _parse_batch_output(
+                    error.stdout or "", delimiter, len(commands)
+                )
+                not_started = False
+
+            except (asyncssh.ChannelOpenError, OSError) as error:
+                logging.warning(f"Could not run batch of SSH commands: {error}")
+
+            except Exception as error:
+                logging.warning(f"Batch of SSH commands interrupted: {error}")
+                not_started = False
+
+            observation["result"] = (None not in results, "")
+
+    missing = []
+
+    for index, result in enumerate(results):
+        if result is not None:
+            continue
+
+        if not_started or classify_command(commands[index])[0] != MUTATE:
+            missing.append(index)
+        else:
+            results[index] = (False, "The command was interrupted")
+
+    fallback_results = await asyncio.gather(
+        *[
+            __execute_command(commands[index], "dokku", use_log=False)
+            for index in missing
+        ]
+    )
+    for index, result in zip(missing, fallback_results):
+        results[index] = result
+
+    return results
+
+
+async def run_commands_batch(
+    commands: List[str],
+    use_log: bool = True,
+    max_staleness: Optional[float] = None,
+    use_cache: bool = True,
+) -> List[Tuple[bool, str]]:
+    """
+    Run several independent dokku commands in a single SSH round-trip.
+
+    The commands are sent as one shell script over a root connection, because
+    the dokku user only accepts a single dokku command per session. Commands
+    that could not run in the batch (e.g. root login is not allowed) fall back
+    to individual `run_command` calls. A refused root login disables the
+    batches for an hour. Mutating commands that may have run are not run
+    again: they fail.
+
+    Args:
+        commands (List[str]): The commands to execute (without "dokku").
+        use_log (bool): If True, save the commands to the command history (database).
+        max_staleness (Optional[float]): Maximum age, in seconds, of a cached
+            result for read-only commands. Defaults to the cache TTL.
+        use_cache (bool): If False, always execute the commands.
+    Returns:
+        List[Tuple[bool, str]]: One `(success, output)` tuple per command,
+        in the same order as the given commands.
+    """
+    results: List[Optional[Tuple[bool, str]]] = [None] * len(commands)
+    classified = [classify_command(command) for command in commands]
+    pending = []
+
+    for index, (command, (kind, _)) in enumerate(zip(commands, classified)):
+        if kind == READ and use_cache:
+            results[index] = command_cache.get(command, max_staleness)
+
+        if results[index] is None:
+            pending.append(index)
+
+    versions = {
+        index: command_cache.version((classified[index][1] or [None])[0])
+        for index in pending
+    }
+    pending_commands = [commands[index] for index in pending]
+
+    chunks = [
+        pending_commands[start : start + batch_max_commands]
+        for start in range(0, len(pending_commands), batch_max_commands)
+    ]
+    chunk_results = await asyncio.gather(
+        *[_run_batch(chunk, use_log) for chunk in chunks]
+    )
+
+    executed = [result for chunk in chunk_results for result in chunk]
+
+    for index, result in zip(pending, executed):
+        kind, resources = classified[index]
+        results[index] = result
+
+        if kind == READ and result[0]:
+            resource = resources[0] if resources else None
+            command_cache.set(commands[index], resource, result, versions[index])
+
+        elif kind == MUTATE:
+            command_cache.invalidate(resources)
+
+    for command, (success, message) in zip(commands, results):
+        if success:
+            logging.info(f"Command executed successfully: {command}")
+        else:
+            logging.warning(f"Command execution failed: {command}\nError: {message}")
+
+    return results
+
+
+class CommandStream:
+    """
+    Output of a command read incrementally from its SSH channel.
+
+    Iterate over it to receive the stdout chunks as they arrive. Once the
+    iteration is over, `exit_status` and `error` report how the command ended.
+    """
+
+    def __init__(
+        self,
+        command: str,
+        username: str,
+        use_log: bool = True,
+        encoding: Optional[str] = "utf-8",
+        append_error: bool = False,
+    ):
+        self.command = command
+        self.username = username
+        self.exit_status: Optional[int] = None
+        self.error: Optional[str] = None
+
+        self._use_log = use_log
+        self._encoding = encoding
+        self._append_error = append_error
+        self._pending: List[Union[str, bytes]] = []
+        self._chunks = self._generate()
+
+    @property
+    def success(self) -> bool:
+        return self.exit_status == 0
+
+    async def _generate(self) -> AsyncIterator[Union[str, bytes]]:
+        command = self.command
+
+        if self.username == "root":
+            command = f"dokku {command}"
+
+        if self._use_log:
+            await _log_command(command, self.username)
+
+        async with governor.slot(), _observe_command(command) as observation:
+            try:
+                async with _open_process(
+                    command, self.username, encoding=self._encoding
+                ) as process:
+                    stderr = asyncio.ensure_future(process.stderr.read())
+
+                    try:
+                        while True:
+                            chunk = await asyncio.wait_for(
+                                process.stdout.read(stream_chunk_size),
+                                timeout=command_timeout,
+                            )
+                            if not chunk:
+                                break
+                            observation["output_size"] += _output_size(chunk)
+                            yield chunk
+
+                        await process.wait_closed()
+                        self.exit_status = process.exit_status
+                        error = await stderr
+                    finally:
+                        stderr.cancel()
+
+            except Exception as exception:
+                if self.exit_status is None:
+                    self.exit_status = -1
+                error = str(exception)
+
+            observation["result"] = (self.success, "")
+
+        if self.success:
+            logging.info(f"Command streamed successfully: {self.command}")
+            return
+
+        if isinstance(error, bytes):
+            error = error.decode("utf-8", errors="replace")
+
+        self.error = (
+            error.strip()
+            if error and error.strip()
+            else f"Command failed with exit code {self.exit_status}"
+        )
+        logging.warning(
+            f"Command execution failed: {self.command}\nError: {self.error}"
+        )
+
+        if self._append_error:
+            message = f"\n{self.error}"
+            yield message if self._encoding else message.encode("utf-8")
+
+    async def prefetch(self) -> None:
+        """
+        Start the command and wait for its first chunk, or for its end when
+        it has no output, so that failures can be reported before streaming.
+        """
+        try:
+            self._pending.append(await self._chunks.__anext__())
+        except StopAsyncIteration:
+            pass
+
+    async def __aiter__(self) -> AsyncIterator[Union[str, bytes]]:
+        for chunk in self._pending:
+            yield chunk
+        self._pending = []
+
+        async for chunk in self._chunks:
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._chunks.aclose()
+
+
+def stream_command(
+    command: str,
+    use_log: bool = True,
+    encoding: Optional[str] = "utf-8",
+    append_error: bool = False,
+) -> CommandStream:
+    """
+    Run a command on the remote server via SSH, streaming its output.
+
+    The command only starts when the stream is iterated (or prefetched).
+
+    Args:
+        command (str): The command to execute.
+        use_log (bool): If True, save the command to the command history (database).
+        encoding (Optional[str]): The encoding of the output, or None for bytes.
+        append_error (bool): If True, the error message is sent as the last
+            chunk when the command fails.
+    Returns:
+        CommandStream: The stream of stdout chunks.
+    """
+    return CommandStream(command, "dokku", use_log, encoding, append_error)
+
+
+async def start_stream(
+    command: str,
+    use_log: bool = True,
+    encoding: Optional[str] = "utf-8",
+    append_error: bool = False,
+) -> Tuple[bool, Union[CommandStream, str]]:
+    """
+    Start streaming a command and wait for its first chunk.
+
+    Returns:
+        Tuple[bool, Union[CommandStream, str]]: (True, stream) while the
+        command runs or if it succeeded, else (False, error_message) when it
+        failed before streaming anything.
+    """
+    stream = stream_command(command, use_log, encoding, append_error)
+    await stream.prefetch()
+
+    if stream.exit_status is not None and not stream.success:
+        await stream.aclose()
+        return False, stream.error
+
+    return True, stream
@@ -67,12 +67,15 @@ def validate_api_key(api_key: str) -> None:
 
 def validate_user_credentials(
     request: Request,
-    payload: UserCredentialsPayload = Body(...),
+    payload: Optional[UserCredentialsPayload] = Body(default=None),
 ) -> None:
     """
     Check if request.state.session_user is set.
+
+    The access token is given in the JSON body or as a Bearer token, in which
+    case the body is optional.
     """
-    if request.state.session_user is None and not payload.access_token:
+    if request.state.session_user is None:
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED,
             detail="Invalid or missing user credentials",
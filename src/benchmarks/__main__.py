@@ -0,0 +1,111 @@
+"""
+Run the load-test benchmarks of the hot endpoints:
+
+    python -m src.benchmarks --sizes 10,100,1000 --output results.json
+    python -m src.benchmarks --baseline results.json --tolerance 0.2
+
+The results are printed (and saved) as JSON. With `--baseline`, the run is
+compared with a previous one and the exit code is 1 on regressions.
+
+The default temporary SQLite database requires `aiosqlite`. Otherwise, use
+`--database-url` with a local MySQL (e.g. `mysql+aiomysql://...`).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+import asyncssh
+
+from src.benchmarks.report import compare, load, save
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Dokku API load-test benchmarks")
+    parser.add_argument(
+        "--sizes",
+        default="10,100,1000",
+        help="Apps, services and networks of each synthetic user",
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--requests", type=int, default=200, help="Requests per scenario"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.002, help="Seconds per SSH command"
+    )
+    parser.add_argument("--scenarios", default="session,apps,databases,networks,search")
+    parser.add_argument("--port", type=int, default=2222, help="Fake Dokku port")
+    parser.add_argument(
+        "--database-url",
+        help="Database URL (default: a temporary SQLite database)",
+    )
+    parser.add_argument("--output", help="Save the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with the results of this file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    return parser
+
+
+def configure_environment(args: argparse.Namespace, directory: str) -> None:
+    """
+    Point the configuration at the fake Dokku server and the benchmark
+    database. It must run before `src.config` is imported.
+    """
+    key_path = os.path.join(directory, "id_ed25519")
+    asyncssh.generate_private_key("ssh-ed25519").write_private_key(key_path)
+
+    os.environ.update(
+        {
+            "DATABASE_URL": args.database_url
+            or f"sqlite+aiosqlite:///{os.path.join(directory, 'benchmark.db')}",
+            "SSH_HOSTNAME": "127.0.0.1",
+            "SSH_PORT": str(args.port),
+            "SSH_KEY_PATH": key_path,
+            "AVAILABLE_DATABASES": "postgres",
+            "MASTER_KEY": os.environ.get("MASTER_KEY", "benchmark-master-key"),
+            "API_KEY": os.environ.get("API_KEY", "benchmark-api-key"),
+            "API_USE_PER_USER_RESOURCE_NAMES": "false",
+            "API_LOG_LEVEL": os.environ.get("API_LOG_LEVEL", "WARNING"),
+        }
+    )
+
+
+def main() -> None:
+    args = get_parser().parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure_environment(args, directory)
+
+        from src.benchmarks.runner import run_benchmarks
+
+        results = asyncio.run(
+            run_benchmarks(
+                sizes=[int(size) for size in args.sizes.split(",")],
+                concurrency=args.concurrency,
+                requests=args.requests,
+                latency=args.latency,
+                port=args.port,
+                scenarios=args.scenarios.split(","),
+            )
+        )
+
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        save(results, args.output)
+
+    if args.baseline:
+        regressions = compare(results, load(args.baseline), args.tolerance)
+
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
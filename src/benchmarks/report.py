@@ -0,0 +1,84 @@
+import json
+import math
+from typing import Dict, List
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Nearest-rank percentile of the given values.
+    """
+    if not values:
+        return 0.0
+
+    values = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(values)) - 1, 0)
+
+    return values[min(rank, len(values) - 1)]
+
+
+def summarize(latencies: List[float], errors: int, duration: float) -> Dict:
+    """
+    Summarize the latencies (seconds) of a scenario.
+    """
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 2) if duration else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Compare the scenarios of a run with a baseline run.
+
+    A scenario regresses when its throughput drops, or its p95 latency grows,
+    by more than `tolerance` (e.g. 0.2 for 20%). The peak RSS is checked the
+    same way.
+    """
+    regressions = []
+
+    for name, scenario in results["scenarios"].items():
+        reference = baseline.get("scenarios", {}).get(name)
+
+        if reference is None:
+            continue
+
+        if scenario["throughput_rps"] < reference["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {scenario['throughput_rps']} req/s "
+                f"(baseline {reference['throughput_rps']} req/s)"
+            )
+
+        if scenario["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {scenario['p95_ms']} ms "
+                f"(baseline {reference['p95_ms']} ms)"
+            )
+
+        if scenario["errors"] > reference["errors"]:
+            regressions.append(
+                f"{name}: {scenario['errors']} errors "
+                f"(baseline {reference['errors']})"
+            )
+
+    peak_rss, reference_rss = results["peak_rss_mb"], baseline.get("peak_rss_mb")
+
+    if reference_rss and peak_rss > reference_rss * (1 + tolerance):
+        regressions.append(f"peak RSS {peak_rss} MB (baseline {reference_rss} MB)")
+
+    return regressions
+
+
+def load(path: str) -> Dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def save(results: Dict, path: str) -> None:
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+        file.write("\n")
@@ -0,0 +1,204 @@
+"""
+Load test of the hot endpoints against a fake Dokku server.
+
+The app is built by `src.api.app:get_app` and driven in-process through an
+ASGI transport, so the measures do not depend on the network. The fake
+Dokku server runs in a subprocess, so that its memory is not counted in the
+peak RSS.
+
+The environment (database, SSH server, keys...) must be configured before
+this module is imported, see `src.benchmarks.__main__`.
+"""
+
+import asyncio
+import os
+import platform
+import re
+import resource
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+from src.api.app import get_app
+from src.api.models import App, AsyncSessionLocal, Network, Service, init_models
+from src.api.models.tools import create_user
+from src.api.tools.history import history_writer
+from src.api.tools.ssh import close_connection_pools
+from src.benchmarks.report import summarize
+from src.config import Config
+
+plugin_name = "postgres"
+
+endpoints = {
+    "session": ("/api/quota/", {}),
+    "apps": ("/api/apps/list/", {}),
+    "apps-bulk": ("/api/apps/list/", {"bulk": True}),
+    "databases": ("/api/databases/list/", {}),
+    "databases-lightweight": ("/api/databases/list/", {"lightweight": True}),
+    "networks": ("/api/networks/list/", {}),
+    "search": ("/api/search/", {"q": "app-1"}),
+    "search-details": ("/api/search/", {"q": "app-1", "include_details": True}),
+}
+
+
+def get_user(size: int) -> Tuple[str, str]:
+    return f"bench-{size}@example.com", f"bench-access-token-{size}"
+
+
+def get_ranges(sizes: List[int]) -> Dict[int, range]:
+    """
+    Give each synthetic user its own range of resource indexes.
+    """
+    ranges, start = {}, 0
+
+    for size in sizes:
+        ranges[size] = range(start, start + size)
+        start += size
+
+    return ranges
+
+
+async def start_fake_dokku(total: int, latency: float, port: int):
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-u",
+        "-m",
+        "src.fake_dokku",
+        "--port",
+        str(port),
+        "--latency",
+        str(latency),
+        "--plugins",
+        plugin_name,
+        "--seed-apps",
+        str(total),
+        "--seed-services",
+        str(total),
+        "--seed-networks",
+        str(total),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+
+    while True:
+        line = (await process.stdout.readline()).decode()
+
+        if not line:
+            raise RuntimeError("The fake Dokku server did not start")
+
+        if line.startswith("Fake Dokku listening"):
+            return process
+
+
+async def seed_database(sizes: List[int]) -> None:
+    await init_models()
+
+    for size, indexes in get_ranges(sizes).items():
+        email, access_token = get_user(size)
+
+        async with AsyncSessionLocal() as db_session:
+            await create_user(email, access_token, db_session)
+
+            db_session.add_all(
+                [App(f"app-{index}", user_email=email) for index in indexes]
+                + [
+                    Service(name=f"{plugin_name}:db_{index}", user_email=email)
+                    for index in indexes
+                ]
+                + [
+                    Network(name=f"network-{index}", user_email=email)
+                    for index in indexes
+                ]
+            )
+            await db_session.commit()
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    path: str,
+    params: Dict,
+    access_token: str,
+    concurrency: int,
+    requests: int,
+) -> Dict:
+    latencies, errors = [], 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+
+            response = await client.post(
+                path,
+                params={"api_key": Config.API_KEY, **params},
+                json={"access_token": access_token},
+            )
+            latencies.append(time.perf_counter() - start)
+
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def get_peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes and macOS reports bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+
+async def run_benchmarks(
+    sizes: List[int],
+    concurrency: int,
+    requests: int,
+    latency: float,
+    port: int,
+    scenarios: List[str],
+) -> Dict:
+    fake_dokku = await start_fake_dokku(sum(sizes), latency, port)
+
+    try:
+        await seed_database(sizes)
+
+        app = get_app()
+        history_writer.start()
+
+        results = {
+            "python": platform.python_version(),
+            "database": re.sub(r"//.*@", "//***@", os.environ["DATABASE_URL"]),
+            "concurrency": concurrency,
+            "requests": requests,
+            "ssh_latency_s": latency,
+            "scenarios": {},
+        }
+        transport = httpx.ASGITransport(app=app)
+
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark", timeout=None
+        ) as client:
+            for size in sizes:
+                _, access_token = get_user(size)
+
+                for name in scenarios:
+                    results["scenarios"][f"{name}@{size}"] = await run_scenario(
+                        client, *endpoints[name], access_token, concurrency, requests
+                    )
+
+        results["peak_rss_mb"] = get_peak_rss_mb()
+        return results
+
+    finally:
+        await close_connection_pools()
+        await history_writer.stop()
+
+        fake_dokku.terminate()
+        await fake_dokku.wait()
@@ -20,6 +20,13 @@ class DatabaseConfig:
     DB_PASSWORD = os.getenv("DB_PASSWORD", "root")
     DB_URL = os.getenv("DATABASE_URL")
 
+    # Pool limits shared by all the workers (each worker gets its share).
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
 
 class SSHServerConfig:
     """
@@ -29,6 +36,9 @@ class SSHServerConfig:
     SSH_HOSTNAME: str = os.getenv("SSH_HOSTNAME", "localhost")
     SSH_PORT: int = int(os.getenv("SSH_PORT", "22"))
     SSH_KEY_PATH: str = os.getenv("SSH_KEY_PATH")
+    SSH_POOL_SIZE: int = int(os.getenv("SSH_POOL_SIZE", "4"))
+    SSH_POOL_MAX_CHANNELS: int = int(os.getenv("SSH_POOL_MAX_CHANNELS", "8"))
+    SSH_KEEPALIVE_INTERVAL: int = int(os.getenv("SSH_KEEPALIVE_INTERVAL", "30"))
 
 
 class Config:
@@ -44,6 +54,23 @@ class Config:
     API_MAX_CONNECTIONS_PER_REQUEST = int(
         os.getenv("API_MAX_CONNECTIONS_PER_REQUEST", "1")
     )
+    API_MAX_CONNECTIONS_PER_USER = int(os.getenv("API_MAX_CONNECTIONS_PER_USER", "8"))
+    API_MAX_CONNECTIONS = int(os.getenv("API_MAX_CONNECTIONS", "32"))
+    API_MAX_QUEUED_COMMANDS = int(os.getenv("API_MAX_QUEUED_COMMANDS", "256"))
+    API_CACHE_TTL = float(os.getenv("API_CACHE_TTL", "10"))
+    API_CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "4096"))
+    API_SESSION_CACHE_TTL = float(os.getenv("API_SESSION_CACHE_TTL", "30"))
+    API_SESSION_CACHE_MAX_ENTRIES = int(
+        os.getenv("API_SESSION_CACHE_MAX_ENTRIES", "1024")
+    )
+    API_HISTORY_BATCH_SIZE = int(os.getenv("API_HISTORY_BATCH_SIZE", "100"))
+    API_HISTORY_FLUSH_INTERVAL = int(os.getenv("API_HISTORY_FLUSH_INTERVAL", "500"))
+    API_HISTORY_QUEUE_SIZE = int(os.getenv("API_HISTORY_QUEUE_SIZE", "10000"))
+    API_HISTORY_DROP_POLICY = os.getenv("API_HISTORY_DROP_POLICY", "drop-newest")
+    API_HISTORY_RETENTION_DAYS = int(os.getenv("API_HISTORY_RETENTION_DAYS", "0"))
+    API_HISTORY_PRUNE_BATCH_SIZE = int(
+        os.getenv("API_HISTORY_PRUNE_BATCH_SIZE", "1000")
+    )
 
     API_NAME: str = os.getenv("API_NAME")
     API_VERSION_NUMBER: str = API_VERSION_NUMBER
@@ -0,0 +1,2 @@
+from src.fake_dokku.model import FakeApp, FakeDokku, FakeService
+from src.fake_dokku.server import FakeDokkuServer
@@ -0,0 +1,86 @@
+"""
+Run a fake Dokku SSH server, to use the API without a Dokku host:
+
+    python -m src.fake_dokku --port 2222 --latency 0.05 --seed-apps 100
+
+Then point the API at it with SSH_HOSTNAME, SSH_PORT and SSH_KEY_PATH (any
+private key is accepted).
+"""
+
+import argparse
+import asyncio
+import logging
+
+from src.fake_dokku.model import FakeDokku, default_plugins
+from src.fake_dokku.server import FakeDokkuServer
+
+
+def parse_latency(value: str):
+    subcommand, _, seconds = value.rpartition("=")
+
+    if not subcommand:
+        raise argparse.ArgumentTypeError("expected SUBCOMMAND=SECONDS")
+    return subcommand, float(seconds)
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Fake Dokku SSH server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2222)
+    parser.add_argument("--host-key", help="Host private key (default: generated)")
+    parser.add_argument(
+        "--latency", type=float, default=0, help="Seconds spent by every command"
+    )
+    parser.add_argument(
+        "--latency-for",
+        type=parse_latency,
+        action="append",
+        default=[],
+        metavar="SUBCOMMAND=SECONDS",
+        help="Seconds spent by a subcommand (e.g. ps:inspect=0.2)",
+    )
+    parser.add_argument(
+        "--output-size",
+        type=int,
+        default=4096,
+        help="Bytes printed by logs, exports and ps:inspect",
+    )
+    parser.add_argument("--plugins", default=",".join(default_plugins))
+    parser.add_argument("--seed-apps", type=int, default=0)
+    parser.add_argument("--seed-services", type=int, default=0)
+    parser.add_argument("--seed-networks", type=int, default=0)
+    return parser
+
+
+async def serve(args: argparse.Namespace) -> None:
+    dokku = FakeDokku(
+        plugins=[plugin for plugin in args.plugins.split(",") if plugin],
+        latency=args.latency,
+        latencies=dict(args.latency_for),
+        output_size=args.output_size,
+    )
+    dokku.seed(args.seed_apps, args.seed_services, args.seed_networks)
+
+    server = await FakeDokkuServer(dokku, args.host, args.port, args.host_key).start()
+
+    print(f"Fake Dokku listening on {server.host}:{server.port}")
+    print(f'Use: SSH_HOSTNAME="{server.host}" SSH_PORT={server.port}', end=" ")
+    print(f'AVAILABLE_DATABASES="{",".join(dokku.plugins)}"', flush=True)
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        asyncio.run(serve(get_parser().parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
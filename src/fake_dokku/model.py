@@ -0,0 +1,830 @@
+import asyncio
+import json
+import secrets
+import shlex
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+Result = Tuple[int, str, str]
+
+default_plugins = ["postgres", "mysql", "mongo", "redis"]
+
+
+def error(message: str, exit_status: int = 1) -> Result:
+    return exit_status, "", f" !     {message}\n"
+
+
+def report(title: str, fields: Dict[str, str]) -> str:
+    width = max([len(key) for key in fields] + [0]) + 2
+    lines = [f"=====> {title}"]
+    lines += [f"       {key + ':':<{width}} {value}" for key, value in fields.items()]
+    return "\n".join(lines) + "\n"
+
+
+@dataclass
+class FakeApp:
+    name: str
+    deployed: bool = False
+    running: bool = False
+    config: Dict[str, str] = field(default_factory=dict)
+    domains: Set[str] = field(default_factory=set)
+    ports: Set[Tuple[str, int, int]] = field(default_factory=set)
+    storage: Set[str] = field(default_factory=set)
+    network: str = ""
+    builder: str = ""
+    letsencrypt: bool = False
+    git_url: str = ""
+
+
+@dataclass
+class FakeService:
+    plugin: str
+    name: str
+    running: bool = True
+    links: Set[str] = field(default_factory=set)
+
+
+class FakeDokku:
+    """
+    In-memory model of a Dokku host.
+
+    It answers the dokku subcommands used by the API with outputs shaped like
+    the real ones. Every command waits `latency` seconds (or the latency set
+    for its subcommand in `latencies`) before running, and the commands that
+    print logs or dumps output `output_size` bytes.
+    """
+
+    def __init__(
+        self,
+        plugins: Optional[List[str]] = None,
+        latency: float = 0,
+        latencies: Optional[Dict[str, float]] = None,
+        output_size: int = 4096,
+        global_domain: str = "dokku.me",
+    ):
+        self.plugins = list(plugins if plugins is not None else default_plugins)
+        self.latency = latency
+        self.latencies = dict(latencies or {})
+        self.output_size = output_size
+        self.global_domain = global_domain
+
+        self.apps: Dict[str, FakeApp] = {}
+        self.services: Dict[Tuple[str, str], FakeService] = {}
+        self.networks: Set[str] = set()
+        self.global_config: Dict[str, str] = {}
+        self.ssh_keys: Dict[str, str] = {}
+        self.executed: List[str] = []
+
+        self._handlers: Dict[str, Callable[[List[str]], Result]] = {
+            name[len("cmd_") :].replace("__", ":").replace("_", "-"): handler
+            for name, handler in ((name, getattr(self, name)) for name in dir(self))
+            if name.startswith("cmd_")
+        }
+
+    def seed(self, apps: int = 0, services: int = 0, networks: int = 0) -> None:
+        """
+        Create deployed apps, services (on every plugin) and networks.
+        """
+        for index in range(apps):
+            app = FakeApp(f"app-{index}", deployed=True, running=True)
+            app.domains.add(f"{app.name}.{self.global_domain}")
+            self.apps[app.name] = app
+
+        for index in range(services):
+            for plugin in self.plugins:
+                self.services[(plugin, f"db_{index}")] = FakeService(
+                    plugin, f"db_{index}"
+                )
+
+        for index in range(networks):
+            self.networks.add(f"network-{index}")
+
+    async def execute(self, command: str) -> Result:
+        """
+        Run a dokku command (without the "dokku" prefix).
+        """
+        try:
+            tokens = shlex.split(command)
+        except ValueError as exception:
+            return error(str(exception))
+
+        # Flags are dropped (the model does not depend on them), except
+        # the field flags of the plugin info.
+        flags = [token for token in tokens if token.startswith("-")]
+        tokens = [token for token in tokens if not token.startswith("-")]
+
+        if not tokens:
+            return error("No command given")
+
+        subcommand, args = tokens[0], tokens[1:]
+        self.executed.append(command)
+
+        await asyncio.sleep(self.latencies.get(subcommand, self.latency))
+
+        plugin, _, action = subcommand.partition(":")
+
+        if plugin in self.plugins and action:
+            return self.plugin_command(plugin, action, args, tuple(flags))
+
+        handler = self._handlers.get(subcommand)
+
+        if handler is None:
+            return error(f"`{subcommand}` is not a dokku command.")
+
+        return handler(args)
+
+    def _filler(self, prefix: str) -> str:
+        line = f"{prefix} " + "x" * 60 + "\n"
+        return line * max(self.output_size // len(line), 1)
+
+    def _app(self, args: List[str]) -> Tuple[Optional[FakeApp], Optional[Result]]:
+        if not args:
+            return None, error("Please specify an app to run the command on")
+
+        app = self.apps.get(args[0])
+
+        if app is None:
+            return None, error(f"App {args[0]} does not exist")
+
+        return app, None
+
+    # Apps.
+
+    def cmd_version(self, args: List[str]) -> Result:
+        return 0, "dokku version 0.35.0\n", ""
+
+    def cmd_apps__list(self, args: List[str]) -> Result:
+        return 0, "=====> My Apps\n" + "".join(f"{n}\n" for n in sorted(self.apps)), ""
+
+    def cmd_apps__exists(self, args: List[str]) -> Result:
+        return self._app(args)[1] or (0, "", "")
+
+    def cmd_apps__create(self, args: List[str]) -> Result:
+        if not args:
+            return error("Please specify an app to run the command on")
+
+        if args[0] in self.apps:
+            return error("Name is already taken")
+
+        self.apps[args[0]] = FakeApp(args[0])
+        self.apps[args[0]].domains.add(f"{args[0]}.{self.global_domain}")
+
+        return 0, f"-----> Creating {args[0]}...\n", ""
+
+    def cmd_apps__clone(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        if len(args) < 2 or args[1] in self.apps:
+            return error("Name is already taken")
+
+        self.apps[args[1]] = FakeApp(
+            args[1],
+            config=dict(app.config),
+            domains={f"{args[1]}.{self.global_domain}"},
+        )
+        return 0, f"-----> Cloning {app.name} to {args[1]}\n", ""
+
+    def cmd_apps__rename(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        if len(args) < 2 or args[1] in self.apps:
+            return error("Name is already taken")
+
+        del self.apps[app.name]
+
+        app.name = args[1]
+        self.apps[app.name] = app
+
+        for service in self.services.values():
+            if args[0] in service.links:
+                service.links.discard(args[0])
+                service.links.add(args[1])
+
+        return 0, f"-----> Renaming {args[0]} to {args[1]}\n", ""
+
+    def cmd_apps__destroy(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        del self.apps[app.name]
+
+        for service in self.services.values():
+            service.links.discard(app.name)
+
+        return 0, f"-----> Destroying {app.name} (including all add-ons)\n", ""
+
+    def cmd_url(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+        domain = sorted(app.domains)[0] if app and app.domains else ""
+        return failure or (0, f"http://{domain}\n", "")
+
+    def cmd_enter(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        if not app.running:
+            return error(f"No containers found for {app.name}")
+
+        if len(args) > 2 and args[2] == "xxd":
+            data = secrets.token_bytes(self.output_size)
+            lines = []
+
+            for offset in range(0, len(data), 16):
+                chunk = data[offset : offset + 16]
+                words = " ".join(
+                    chunk[index : index + 2].hex() for index in range(0, 16, 2)
+                )
+                lines.append(f"{offset:08x}: {words:<39}  {'.' * len(chunk)}")
+
+            return 0, "\n".join(lines) + "\n", ""
+
+        return 0, " ".join(args[2:]) + "\n", ""
+
+    def cmd_logs(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+        return failure or (0, self._filler(f"{app.name}[web.1]:"), "")
+
+    # Processes.
+
+    def _ps(self, args: List[str], deployed: bool, running: bool) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        app.deployed = app.deployed or deployed
+        app.running = running and app.deployed
+
+        return (
+            0,
+            f"-----> {app.name} is now {'running' if running else 'stopped'}\n",
+            "",
+        )
+
+    def cmd_ps__start(self, args: List[str]) -> Result:
+        return self._ps(args, False, True)
+
+    def cmd_ps__restart(self, args: List[str]) -> Result:
+        return self._ps(args, False, True)
+
+    def cmd_ps__rebuild(self, args: List[str]) -> Result:
+        return self._ps(args, True, True)
+
+    def cmd_ps__stop(self, args: List[str]) -> Result:
+        return self._ps(args, False, False)
+
+    def cmd_ps__inspect(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        if not app.deployed:
+            return error(f"No containers found for {app.name}")
+
+        container = {
+            "Id": secrets.token_hex(32),
+            "Name": f"/{app.name}.web.1",
+            "State": {
+                "Status": "running" if app.running else "exited",
+                "Running": app.running,
+            },
+            "Config": {
+                "Env": [f"{key}={value}" for key, value in app.config.items()],
+                "Labels": {"com.dokku.app-name": app.name},
+            },
+        }
+        size = len(json.dumps([container]))
+        container["Config"]["Labels"]["padding"] = "x" * max(self.output_size - size, 0)
+
+        return 0, json.dumps([container], indent=4) + "\n", ""
+
+    def _ps_report(self, app: FakeApp) -> str:
+        return report(
+            f"{app.name} ps information",
+            {
+                "Deployed": str(app.deployed).lower(),
+                "Processes": "1" if app.running else "0",
+                "Ps can scale": "true",
+                "Ps computed procfile path": "Procfile",
+                "Restore": "true",
+                "Running": str(app.running).lower(),
+                "Status web 1": "running" if app.running else "missing",
+            },
+        )
+
+    def cmd_ps__report(self, args: List[str]) -> Result:
+        if not args:
+            return 0, "".join(self._ps_report(app) for app in self.apps.values()), ""
+
+        app, failure = self._app(args)
+        return failure or (0, self._ps_report(app), "")
+
+    # Config.
+
+    def cmd_config__show(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        lines = [f"=====> {app.name} env vars"]
+        lines += [f"{key}:  {value}" for key, value in sorted(app.config.items())]
+
+        return 0, "\n".join(lines) + "\n", ""
+
+    def cmd_config__get(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure or len(args) < 2 or args[1] not in app.config:
+            return failure or (1, "", "")
+
+        return 0, app.config[args[1]] + "\n", ""
+
+    def cmd_config__set(self, args: List[str]) -> Result:
+        values = dict(arg.split("=", 1) for arg in args if "=" in arg)
+
+        # Global config (`--global`) has no app before the values.
+        if args and "=" in args[0]:
+            self.global_config.update(values)
+            return 0, "-----> Setting config vars\n", ""
+
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        app.config.update(values)
+        return 0, "-----> Setting config vars\n", ""
+
+    def cmd_config__unset(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        for key in args[1:]:
+            app.config.pop(key, None)
+
+        return 0, "-----> Unsetting config vars\n", ""
+
+    # Domains, ports and storage.
+
+    def cmd_domains__report(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        return failure or (
+            0,
+            report(
+                f"{app.name} domains information",
+                {
+                    "Domains app enabled": "true",
+                    "Domains app vhosts": " ".join(sorted(app.domains)),
+                    "Domains global enabled": "true",
+                    "Domains global vhosts": self.global_domain,
+                },
+            ),
+            "",
+        )
+
+    def cmd_domains__add(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        app.domains.update(args[1:])
+        return 0, "-----> Added domains\n", ""
+
+    def cmd_domains__set(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        app.domains = set(args[1:])
+        return 0, "-----> Set domains\n", ""
+
+    def cmd_domains__remove(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        app.domains.difference_update(args[1:])
+        return 0, "-----> Removed domains\n", ""
+
+    def cmd_ports__list(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        lines = [f"-----> Port mappings for {app.name}"]
+        lines.append("    -----> scheme  host port  container port")
+        lines += [f"    {scheme}  {host}  {dest}" for scheme, host, dest in app.ports]
+
+        return 0, "\n".join(lines) + "\n", ""
+
+    def cmd_ports__add(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        for mapping in args[1:]:
+            scheme, host, dest = mapping.split(":")
+            app.ports.add((scheme, int(host), int(dest)))
+
+        return 0, "-----> Updating ports\n", ""
+
+    def cmd_ports__remove(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        for mapping in args[1:]:
+            scheme, host, dest = mapping.split(":")
+            app.ports.discard((scheme, int(host), int(dest)))
+
+        return 0, "-----> Updating ports\n", ""
+
+    cmd_proxy__ports = cmd_ports__list
+    cmd_proxy__ports_add = cmd_ports__add
+    cmd_proxy__ports_remove = cmd_ports__remove
+
+    def cmd_storage__list(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+        return failure or (0, "".join(f"{m}\n" for m in sorted(app.storage)), "")
+
+    def cmd_storage__mount(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        app.storage.update(args[1:])
+        return 0, "", ""
+
+    def cmd_storage__unmount(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        app.storage.difference_update(args[1:])
+        return 0, "", ""
+
+    # Builder, git, letsencrypt, nginx and cron.
+
+    def cmd_builder__report(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        return failure or (
+            0,
+            report(
+                f"{app.name} builder information",
+                {
+                    "Builder build dir": "",
+                    "Builder computed build dir": "",
+                    "Builder computed selected": app.builder or "herokuish",
+                    "Builder selected": app.builder,
+                },
+            ),
+            "",
+        )
+
+    def cmd_builder__set(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        app.builder = args[2] if len(args) > 2 else ""
+        return 0, "", ""
+
+    def cmd_git__report(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        return failure or (
+            0,
+            report(
+                f"{app.name} git information",
+                {
+                    "Git deploy branch": "main",
+                    "Git global deploy branch": "master",
+                    "Git keep git dir": "false",
+                    "Git rev env var": "GIT_REV",
+                    "Git sha": secrets.token_hex(20) if app.deployed else "",
+                    "Git source image": "",
+                    "Git last updated at": "",
+                },
+            ),
+            "",
+        )
+
+    def cmd_git__sync(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        app.git_url = args[1] if len(args) > 1 else ""
+        return 0, f"-----> Syncing {app.git_url}\n", ""
+
+    def cmd_git_receive_pack(self, args: List[str]) -> Result:
+        # Pushes are not emulated: the app is just marked as deployed.
+        name = args[0].strip("'/") if args else ""
+
+        if name not in self.apps:
+            self.cmd_apps__create([name])
+
+        self.apps[name].deployed = self.apps[name].running = True
+        return 0, "", ""
+
+    def cmd_git_upload_pack(self, args: List[str]) -> Result:
+        return 0, "", ""
+
+    def cmd_letsencrypt__active(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+        return failure or (0, f"{str(app.letsencrypt).lower()}\n", "")
+
+    def cmd_letsencrypt__enable(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        app.letsencrypt = True
+        return 0, "-----> Enabling letsencrypt\n", ""
+
+    def cmd_letsencrypt__disable(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        app.letsencrypt = False
+        return 0, "-----> Disabling letsencrypt\n", ""
+
+    def cmd_letsencrypt__cron_job(self, args: List[str]) -> Result:
+        return 0, "-----> Updated cron job\n", ""
+
+    def cmd_nginx__access_logs(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+        return failure or (0, self._filler("GET / HTTP/1.1 200"), "")
+
+    def cmd_nginx__error_logs(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+        return failure or (0, self._filler("[error]"), "")
+
+    def cmd_cron__list(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        return (
+            0,
+            "ID                    Schedule   Command\n"
+            "cGhwIHRlc3QucGhw      @daily     echo daily\n",
+            "",
+        )
+
+    def cmd_cron__run(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+        return failure or (0, "", "")
+
+    # Networks.
+
+    def cmd_network__list(self, args: List[str]) -> Result:
+        names = ["bridge", "host", "none"] + sorted(self.networks)
+        return 0, "=====> Networks\n" + "".join(f"{name}\n" for name in names), ""
+
+    def cmd_network__exists(self, args: List[str]) -> Result:
+        if not args or args[0] not in self.networks:
+            return error(f"Network {args[0] if args else ''} does not exist")
+        return 0, "", ""
+
+    def cmd_network__create(self, args: List[str]) -> Result:
+        if not args or args[0] in self.networks:
+            return error("Network already exists")
+
+        self.networks.add(args[0])
+        return 0, f"-----> Creating network {args[0]}\n", ""
+
+    def cmd_network__destroy(self, args: List[str]) -> Result:
+        failure = self.cmd_network__exists(args)
+
+        if failure[0]:
+            return failure
+
+        self.networks.discard(args[0])
+
+        for app in self.apps.values():
+            if app.network == args[0]:
+                app.network = ""
+
+        return 0, f"-----> Destroying network {args[0]}\n", ""
+
+    def cmd_network__info(self, args: List[str]) -> Result:
+        failure = self.cmd_network__exists(args)
+
+        return (
+            failure
+            if failure[0]
+            else (
+                0,
+                report(
+                    f"{args[0]} network information",
+                    {
+                        "ID": secrets.token_hex(6),
+                        "Name": args[0],
+                        "Driver": "bridge",
+                        "Scope": "local",
+                    },
+                ),
+                "",
+            )
+        )
+
+    def cmd_network__set(self, args: List[str]) -> Result:
+        app, failure = self._app(args)
+
+        if failure:
+            return failure
+
+        if len(args) > 1 and args[1] == "attach-post-create":
+            app.network = args[2] if len(args) > 2 else ""
+
+        return 0, "", ""
+
+    def _network_report(self, app: FakeApp) -> str:
+        return report(
+            f"{app.name} network information",
+            {
+                "Network attach post create": app.network,
+                "Network attach post deploy": "",
+                "Network bind all interfaces": "false",
+                "Network computed attach post create": app.network,
+                "Network computed attach post deploy": "",
+                "Network computed initial network": "",
+                "Network initial network": "",
+                "Network web listeners": "",
+            },
+        )
+
+    def cmd_network__report(self, args: List[str]) -> Result:
+        if not args:
+            return (
+                0,
+                "".join(self._network_report(app) for app in self.apps.values()),
+                "",
+            )
+
+        app, failure = self._app(args)
+        return failure or (0, self._network_report(app), "")
+
+    # Plugins and SSH keys.
+
+    def cmd_plugin__list(self, args: List[str]) -> Result:
+        lines = [
+            f"  {name:<20} 1.0.0 enabled    dokku {name} service plugin"
+            for name in self.plugins
+        ]
+        return 0, "\n".join(lines) + "\n", ""
+
+    def cmd_plugin__install(self, args: List[str]) -> Result:
+        # The name is given with `--name`, after the plugin URL.
+        name = args[-1]
+
+        if name not in self.plugins:
+            self.plugins.append(name)
+
+        return 0, f"-----> Plugin {name} installed\n", ""
+
+    def cmd_plugin__uninstall(self, args: List[str]) -> Result:
+        if not args or args[0] not in self.plugins:
+            return error("Plugin is not installed")
+
+        self.plugins.remove(args[0])
+        return 0, f"-----> Plugin {args[0]} uninstalled\n", ""
+
+    def cmd_ssh_keys__add(self, args: List[str]) -> Result:
+        if len(args) < 2:
+            return error("A name and a key file are required")
+
+        self.ssh_keys[args[0]] = args[1]
+        return 0, f"{secrets.token_hex(16)}\n", ""
+
+    # Database plugins (`{plugin}:{action}`).
+
+    def plugin_command(
+        self, plugin: str, action: str, args: List[str], flags: Tuple[str, ...] = ()
+    ) -> Result:
+        if action == "list":
+            names = sorted(name for (p, name) in self.services if p == plugin)
+            header = f"=====> {plugin.capitalize()} services\n"
+            return 0, header + "".join(f"{name}\n" for name in names), ""
+
+        name = args[0] if args else ""
+        service = self.services.get((plugin, name))
+
+        if action == "exists":
+            if service is None:
+                return error(f"{plugin.capitalize()} service {name} does not exist")
+            return 0, f"Service {name} exists\n", ""
+
+        if action == "create":
+            if service is not None:
+                return error(f"{plugin.capitalize()} service {name} already exists")
+
+            self.services[(plugin, name)] = FakeService(plugin, name)
+            return 0, f"=====> {plugin.capitalize()} container created: {name}\n", ""
+
+        if service is None:
+            return error(f"{plugin.capitalize()} service {name} does not exist")
+
+        if action == "clone":
+            self.services[(plugin, args[1])] = FakeService(plugin, args[1])
+            return 0, f"=====> {plugin.capitalize()} container created\n", ""
+
+        if action == "destroy":
+            del self.services[(plugin, name)]
+            return 0, f"=====> Deleted {plugin} service {name}\n", ""
+
+        if action in ("link", "unlink"):
+            app, failure = self._app(args[1:])
+
+            if failure:
+                return failure
+
+            if action == "link":
+                service.links.add(app.name)
+                app.config["DATABASE_URL"] = self._dsn(service)
+            else:
+                service.links.discard(app.name)
+                app.config.pop("DATABASE_URL", None)
+
+            return 0, f"-----> {action.capitalize()}ed {name} to {app.name}\n", ""
+
+        if action == "links":
+            return 0, "".join(f"{link}\n" for link in sorted(service.links)), ""
+
+        if action in ("start", "stop", "restart"):
+            service.running = action != "stop"
+            return 0, f"=====> {action.capitalize()}ed {name}\n", ""
+
+        if action == "info":
+            fields = self._service_fields(service)
+
+            for flag in flags:
+                field_name = flag.lstrip("-").replace("-", " ").capitalize()
+
+                if field_name in fields:
+                    return 0, f"{fields[field_name]}\n", ""
+
+            return 0, report(f"{name} {plugin} service information", fields), ""
+
+        if action == "logs":
+            return 0, self._filler(f"{plugin}[{name}]:"), ""
+
+        if action == "export":
+            return 0, self._filler(f"-- {plugin} dump"), ""
+
+        return error(f"`{plugin}:{action}` is not a dokku command.")
+
+    def _dsn(self, service: FakeService) -> str:
+        return (
+            f"{service.plugin}://{service.plugin}:password@dokku-{service.plugin}-"
+            f"{service.name}:5432/{service.name}"
+        )
+
+    def _service_fields(self, service: FakeService) -> Dict[str, str]:
+        root = f"/var/lib/dokku/services/{service.plugin}/{service.name}"
+
+        return {
+            "Config dir": f"{root}/config",
+            "Config options": "",
+            "Data dir": f"{root}/data",
+            "Dsn": self._dsn(service),
+            "Exposed ports": "-",
+            "Id": secrets.token_hex(32),
+            "Internal ip": "172.17.0.2",
+            "Initial network": "",
+            "Links": " ".join(sorted(service.links)),
+            "Service root": root,
+            "Status": "running" if service.running else "exited",
+            "Version": f"{service.plugin}:latest",
+        }
@@ -0,0 +1,142 @@
+import logging
+import re
+from typing import List, Optional, Tuple
+
+import asyncssh
+
+from src.fake_dokku.model import FakeDokku
+
+chunk_size = 64 * 1024
+
+_dokku_line = re.compile(r'^dokku (.+?) < /dev/null 2> "\$error_file"$')
+_echo_line = re.compile(r"""^echo(?: (['"])(.*)\1)?$""")
+
+
+class FakeDokkuSSHServer(asyncssh.SSHServer):
+    """
+    SSH server that accepts every client key.
+    """
+
+    def begin_auth(self, username: str) -> bool:
+        return True
+
+    def public_key_auth_supported(self) -> bool:
+        return True
+
+    def validate_public_key(self, username: str, key: asyncssh.SSHKey) -> bool:
+        return True
+
+
+class FakeDokkuServer:
+    """
+    asyncssh server answering the commands of the API from a `FakeDokku`.
+
+    The "dokku" user runs a single dokku command, like the real forced
+    command. The "root" user runs `dokku ...` commands and the batch scripts
+    built by `run_commands_batch`, which are interpreted line by line.
+    """
+
+    def __init__(
+        self,
+        dokku: Optional[FakeDokku] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        host_key: Optional[str] = None,
+    ):
+        self.dokku = dokku or FakeDokku()
+        self.host = host
+        self.port = port
+        self.host_key = host_key
+
+        self._server: Optional[asyncssh.SSHAcceptor] = None
+
+    async def start(self) -> "FakeDokkuServer":
+        host_key = (
+            asyncssh.read_private_key(self.host_key)
+            if self.host_key
+            else asyncssh.generate_private_key("ssh-ed25519")
+        )
+        self._server = await asyncssh.create_server(
+            FakeDokkuSSHServer,
+            self.host,
+            self.port,
+            server_host_keys=[host_key],
+            process_factory=self._handle,
+            encoding=None,
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+        return self
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "FakeDokkuServer":
+        return await self.start()
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def _run(self, username: str, command: str) -> Tuple[int, str, str]:
+        if username != "root":
+            return await self.dokku.execute(command)
+
+        if command.startswith("dokku ") and "\n" not in command:
+            return await self.dokku.execute(command[len("dokku ") :])
+
+        return await self._run_script(command)
+
+    async def _run_script(self, script: str) -> Tuple[int, str, str]:
+        """
+        Interpret the shell constructs used by the batch scripts.
+        """
+        output: List[str] = []
+        status, error = 0, ""
+
+        for line in script.splitlines():
+            line = line.strip()
+
+            if dokku_match := _dokku_line.match(line):
+                status, stdout, error = await self.dokku.execute(dokku_match[1])
+                output.append(stdout)
+
+            elif echo_match := _echo_line.match(line):
+                text = echo_match[2] or ""
+
+                if echo_match[1] == '"':
+                    text = text.replace("$status", str(status))
+                output.append(f"{text}\n")
+
+            elif line == 'cat "$error_file"':
+                output.append(error)
+
+        return 0, "".join(output), ""
+
+    async def _handle(self, process: asyncssh.SSHServerProcess) -> None:
+        username = process.get_extra_info("username")
+        command = process.command or ""
+
+        try:
+            exit_status, stdout, stderr = await self._run(username, command)
+
+            stdout = stdout.encode()
+
+            for start in range(0, len(stdout), chunk_size):
+                process.stdout.write(stdout[start : start + chunk_size])
+                await process.stdout.drain()
+
+            process.stderr.write(stderr.encode())
+
+        except (asyncssh.Error, OSError) as error:
+            logging.warning(f"Fake dokku client disconnected: {error}")
+            exit_status = 1
+
+        except Exception:
+            logging.exception(f"Fake dokku failed to run: {command}")
+            process.stderr.write(b" !     Internal error\n")
+            exit_status = 1
+
+        process.exit(exit_status)
@@ -188,6 +188,27 @@ def quota_and_app_info(ctx):
         len(response_json.get("result", "")) > 0,
         "App deployment token: expected non-empty token",
     )
+    deployment_token = response_json["result"]
+
+    step("Rotating app deployment token")
+    response = requests.post(
+        ctx.base_url + f"/api/apps/{ctx.user_app}/deployment-token",
+        params={"api_key": ctx.api_key},
+        json={"access_token": ctx.user_token},
+    )
+    expect_status(response, 400, "App deployment token without rotate")
+
+    response = requests.post(
+        ctx.base_url + f"/api/apps/{ctx.user_app}/deployment-token",
+        params={"api_key": ctx.api_key, "rotate": "true"},
+        json={"access_token": ctx.user_token},
+    )
+    response_json = expect_json(response, "App deployment token rotation")
+    expect_status(response, 200, "App deployment token rotation")
+    require(
+        response_json.get("result") not in ("", None, deployment_token),
+        "App deployment token rotation: expected a new token",
+    )
 
 
 def app_config(ctx):
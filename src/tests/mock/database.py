@@ -113,12 +113,14 @@ def mock_all_models(test_func):
                     for crit in where:
                         try:
                             value = getattr(crit.right, "value", None)
-                            if value in ["test-app", "deploy123"]:
+                            if value in ["test-app", hash_access_token("deploy123")]:
                                 mock_result.scalar_one_or_none.return_value = app
+                                mock_result.one_or_none.return_value = (app, user)
                                 return mock_result
                         except Exception:
                             continue
                     mock_result.scalar_one_or_none.return_value = None
+                    mock_result.one_or_none.return_value = None
                     return mock_result
 
                 mock_result.scalar_one_or_none.return_value = None
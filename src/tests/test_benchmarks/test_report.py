@@ -0,0 +1,42 @@
+import unittest
+
+from src.benchmarks.report import compare, percentile, summarize
+
+
+class TestReport(unittest.TestCase):
+    def test_percentile(self):
+        values = [float(value) for value in range(1, 101)]
+
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 95), 95.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([3.0, 1.0, 2.0], 50), 2.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_summarize(self):
+        summary = summarize([0.01] * 10, errors=1, duration=0.5)
+
+        self.assertEqual(summary["requests"], 10)
+        self.assertEqual(summary["errors"], 1)
+        self.assertEqual(summary["throughput_rps"], 20.0)
+        self.assertEqual(summary["p99_ms"], 10.0)
+
+    def test_compare(self):
+        scenario = {"throughput_rps": 100.0, "p95_ms": 10.0, "errors": 0}
+        baseline = {"scenarios": {"apps@10": scenario}, "peak_rss_mb": 100.0}
+
+        results = {"scenarios": {"apps@10": dict(scenario)}, "peak_rss_mb": 110.0}
+        self.assertEqual(compare(results, baseline, tolerance=0.2), [])
+
+        results = {
+            "scenarios": {
+                "apps@10": {"throughput_rps": 50.0, "p95_ms": 20.0, "errors": 2},
+                "apps@100": scenario,
+            },
+            "peak_rss_mb": 150.0,
+        }
+        regressions = compare(results, baseline, tolerance=0.2)
+
+        self.assertEqual(len(regressions), 4)
+        self.assertTrue(regressions[0].startswith("apps@10: throughput"))
+        self.assertTrue(regressions[-1].startswith("peak RSS"))
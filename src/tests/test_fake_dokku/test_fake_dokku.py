@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import asyncssh
+
+from src.api.tools import ssh
+from src.fake_dokku import FakeDokku, FakeDokkuServer
+
+
+class TestFakeDokku(unittest.IsolatedAsyncioTestCase):
+    async def test_app_lifecycle(self):
+        dokku = FakeDokku()
+
+        self.assertEqual((await dokku.execute("apps:exists app-1"))[0], 1)
+        self.assertEqual((await dokku.execute("apps:create app-1"))[0], 0)
+        self.assertEqual((await dokku.execute("apps:exists app-1"))[0], 0)
+
+        await dokku.execute("config:set --no-restart app-1 KEY='some value'")
+        status, stdout, _ = await dokku.execute("config:get app-1 KEY")
+
+        self.assertEqual((status, stdout), (0, "some value\n"))
+
+        await dokku.execute("--force apps:destroy app-1")
+        _, _, stderr = await dokku.execute("apps:exists app-1")
+
+        self.assertIn("does not exist", stderr)
+
+    async def test_service_links(self):
+        dokku = FakeDokku(plugins=["postgres"])
+        dokku.seed(apps=1, services=1)
+
+        await dokku.execute("--no-restart postgres:link db_0 app-0")
+        _, links, _ = await dokku.execute("postgres:links db_0")
+        _, info, _ = await dokku.execute("postgres:info db_0")
+
+        self.assertEqual(links, "app-0\n")
+        self.assertIn("Links:", info)
+        self.assertIn("DATABASE_URL", dokku.apps["app-0"].config)
+
+    async def test_unknown_command(self):
+        status, _, stderr = await FakeDokku().execute("foo:bar")
+
+        self.assertEqual(status, 1)
+        self.assertIn("not a dokku command", stderr)
+
+
+class TestFakeDokkuServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        key_path = os.path.join(self.directory.name, "id_ed25519")
+        asyncssh.generate_private_key("ssh-ed25519").write_private_key(key_path)
+
+        self.dokku = FakeDokku(plugins=["postgres"], output_size=256 * 1024)
+        self.dokku.seed(apps=3)
+        self.server = await FakeDokkuServer(self.dokku).start()
+
+        ssh._connection_pools.clear()
+        ssh.command_cache.invalidate([])
+
+        self.patches = [
+            patch.object(ssh, "ssh_hostname", self.server.host),
+            patch.object(ssh, "ssh_port", self.server.port),
+            patch.object(ssh, "ssh_key_path", key_path),
+        ]
+        for patcher in self.patches:
+            patcher.start()
+
+    async def asyncTearDown(self):
+        await ssh.close_connection_pools()
+        await self.server.close()
+
+        for patcher in self.patches:
+            patcher.stop()
+
+        self.directory.cleanup()
+
+    async def test_commands_over_ssh(self):
+        self.assertEqual(
+            await ssh.run_command("apps:exists app-0", use_log=False), (True, "")
+        )
+        self.assertEqual(
+            await ssh.run_command("apps:exists missing", use_log=False),
+            (False, "!     App missing does not exist"),
+        )
+        self.assertEqual(
+            await ssh.run_command_as_root("version", use_log=False),
+            (True, "dokku version 0.35.0"),
+        )
+
+    async def test_batch_over_ssh(self):
+        results = await ssh.run_commands_batch(
+            ["ps:report app-0", "ps:report missing"], use_log=False
+        )
+
+        self.assertTrue(results[0][0])
+        self.assertIn("Deployed:", results[0][1])
+        self.assertEqual(results[1], (False, "!     App missing does not exist"))
+
+    async def test_stream_over_ssh(self):
+        success, stream = await ssh.start_stream("logs app-0", use_log=False)
+        size = 0
+
+        async for chunk in stream:
+            size += len(chunk)
+
+        self.assertTrue(success)
+        self.assertTrue(stream.success)
+        self.assertGreater(size, 200 * 1024)
@@ -1,14 +1,31 @@
+import datetime
 import unittest
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from fastapi.testclient import TestClient
 
 from src.api.middlewares.session import UserSessionMiddleware
+from src.api.schemas import UserSchema
+from src.api.tools import hash_access_token
+from src.api.tools.session_cache import session_cache
+
+
+def get_mock_user(access_token: str, email: str = "test@example.com") -> UserSchema:
+    return UserSchema(
+        id=1,
+        email=email,
+        access_token=hash_access_token(access_token),
+        access_token_expiration=datetime.datetime.now(datetime.timezone.utc)
+        + datetime.timedelta(days=7),
+        created_at="2023-01-01T00:00:00Z",
+    )
 
 
 class TestUserSessionMiddleware(unittest.TestCase):
     def setUp(self):
+        session_cache.invalidate()
         self.app = FastAPI()
 
         @self.app.post("/test-endpoint")
@@ -16,13 +33,20 @@ class TestUserSessionMiddleware(unittest.TestCase):
             user = request.state.session_user
             return {"user": user.email if user else None}
 
+        @self.app.post("/test-stream")
+        async def test_stream(request: Request):
+            async def chunks():
+                for index in range(3):
+                    yield f"chunk {index}\n"
+
+            return StreamingResponse(chunks(), media_type="text/plain")
+
         self.app.add_middleware(UserSessionMiddleware)
         self.client = TestClient(self.app)
 
     @patch("src.api.middlewares.session.get_user_by_access_token")
     def test_valid_access_token_sets_session_user(self, mock_get_user):
-        mock_user = type("User", (), {"email": "test@example.com"})
-        mock_get_user.return_value = mock_user
+        mock_get_user.return_value = get_mock_user("validtoken")
 
         response = self.client.post(
             "/test-endpoint", json={"access_token": "validtoken"}
@@ -33,6 +57,42 @@ class TestUserSessionMiddleware(unittest.TestCase):
         mock_get_user.assert_awaited_once()
         self.assertEqual(mock_get_user.await_args.args[0], "validtoken")
 
+    @patch("src.api.models.session.AsyncSessionLocal")
+    @patch("src.api.middlewares.session.get_user_by_access_token")
+    def test_lookup_transaction_is_ended(self, mock_get_user, mock_sessionmaker):
+        mock_get_user.return_value = get_mock_user("validtoken")
+        db_session = mock_sessionmaker.return_value = AsyncMock()
+
+        response = self.client.post(
+            "/test-endpoint", headers={"Authorization": "Bearer validtoken"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(mock_get_user.await_args.args[1], db_session)
+        db_session.rollback.assert_awaited_once()
+
+    @patch("src.api.middlewares.session.get_user_by_access_token")
+    def test_session_user_is_cached_until_invalidated(self, mock_get_user):
+        mock_get_user.return_value = get_mock_user("validtoken")
+
+        for _ in range(3):
+            response = self.client.post(
+                "/test-endpoint", json={"access_token": "validtoken"}
+            )
+            self.assertEqual(response.json()["user"], "test@example.com")
+
+        mock_get_user.assert_awaited_once()
+
+        mock_get_user.return_value = get_mock_user("validtoken", "new@example.com")
+        session_cache.invalidate(["test@example.com"])
+
+        response = self.client.post(
+            "/test-endpoint", json={"access_token": "validtoken"}
+        )
+
+        self.assertEqual(response.json()["user"], "new@example.com")
+        self.assertEqual(mock_get_user.await_count, 2)
+
     @patch("src.api.middlewares.session.get_user_by_access_token")
     def test_invalid_access_token_returns_401(self, mock_get_user):
         mock_get_user.side_effect = HTTPException(
@@ -46,6 +106,34 @@ class TestUserSessionMiddleware(unittest.TestCase):
         self.assertEqual(response.status_code, 401)
         self.assertEqual(response.json(), {"detail": "Invalid token"})
 
+    @patch("src.api.middlewares.session.get_user_by_access_token")
+    def test_bearer_access_token_sets_session_user(self, mock_get_user):
+        mock_get_user.return_value = get_mock_user("headertoken")
+
+        response = self.client.post(
+            "/test-endpoint",
+            headers={"Authorization": "Bearer headertoken"},
+            json={"access_token": "bodytoken"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user"], "test@example.com")
+        self.assertEqual(mock_get_user.await_args.args[0], "headertoken")
+
+    @patch("src.api.middlewares.session.get_user_by_access_token")
+    def test_body_is_passed_downstream(self, mock_get_user):
+        mock_get_user.return_value = get_mock_user("validtoken")
+
+        @self.app.post("/test-echo")
+        async def test_echo(request: Request):
+            return await request.json()
+
+        payload = {"access_token": "validtoken", "data": "x" * 100000}
+        response = self.client.post("/test-echo", json=payload)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), payload)
+
     def test_invalid_json_body_does_not_crash(self):
         headers = {"Content-Type": "application/json"}
         response = self.client.post("/test-endpoint", data="not json", headers=headers)
@@ -61,3 +149,9 @@ class TestUserSessionMiddleware(unittest.TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"user": None})
+
+    def test_streaming_response_with_json_body(self):
+        response = self.client.post("/test-stream", json={"key": "value"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "chunk 0\nchunk 1\nchunk 2\n")
@@ -0,0 +1,62 @@
+import unittest
+
+from sqlalchemy import create_engine, inspect, text
+
+from src.api.models.base import Base
+from src.api.models.migrations import MIGRATIONS, run_migrations
+from src.api.tools import hash_access_token
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+
+    def get_indexes(self, connection, table_name):
+        return {index["name"] for index in inspect(connection).get_indexes(table_name)}
+
+    def test_migrate_existing_install(self):
+        with self.engine.begin() as connection:
+            connection.execute(
+                text(
+                    "CREATE TABLE app (name VARCHAR(255) PRIMARY KEY, "
+                    "deploy_token VARCHAR(1024), user_email VARCHAR(255), "
+                    "created_at DATETIME)"
+                )
+            )
+            connection.execute(
+                text("INSERT INTO app VALUES ('app', 'app-token', 'a@a.com', NULL)")
+            )
+            Base.metadata.create_all(connection)
+
+            self.assertEqual(
+                run_migrations(connection), [version for version, *_ in MIGRATIONS]
+            )
+            self.assertEqual(run_migrations(connection), [])
+
+            columns = {
+                column["name"] for column in inspect(connection).get_columns("app")
+            }
+            deploy_token_hash = connection.execute(
+                text("SELECT deploy_token_hash FROM app")
+            ).scalar()
+
+            self.assertNotIn("deploy_token", columns)
+            self.assertEqual(deploy_token_hash, hash_access_token("app-token"))
+            self.assertIn(
+                "ix_app_deploy_token_hash", self.get_indexes(connection, "app")
+            )
+            self.assertIn("ix_app_user_email_name", self.get_indexes(connection, "app"))
+            self.assertIn(
+                "ix_command_history_created_at",
+                self.get_indexes(connection, "command_history"),
+            )
+
+    def test_migrate_new_install(self):
+        with self.engine.begin() as connection:
+            Base.metadata.create_all(connection)
+            indexes = self.get_indexes(connection, "user")
+
+            run_migrations(connection)
+
+            self.assertEqual(self.get_indexes(connection, "user"), indexes)
+            self.assertIn("ix_user_take_over_access_token", indexes)
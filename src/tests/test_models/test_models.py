@@ -1,18 +1,41 @@
+import asyncio
+import datetime
 import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from fastapi import HTTPException
+from sqlalchemy import create_engine, exc
+from sqlalchemy.orm import Session
+from sqlalchemy.util import greenlet_spawn
 
 from src.api.models import (
+    App,
+    CommandHistory,
+    create_app_deployment_token,
+    create_resource,
     create_take_over_access_token,
     create_user,
     delete_user,
     get_app_by_deploy_token,
-    get_app_deployment_token,
+    get_resource_cursor,
     get_user,
     get_user_by_access_token,
     get_users,
+    log_command,
+    open_db_session,
+    prune_command_history,
+    request_session_scope,
     update_user,
 )
+from src.api.models.base import Base
+from src.api.models.session import MeasuredQueuePool
+from src.api.models.tools import (
+    get_command_history_cursor,
+    get_command_history_query,
+    get_resources_query,
+    serialize_resource,
+)
+from src.api.tools import hash_access_token
 from src.tests.mock import MockUser, mock_all_models
 
 
@@ -68,7 +91,7 @@ class TestDatabaseModels(unittest.IsolatedAsyncioTestCase):
     @mock_all_models
     async def test_get_app_by_deploy_token(self, app, mock_session, **kwargs):
         result_app, result_user = await get_app_by_deploy_token(
-            app.deploy_token,
+            "deploy123",
             mock_session,
         )
         self.assertEqual(result_app.name, app.name)
@@ -82,9 +105,25 @@ class TestDatabaseModels(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(context.exception.status_code, 404)
 
     @mock_all_models
-    async def test_get_app_deployment_token(self, app, mock_session, **kwargs):
-        token = await get_app_deployment_token(app.name, mock_session)
-        self.assertEqual(token, app.deploy_token)
+    async def test_create_app_deployment_token(self, app, mock_session, **kwargs):
+        token = await create_app_deployment_token(app.name, mock_session, rotate=True)
+
+        self.assertTrue(token.startswith(f"{app.name}-"))
+        self.assertEqual(app.deploy_token_hash, hash_access_token(token))
+        mock_session.commit.assert_awaited_once()
+
+    @mock_all_models
+    async def test_deployment_token_is_not_rotated_implicitly(
+        self, app, mock_session, **kwargs
+    ):
+        token_hash = app.deploy_token_hash
+
+        with self.assertRaises(HTTPException) as context:
+            await create_app_deployment_token(app.name, mock_session)
+
+        self.assertEqual(context.exception.status_code, 400)
+        self.assertEqual(app.deploy_token_hash, token_hash)
+        mock_session.commit.assert_not_awaited()
 
     @mock_all_models
     async def test_create_take_over_access_token(self, user, mock_session, **kwargs):
@@ -98,3 +137,249 @@ class TestDatabaseModels(unittest.IsolatedAsyncioTestCase):
 
         self.assertIsNotNone(user.take_over_access_token)
         self.assertIsNotNone(user.take_over_access_token_expiration)
+
+
+class TestRequestSession(unittest.IsolatedAsyncioTestCase):
+    @patch("src.api.models.session.AsyncSessionLocal")
+    async def test_request_shares_one_session(self, mock_sessionmaker):
+        mock_sessionmaker.side_effect = lambda: AsyncMock()
+
+        async def get_session():
+            async with open_db_session() as db_session:
+                return db_session
+
+        async with request_session_scope() as request_session:
+            self.assertFalse(request_session.opened)
+
+            first_session = await get_session()
+            second_session = await get_session()
+
+            self.assertIs(first_session, second_session)
+
+            # Tasks spawned by the request do not share it.
+            task_session = await asyncio.create_task(get_session())
+            self.assertIsNot(task_session, first_session)
+
+        first_session.close.assert_awaited_once()
+        self.assertFalse(request_session.opened)
+        self.assertEqual(mock_sessionmaker.call_count, 2)
+
+    @patch("src.api.models.session.AsyncSessionLocal")
+    async def test_request_session_is_lazy(self, mock_sessionmaker):
+        async with request_session_scope():
+            pass
+
+        mock_sessionmaker.assert_not_called()
+
+
+class TestMeasuredQueuePool(unittest.IsolatedAsyncioTestCase):
+    async def test_checkout_stats(self):
+        pool = MeasuredQueuePool(
+            creator=MagicMock, pool_size=1, max_overflow=0, timeout=0.05
+        )
+
+        def checkout():
+            connection = pool.connect()
+
+            with self.assertRaises(exc.TimeoutError):
+                pool.connect()
+
+            connection.close()
+
+        await greenlet_spawn(checkout)
+
+        self.assertEqual(pool.checkouts, 2)
+        self.assertEqual(pool.timeouts, 1)
+        self.assertGreaterEqual(pool.max_wait, 0.05)
+        self.assertEqual(pool.checkedin(), 1)
+
+
+class TestCreateResource(unittest.IsolatedAsyncioTestCase):
+    def get_session(self, quota, used, existing):
+        user_result, count_result = MagicMock(), MagicMock()
+        user_result.one_or_none.return_value = (MockUser.email, quota)
+        count_result.one.return_value = (used, existing)
+
+        session = AsyncMock()
+        session.add = MagicMock()
+        session.execute.side_effect = [user_result, count_result]
+
+        return session
+
+    async def test_create_resource(self):
+        session = self.get_session(quota=2, used=1, existing=0)
+
+        await create_resource(MockUser.email, "new-app", App, session)
+
+        statement = session.execute.await_args_list[0].args[0]
+        self.assertIsNotNone(statement._for_update_arg)
+
+        self.assertEqual(session.add.call_args.args[0].name, "new-app")
+        session.commit.assert_awaited_once()
+
+    async def test_create_resource_quota_exceeded(self):
+        session = self.get_session(quota=1, used=1, existing=0)
+
+        with self.assertRaises(HTTPException) as context:
+            await create_resource(MockUser.email, "new-app", App, session)
+
+        self.assertEqual(context.exception.status_code, 403)
+        session.add.assert_not_called()
+        session.rollback.assert_awaited_once()
+
+    async def test_create_resource_already_exists(self):
+        session = self.get_session(quota=5, used=1, existing=1)
+
+        with self.assertRaises(HTTPException) as context:
+            await create_resource(MockUser.email, "new-app", App, session)
+
+        self.assertEqual(context.exception.status_code, 400)
+
+
+class TestResourcesKeyset(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+
+        created_at = datetime.datetime(2024, 1, 1)
+        self.session = Session(engine)
+        self.session.add_all(
+            App(name, user_email=MockUser.email, created_at=created_at)
+            for name in "abc"
+        )
+        self.session.add(
+            App(
+                "d",
+                user_email=MockUser.email,
+                created_at=created_at + datetime.timedelta(1),
+            )
+        )
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+
+    def get_names(self, asc_created_at, cursor=None):
+        query = get_resources_query(App, asc_created_at, cursor)
+        return [app.name for app in self.session.scalars(query)]
+
+    def test_pages_follow_cursor(self):
+        for asc_created_at, names in ((True, "abcd"), (False, "dcba")):
+            pages, cursor = [], None
+
+            for _ in names:
+                page = self.get_names(asc_created_at, cursor)[:1]
+                pages.extend(page)
+
+                app = self.session.get(App, page[0])
+                cursor = get_resource_cursor(serialize_resource(app))
+
+            self.assertEqual(pages, list(names))
+            self.assertEqual(self.get_names(asc_created_at, cursor), [])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(HTTPException) as context:
+            get_resources_query(App, True, "not-a-cursor")
+
+        self.assertEqual(context.exception.status_code, 400)
+
+
+class TestCommandHistory(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+
+        created_at = datetime.datetime(2024, 1, 1)
+        self.session = Session(engine)
+        self.session.add_all(
+            [
+                CommandHistory(
+                    id=1,
+                    command="dokku apps:list",
+                    username="root",
+                    created_at=created_at,
+                ),
+                CommandHistory(
+                    id=2,
+                    command="apps:create a",
+                    username="dokku",
+                    created_at=created_at,
+                ),
+                CommandHistory(
+                    id=3,
+                    command="dokku postgres:list",
+                    username="root",
+                    created_at=created_at + datetime.timedelta(1),
+                ),
+            ]
+        )
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+
+    def get_ids(self, **filters):
+        query = get_command_history_query(**filters)
+        return [record.id for record in self.session.scalars(query)]
+
+    def test_filters(self):
+        self.assertEqual(self.get_ids(), [3, 2, 1])
+        self.assertEqual(self.get_ids(username="root"), [3, 1])
+        self.assertEqual(self.get_ids(subcommand="apps:"), [2, 1])
+        self.assertEqual(self.get_ids(subcommand="dokku postgres"), [3])
+        self.assertEqual(self.get_ids(subcommand="apps_"), [])
+        self.assertEqual(
+            self.get_ids(since=datetime.datetime(2024, 1, 2)),
+            [3],
+        )
+        self.assertEqual(
+            self.get_ids(until=datetime.datetime(2024, 1, 2)),
+            [2, 1],
+        )
+
+    def test_aware_dates_are_compared_in_utc(self):
+        timezone = datetime.timezone(datetime.timedelta(hours=2))
+
+        self.assertEqual(
+            self.get_ids(since=datetime.datetime(2024, 1, 2, 2, tzinfo=timezone)),
+            [3],
+        )
+        self.assertEqual(
+            self.get_ids(until=datetime.datetime(2024, 1, 2, 2, tzinfo=timezone)),
+            [2, 1],
+        )
+
+    def test_cursor(self):
+        cursor = get_command_history_cursor(self.session.get(CommandHistory, 2))
+        self.assertEqual(self.get_ids(cursor=cursor), [1])
+
+
+class TestLogCommand(unittest.IsolatedAsyncioTestCase):
+    async def test_created_at_is_utc(self):
+        db_session = MagicMock(commit=AsyncMock())
+
+        await log_command("dokku apps:list", "dokku", db_session)
+
+        record = db_session.add.call_args.args[0]
+        self.assertEqual(record.created_at.tzinfo, datetime.timezone.utc)
+
+
+class TestPruneCommandHistory(unittest.IsolatedAsyncioTestCase):
+    async def test_prune_by_batches(self):
+        results = []
+
+        for ids in ([1, 2], [3]):
+            result = MagicMock()
+            result.scalars.return_value.all.return_value = ids
+            results.extend([result, MagicMock()])
+
+        session = AsyncMock()
+        session.execute.side_effect = results
+
+        deleted = await prune_command_history(
+            datetime.timedelta(days=1), session, batch_size=2
+        )
+
+        self.assertEqual(deleted, 3)
+        self.assertEqual(session.execute.await_count, 4)
+        self.assertEqual(session.commit.await_count, 2)
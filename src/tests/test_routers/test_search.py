@@ -0,0 +1,62 @@
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.routers.search import (
+    MAX_SEARCH_LIMIT,
+    get_match_quality,
+    get_router,
+    rank_matches,
+)
+
+
+class TestSearchRanking(unittest.TestCase):
+    def test_match_quality(self):
+        self.assertEqual(get_match_quality("app", "app"), 0)
+        self.assertEqual(get_match_quality("app", "app-1"), 1)
+        self.assertEqual(get_match_quality("app", "my-app"), 2)
+        self.assertEqual(get_match_quality("app", "happy"), 3)
+        self.assertIsNone(get_match_quality("app", "api"))
+
+    def test_rank_matches(self):
+        candidates = [
+            (name.upper(), name, [name])
+            for name in ["happy", "my-app", "app-10", "app-2", "app", "api"]
+        ]
+
+        self.assertEqual(
+            rank_matches("app", candidates),
+            [
+                ("APP", "app"),
+                ("APP-2", "app-2"),
+                ("APP-10", "app-10"),
+                ("MY-APP", "my-app"),
+                ("HAPPY", "happy"),
+            ],
+        )
+
+    def test_rank_matches_on_any_text(self):
+        candidates = [
+            (("a@example.com", "web"), "a@example.com:web", ["a@example.com", "web"])
+        ]
+
+        self.assertEqual(len(rank_matches("web", candidates)), 1)
+        self.assertEqual(len(rank_matches("example", candidates)), 1)
+        self.assertEqual(rank_matches("api", candidates), [])
+
+
+class TestSearchPagination(unittest.TestCase):
+    def setUp(self):
+        app = FastAPI()
+        app.include_router(get_router(app))
+        self.client = TestClient(app)
+
+    def test_invalid_pages_are_rejected(self):
+        for params in [
+            {"offset": -1},
+            {"limit": 0},
+            {"limit": MAX_SEARCH_LIMIT + 1},
+        ]:
+            response = self.client.post("/", params={"q": "app", **params})
+            self.assertEqual(response.status_code, 422, params)
@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import patch
+
+from src.api.schemas import UserSchema
+from src.config import Config
+
+
+def get_user(**kwargs) -> UserSchema:
+    return UserSchema(
+        id=7,
+        email="test@example.com",
+        access_token="hash",
+        created_at="2023-01-01T00:00:00Z",
+        **kwargs,
+    )
+
+
+class TestUserSchema(unittest.TestCase):
+    def test_indexes(self):
+        user = get_user(
+            apps=["app-1", "app-2"],
+            services=["postgres:db-1", "redis:cache", "postgres:db-2"],
+            networks=["net"],
+            shared_apps=[("a@example.com", "x"), ("a@example.com", "y")],
+        )
+
+        self.assertEqual(user.app_set, frozenset({"app-1", "app-2"}))
+        self.assertIn("redis:cache", user.service_set)
+        self.assertIn("net", user.network_set)
+        self.assertIn(("a@example.com", "y"), user.shared_app_set)
+        self.assertEqual(
+            user.shared_apps_by_author, {"a@example.com": frozenset({"x", "y"})}
+        )
+        self.assertEqual(
+            user.services_by_plugin,
+            {
+                "postgres": {"postgres:db-1": "db-1", "postgres:db-2": "db-2"},
+                "redis": {"redis:cache": "cache"},
+            },
+        )
+
+    @patch.object(Config, "API_USE_PER_USER_RESOURCE_NAMES", True)
+    def test_normalized_names(self):
+        user = get_user(apps=["7-app"], services=["postgres:7-db"], networks=["7-net"])
+
+        self.assertEqual(user.normalized_apps, {"7-app": "app"})
+        self.assertEqual(user.normalized_services, {"postgres:7-db": "db"})
+        self.assertEqual(user.normalized_networks, {"7-net": "net"})
+
+    def test_indexes_follow_changes(self):
+        user = get_user(apps=["app-1"])
+        copy = user.copy()
+
+        self.assertIn("app-1", user.app_set)
+
+        user.apps = ["app-2"]
+
+        self.assertEqual(user.app_set, frozenset({"app-2"}))
+        self.assertEqual(copy.app_set, frozenset({"app-1"}))
+
+    def test_json_shape(self):
+        user = get_user(apps=["app-1"], shared_apps=[("a@example.com", "x")])
+        user.app_set
+
+        data = user.dict()
+
+        self.assertEqual(data["apps"], ["app-1"])
+        self.assertEqual(data["shared_apps"], [("a@example.com", "x")])
+        self.assertNotIn("_indexes", data)
@@ -0,0 +1,164 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from src.api.schemas import UserSchema
+from src.api.services import AppService, DatabaseService
+from src.api.services.apps import (
+    get_apps_network,
+    get_apps_report,
+    parse_ps_report,
+    parse_ps_reports,
+)
+from src.api.services.networks import NetworkService
+from src.api.tools import ssh
+from src.api.tools.cache import CommandCache
+from src.config import Config
+from src.fake_dokku import FakeDokku
+
+
+class TestAppsReports(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dokku = FakeDokku(plugins=["postgres"])
+
+        for app_name in ("1-app", "2-app"):
+            await self.dokku.execute(f"apps:create {app_name}")
+
+        await self.dokku.execute("ps:rebuild 1-app")
+        await self.dokku.execute("network:create 1-net")
+        await self.dokku.execute("network:set 1-app attach-post-create 1-net")
+        await self.dokku.execute("postgres:create db")
+        await self.dokku.execute("postgres:create other")
+        await self.dokku.execute("--no-restart postgres:link db 1-app")
+
+        ssh.command_cache.invalidate([])
+
+    async def run_command(self, command: str):
+        exit_status, stdout, stderr = await self.dokku.execute(command)
+        return exit_status == 0, stdout or stderr
+
+    async def run_commands_batch(self, commands):
+        return [await self.run_command(command) for command in commands]
+
+    async def run_batch(self, commands, use_log):
+        return await self.run_commands_batch(commands)
+
+    async def execute_command(self, command, username, use_log=True, dry_run=False):
+        return await self.run_command(command)
+
+    def patch_ssh(self, run_batch):
+        """
+        Run the SSH commands on the fake Dokku, through the command cache.
+        """
+        return (
+            patch.object(Config, "AVAILABLE_DATABASES", ["postgres"]),
+            patch("src.api.tools.ssh._run_batch", run_batch),
+            patch("src.api.tools.ssh.__execute_command", self.execute_command),
+        )
+
+    async def test_parse_ps_reports(self):
+        _, report, _ = await self.dokku.execute("ps:report")
+        _, app_report, _ = await self.dokku.execute("ps:report 1-app")
+
+        reports = parse_ps_reports(report)
+
+        self.assertEqual(list(reports), ["1-app", "2-app"])
+        self.assertEqual(reports["1-app"], parse_ps_report(app_report))
+        self.assertEqual(reports["1-app"]["running"], "true")
+        self.assertEqual(parse_ps_reports(""), {})
+
+    async def test_get_apps_report(self):
+        _, report, _ = await self.dokku.execute("ps:report")
+
+        run_command = AsyncMock(return_value=(True, report))
+        get_apps_info = AsyncMock(return_value=[None])
+
+        with (
+            patch("src.api.services.apps.run_command", run_command),
+            patch("src.api.services.apps.get_apps_info", get_apps_info),
+        ):
+            results = await get_apps_report(["2-app", "3-app"])
+
+        run_command.assert_awaited_once_with("ps:report")
+        get_apps_info.assert_awaited_once_with(["3-app"])
+
+        self.assertEqual(results[0][1]["info_origin"], "report")
+        self.assertEqual(results[0][1]["data"]["running"], "false")
+        self.assertIsNone(results[1])
+
+    async def test_get_apps_network(self):
+        user = UserSchema(
+            id=1,
+            email="test@example.com",
+            access_token="hash",
+            created_at="2023-01-01T00:00:00Z",
+            apps=["1-app", "2-app"],
+            networks=["1-net"],
+        )
+        run_command = AsyncMock(side_effect=self.run_command)
+
+        with (
+            patch("src.api.services.apps.run_command", run_command),
+            patch("src.api.services.apps.run_commands_batch", self.run_commands_batch),
+        ):
+            networks = await get_apps_network(user, ["1-app", "2-app", "3-app"])
+            _, linked_apps = await NetworkService.get_linked_apps(user, "1-net")
+
+        self.assertEqual(networks["1-app"], (True, {"network": "1-net"}))
+        self.assertEqual(networks["2-app"], (True, {"network": None}))
+        self.assertFalse(networks["3-app"][0])
+        self.assertEqual(linked_apps, ["1-app"])
+        self.assertEqual(
+            [call.args[0] for call in run_command.await_args_list],
+            ["network:report", "network:report"],
+        )
+
+    async def test_linked_databases(self):
+        user = UserSchema(
+            id=1,
+            email="test@example.com",
+            access_token="hash",
+            created_at="2023-01-01T00:00:00Z",
+            apps=["1-app", "2-app"],
+            services=["postgres:db", "postgres:other"],
+        )
+        run_batch = AsyncMock(side_effect=self.run_batch)
+        config_patch, batch_patch, execute_patch = self.patch_ssh(run_batch)
+
+        with config_patch, batch_patch, execute_patch:
+            _, linked = await AppService.get_linked_databases(user, "1-app")
+            _, not_linked = await AppService.get_linked_databases(user, "2-app")
+
+            self.assertEqual(linked, {"postgres": ["db"]})
+            self.assertEqual(not_linked, {})
+            run_batch.assert_awaited_once()
+
+            await DatabaseService.unlink_database(user, "postgres", "db", "1-app")
+            _, linked = await AppService.get_linked_databases(user, "1-app")
+
+            self.assertEqual(linked, {})
+            self.assertEqual(
+                run_batch.await_args_list[-1].args[0], ["postgres:links db"]
+            )
+
+    async def test_linked_databases_without_cache(self):
+        user = UserSchema(
+            id=1,
+            email="test@example.com",
+            access_token="hash",
+            created_at="2023-01-01T00:00:00Z",
+            apps=["1-app"],
+            services=["postgres:db", "postgres:other"],
+        )
+
+        run_batch = AsyncMock(side_effect=self.run_batch)
+        config_patch, batch_patch, execute_patch = self.patch_ssh(run_batch)
+
+        with (
+            config_patch,
+            batch_patch,
+            execute_patch,
+            patch.object(ssh, "command_cache", CommandCache(ttl=0, max_entries=0)),
+        ):
+            _, linked = await AppService.get_linked_databases(user, "1-app")
+
+        self.assertEqual(linked, {"postgres": ["db"]})
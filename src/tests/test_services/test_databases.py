@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import patch
+
+from src.api.schemas import UserSchema
+from src.api.services import DatabaseService
+from src.api.tools import ssh
+from src.fake_dokku import FakeDokku
+
+
+class TestListAllDatabases(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dokku = FakeDokku(plugins=["postgres", "redis"])
+
+        await self.dokku.execute("apps:create app")
+        await self.dokku.execute("postgres:create db")
+        await self.dokku.execute("redis:create cache")
+        await self.dokku.execute("--no-restart postgres:link db app")
+
+        self.user = UserSchema(
+            id=1,
+            email="test@example.com",
+            access_token="hash",
+            created_at="2023-01-01T00:00:00Z",
+            apps=["app"],
+            services=["postgres:db", "postgres:deleted", "redis:cache"],
+        )
+        ssh.command_cache.invalidate([])
+
+    async def run_command(self, command: str):
+        exit_status, stdout, stderr = await self.dokku.execute(command)
+        return exit_status == 0, stdout or stderr
+
+    async def run_commands_batch(self, commands):
+        return [await self.run_command(command) for command in commands]
+
+    async def list_all_databases(self, **kwargs):
+        with (
+            patch(
+                "src.api.services.databases.Config.AVAILABLE_DATABASES",
+                ["postgres", "redis", "mysql"],
+            ),
+            patch(
+                "src.api.services.databases.available_databases",
+                ["postgres", "redis", "mysql"],
+            ),
+            patch(
+                "src.api.services.databases.run_commands_batch", self.run_commands_batch
+            ),
+        ):
+            return await DatabaseService.list_all_databases(self.user, **kwargs)
+
+    async def test_list_all_databases(self):
+        _, result = await self.list_all_databases()
+
+        self.assertEqual(list(result), ["postgres", "redis"])
+        self.assertIsNone(result["postgres"]["deleted"])
+        self.assertEqual(result["postgres"]["db"]["links"], "app")
+        self.assertEqual(result["redis"]["cache"]["plugin_name"], "redis")
+        self.assertNotIn("postgres:info deleted", self.dokku.executed)
+
+    async def test_list_all_databases_lightweight(self):
+        _, result = await self.list_all_databases(lightweight=True)
+
+        self.assertEqual(
+            result["postgres"]["db"],
+            {
+                "status": "running",
+                "version": "postgres:latest",
+                "links": "app",
+                "plugin_name": "postgres",
+            },
+        )
+        self.assertIsNone(result["postgres"]["deleted"])
+        self.assertNotIn("postgres:info db", self.dokku.executed)
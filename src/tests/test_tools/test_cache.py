@@ -0,0 +1,100 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from src.api.tools import ssh
+from src.api.tools.cache import MUTATE, NEUTRAL, READ, CommandCache, classify_command
+from src.config import Config
+
+
+class TestClassifyCommand(unittest.TestCase):
+    @patch.object(Config, "AVAILABLE_DATABASES", ["postgres"])
+    def test_read_commands(self):
+        self.assertEqual(classify_command("ps:report app-1"), (READ, ["app-1"]))
+        self.assertEqual(classify_command("postgres:info db-1"), (READ, ["db-1"]))
+        self.assertEqual(classify_command("ps:report"), (READ, []))
+
+    def test_mutating_commands(self):
+        self.assertEqual(classify_command("ps:stop app-1"), (MUTATE, ["app-1"]))
+        self.assertEqual(
+            classify_command("postgres:link db-1 app-1"), (MUTATE, ["db-1", "app-1"])
+        )
+        self.assertEqual(classify_command("config:set --global KEY=1"), (MUTATE, []))
+
+    def test_app_removal_affects_every_resource(self):
+        # The links of the services are changed with the app.
+        self.assertEqual(classify_command("--force apps:destroy app-1"), (MUTATE, []))
+        self.assertEqual(classify_command("apps:rename app-1 app-2"), (MUTATE, []))
+
+    def test_neutral_commands(self):
+        self.assertEqual(classify_command("logs app-1 -n 10"), (NEUTRAL, []))
+        self.assertEqual(classify_command("apps:exists app-1"), (NEUTRAL, []))
+
+
+class TestCommandCache(unittest.TestCase):
+    def test_entries_expire(self):
+        cache = CommandCache(ttl=10, max_entries=10)
+        cache.set("ps:report app", "app", (True, "report"), cache.version("app"))
+
+        self.assertEqual(cache.get("ps:report app"), (True, "report"))
+        self.assertIsNone(cache.get("ps:report app", max_staleness=0))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = CommandCache(ttl=10, max_entries=2)
+
+        for name in ["a", "b"]:
+            cache.set(f"ps:report {name}", name, (True, name), cache.version(name))
+
+        cache.get("ps:report a")
+        cache.set("ps:report c", "c", (True, "c"), cache.version("c"))
+
+        self.assertIsNotNone(cache.get("ps:report a"))
+        self.assertIsNone(cache.get("ps:report b"))
+
+    def test_invalidation_is_per_resource(self):
+        cache = CommandCache(ttl=10, max_entries=10)
+
+        for name in ["a", "b"]:
+            cache.set(f"ps:report {name}", name, (True, name), cache.version(name))
+
+        cache.invalidate(["a"])
+
+        self.assertIsNone(cache.get("ps:report a"))
+        self.assertEqual(cache.get("ps:report b"), (True, "b"))
+
+    def test_stale_read_is_not_stored(self):
+        cache = CommandCache(ttl=10, max_entries=10)
+        version = cache.version("a")
+
+        cache.invalidate(["a"])
+        cache.set("ps:report a", "a", (True, "old"), version)
+
+        self.assertIsNone(cache.get("ps:report a"))
+
+
+class TestCachedCommands(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        ssh.command_cache.invalidate([])
+
+    async def test_mutation_invalidates_cached_read(self):
+        execute = AsyncMock(
+            side_effect=[(True, "running"), (True, ""), (True, "stopped")]
+        )
+
+        with patch("src.api.tools.ssh.__execute_command", execute):
+            first = await ssh.run_command("ps:report app-1", use_log=False)
+            cached = await ssh.run_command("ps:report app-1", use_log=False)
+            await ssh.run_command("ps:stop app-1", use_log=False)
+            fresh = await ssh.run_command("ps:report app-1", use_log=False)
+
+        self.assertEqual(first, cached)
+        self.assertEqual(fresh, (True, "stopped"))
+        self.assertEqual(execute.await_count, 3)
+
+    async def test_cache_can_be_bypassed(self):
+        execute = AsyncMock(return_value=(True, "report"))
+
+        with patch("src.api.tools.ssh.__execute_command", execute):
+            await ssh.run_command("ps:report app-1", use_log=False)
+            await ssh.run_command("ps:report app-1", use_log=False, use_cache=False)
+
+        self.assertEqual(execute.await_count, 2)
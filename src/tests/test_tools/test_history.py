@@ -0,0 +1,73 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from src.api.tools.history import DROP_NEWEST, DROP_OLDEST, CommandHistoryWriter
+
+
+class TestCommandHistoryWriter(unittest.IsolatedAsyncioTestCase):
+    async def test_records_are_written_in_bulk(self):
+        writer = CommandHistoryWriter(batch_size=3, flush_interval=1000, max_queued=10)
+
+        with patch("src.api.tools.history._write_records", AsyncMock()) as write:
+            writer.start()
+
+            for index in range(3):
+                await writer.record(f"ps:report app-{index}", "dokku")
+
+            await asyncio.sleep(0.01)
+            await writer.stop()
+
+        write.assert_awaited_once()
+        self.assertEqual(
+            [command for command, _, _ in write.await_args.args[0]],
+            ["ps:report app-0", "ps:report app-1", "ps:report app-2"],
+        )
+
+    async def test_records_are_flushed_after_interval(self):
+        writer = CommandHistoryWriter(batch_size=100, flush_interval=10, max_queued=10)
+
+        with patch("src.api.tools.history._write_records", AsyncMock()) as write:
+            writer.start()
+            await writer.record("apps:list", "dokku")
+            await asyncio.sleep(0.05)
+
+            self.assertEqual(write.await_count, 1)
+            await writer.stop()
+
+        self.assertEqual(writer.written, 1)
+
+    async def test_stop_flushes_queued_records(self):
+        writer = CommandHistoryWriter(
+            batch_size=100, flush_interval=60000, max_queued=10
+        )
+
+        with patch("src.api.tools.history._write_records", AsyncMock()) as write:
+            writer.start()
+            await writer.record("apps:list", "dokku")
+            await writer.stop()
+
+        write.assert_awaited_once()
+        self.assertFalse(writer.running)
+
+    async def test_full_queue_drops_records(self):
+        for policy, expected in [(DROP_NEWEST, "cmd-0"), (DROP_OLDEST, "cmd-2")]:
+            writer = CommandHistoryWriter(1, 60000, max_queued=1, drop_policy=policy)
+            write = AsyncMock()
+
+            with patch("src.api.tools.history._write_records", write):
+                writer.start()
+
+                # Not awaited in between, so the background task has not
+                # consumed any record yet.
+                for index in range(3):
+                    await writer.record(f"cmd-{index}", "dokku")
+
+                self.assertEqual(writer.dropped, 2)
+                await writer.stop()
+
+            self.assertEqual(write.await_args_list[0].args[0][0][0], expected)
+
+    def test_invalid_drop_policy(self):
+        with self.assertRaises(ValueError):
+            CommandHistoryWriter(1, 1, 1, drop_policy="invalid")
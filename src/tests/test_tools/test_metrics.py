@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.api.tools import metrics, ssh
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counter_render(self):
+        counter = metrics.Counter("requests_total", "Requests.", ("status",))
+        counter.inc(status="ok")
+        counter.inc(2, status='fail"ed')
+
+        self.assertEqual(
+            counter.render().splitlines(),
+            [
+                "# HELP requests_total Requests.",
+                "# TYPE requests_total counter",
+                'requests_total{status="fail\\"ed"} 2',
+                'requests_total{status="ok"} 1',
+            ],
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram("latency", "Latency.", buckets=(0.1, 1))
+
+        for value in [0.05, 0.1, 0.5, 2]:
+            histogram.observe(value)
+
+        self.assertEqual(
+            histogram.samples(),
+            [
+                'latency_bucket{le="0.1"} 2',
+                'latency_bucket{le="1"} 3',
+                'latency_bucket{le="+Inf"} 4',
+                "latency_sum 2.65",
+                "latency_count 4",
+            ],
+        )
+
+    def test_query_operation(self):
+        self.assertEqual(metrics.get_query_operation(" select * from user"), "SELECT")
+        self.assertEqual(metrics.get_query_operation("PRAGMA x"), "OTHER")
+
+
+class TestCommandMetrics(unittest.IsolatedAsyncioTestCase):
+    async def test_commands_are_observed_by_subcommand(self):
+        result = MagicMock(exit_status=0, stdout="ok", stderr="")
+        count = metrics.ssh_command_duration.get_count(subcommand="network:list")
+        failures = metrics.ssh_commands.get(subcommand="network:list", status="failure")
+
+        with patch("src.api.tools.ssh._run_on_pool", return_value=result):
+            await ssh.run_command("network:list", use_log=False)
+
+        with patch("src.api.tools.ssh._run_on_pool", side_effect=OSError("down")):
+            await ssh.run_command_as_root("network:list", use_log=False)
+
+        self.assertEqual(
+            metrics.ssh_command_duration.get_count(subcommand="network:list"),
+            count + 2,
+        )
+        self.assertEqual(
+            metrics.ssh_commands.get(subcommand="network:list", status="failure"),
+            failures + 1,
+        )
+        self.assertEqual(metrics.ssh_commands_in_flight.get(), 0)
@@ -0,0 +1,82 @@
+import datetime
+import time
+import unittest
+from unittest.mock import patch
+
+from src.api.schemas import UserSchema
+from src.api.tools.session_cache import SessionCache
+
+
+def get_user(email: str, access_token: str, expires_in: float = 3600) -> UserSchema:
+    return UserSchema(
+        id=1,
+        email=email,
+        access_token=access_token,
+        access_token_expiration=datetime.datetime.now(datetime.timezone.utc)
+        + datetime.timedelta(seconds=expires_in),
+        created_at="2023-01-01T00:00:00Z",
+    )
+
+
+class TestSessionCache(unittest.TestCase):
+    def test_get_and_set(self):
+        cache = SessionCache(ttl=10, max_entries=10)
+        user = get_user("a@example.com", "hash-a")
+
+        self.assertIsNone(cache.get("hash-a"))
+
+        cache.set("hash-a", user, cache.version())
+
+        self.assertEqual(cache.get("hash-a"), user)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_ttl_and_token_expiration(self):
+        cache = SessionCache(ttl=10, max_entries=10)
+        cache.set("hash-a", get_user("a@example.com", "hash-a"), cache.version())
+        cache.set("hash-b", get_user("b@example.com", "hash-b", expires_in=1), 0)
+
+        now = time.monotonic()
+
+        with patch("src.api.tools.session_cache.time.monotonic") as monotonic:
+            monotonic.return_value = now + 5
+
+            self.assertIsNotNone(cache.get("hash-a"))
+            self.assertIsNone(cache.get("hash-b"))
+
+            monotonic.return_value += 10
+            self.assertIsNone(cache.get("hash-a"))
+
+    def test_lru_eviction(self):
+        cache = SessionCache(ttl=10, max_entries=2)
+
+        for name in "abc":
+            user = get_user(f"{name}@example.com", f"hash-{name}")
+            cache.set(f"hash-{name}", user, cache.version())
+
+        self.assertIsNone(cache.get("hash-a"))
+        self.assertIsNotNone(cache.get("hash-c"))
+
+    def test_invalidate(self):
+        cache = SessionCache(ttl=10, max_entries=10)
+        cache.set("hash-a", get_user("a@example.com", "hash-a"), cache.version())
+        cache.set("hash-b", get_user("b@example.com", "hash-b"), cache.version())
+
+        version = cache.version()
+        cache.invalidate(["a@example.com"])
+
+        self.assertIsNone(cache.get("hash-a"))
+        self.assertIsNotNone(cache.get("hash-b"))
+
+        # Users loaded before an invalidation are not stored.
+        cache.set("hash-a", get_user("a@example.com", "hash-a"), version)
+        self.assertIsNone(cache.get("hash-a"))
+
+        cache.invalidate()
+        self.assertIsNone(cache.get("hash-b"))
+
+    def test_disabled(self):
+        cache = SessionCache(ttl=0, max_entries=10)
+        cache.set("hash-a", get_user("a@example.com", "hash-a"), cache.version())
+
+        self.assertIsNone(cache.get("hash-a"))
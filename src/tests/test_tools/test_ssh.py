@@ -0,0 +1,360 @@
+import asyncio
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import asyncssh
+
+from src.api.tools import ssh
+
+
+def mock_connection(stdout: str = "ok", exit_status: int = 0):
+    conn = MagicMock()
+    conn.wait_closed = MagicMock(
+        side_effect=lambda: asyncio.get_running_loop().create_future()
+    )
+
+    process = MagicMock()
+    process.wait = AsyncMock(
+        return_value=MagicMock(exit_status=exit_status, stdout=stdout, stderr="")
+    )
+    conn.create_process = AsyncMock(return_value=process)
+    return conn
+
+
+class TestSSHConnectionPool(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        ssh._connection_pools.clear()
+
+    async def asyncTearDown(self):
+        ssh._connection_pools.clear()
+
+    async def test_commands_reuse_pooled_connection(self):
+        conn = mock_connection(stdout="3.0.0\n")
+
+        with patch("src.api.tools.ssh.asyncssh.connect", AsyncMock(return_value=conn)):
+            with patch("src.api.tools.ssh.ssh_pool_size", 1):
+                results = [await ssh.run_command("version", use_log=False)]
+                results.append(await ssh.run_command("version", use_log=False))
+
+            self.assertEqual(ssh.asyncssh.connect.await_count, 1)
+
+        self.assertEqual(results, [(True, "3.0.0"), (True, "3.0.0")])
+        self.assertEqual(conn.create_process.await_count, 2)
+
+    async def test_broken_connection_is_replaced(self):
+        broken_conn = mock_connection()
+        broken_conn.create_process.side_effect = asyncssh.ChannelOpenError(
+            1, "Connection lost"
+        )
+        conn = mock_connection(stdout="fine")
+        connect = AsyncMock(side_effect=[broken_conn, conn])
+
+        with patch("src.api.tools.ssh.asyncssh.connect", connect):
+            with patch("src.api.tools.ssh.ssh_pool_size", 1):
+                result = await ssh.run_command("version", use_log=False)
+
+        self.assertEqual(result, (True, "fine"))
+        self.assertEqual(connect.await_count, 2)
+        broken_conn.close.assert_called_once()
+
+    async def test_channels_per_connection_are_bounded(self):
+        pool = ssh.SSHConnectionPool("dokku", size=1, max_channels=2)
+        conn = mock_connection()
+
+        with patch("src.api.tools.ssh.asyncssh.connect", AsyncMock(return_value=conn)):
+            async with pool.connection():
+                async with pool.connection():
+                    waiter = asyncio.ensure_future(pool.connection().__aenter__())
+                    await asyncio.sleep(0)
+                    self.assertFalse(waiter.done())
+
+            await asyncio.wait_for(waiter, timeout=1)
+
+
+class TestSSHGovernor(unittest.IsolatedAsyncioTestCase):
+    async def test_request_limit_bounds_concurrent_commands(self):
+        governor = ssh.SSHGovernor(
+            max_per_request=2, max_per_user=0, max_global=0, max_queued=0
+        )
+        running = []
+        peak = []
+
+        async def command():
+            async with governor.slot():
+                running.append(1)
+                peak.append(len(running))
+                await asyncio.sleep(0.01)
+                running.pop()
+
+        with governor.request_scope("test@example.com"):
+            await asyncio.gather(*[command() for _ in range(6)])
+
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(governor.stats()["executed"], 6)
+        self.assertEqual(governor.stats()["in_flight"], 0)
+
+    async def test_user_commands_share_one_semaphore(self):
+        governor = ssh.SSHGovernor(
+            max_per_request=0, max_per_user=2, max_global=0, max_queued=0
+        )
+        semaphores = []
+
+        async def command():
+            async with governor.slot():
+                semaphores.append(governor._users["test@example.com"][0])
+                await asyncio.sleep(0.01)
+
+        with (
+            governor.request_scope("test@example.com"),
+            patch(
+                "src.api.tools.ssh.asyncio.Semaphore", wraps=asyncio.Semaphore
+            ) as mock,
+        ):
+            await asyncio.gather(*[command() for _ in range(4)])
+
+        self.assertEqual(mock.call_count, 1)
+        self.assertEqual(len(set(map(id, semaphores))), 1)
+        self.assertEqual(governor._users, {})
+
+    async def test_deep_queue_is_shed(self):
+        governor = ssh.SSHGovernor(
+            max_per_request=0, max_per_user=0, max_global=1, max_queued=1
+        )
+        release = asyncio.Event()
+
+        async def command():
+            async with governor.slot():
+                await release.wait()
+
+        with governor.request_scope():
+            holder = asyncio.ensure_future(command())
+            waiter = asyncio.ensure_future(command())
+            await asyncio.sleep(0)
+
+            with self.assertRaises(ssh.SSHQueueFullError) as context:
+                async with governor.slot():
+                    pass
+
+        self.assertEqual(context.exception.status_code, 503)
+        self.assertEqual(governor.stats()["rejected"], 1)
+
+        release.set()
+        await asyncio.gather(holder, waiter)
+
+    async def test_commands_without_request_are_not_shed(self):
+        governor = ssh.SSHGovernor(
+            max_per_request=0, max_per_user=0, max_global=1, max_queued=1
+        )
+
+        async def command():
+            async with governor.slot():
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[command() for _ in range(4)])
+
+        self.assertEqual(governor.stats()["rejected"], 0)
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        ssh.command_cache.invalidate([])
+
+    async def test_identical_reads_are_coalesced(self):
+        release = asyncio.Event()
+
+        async def execute_command(command, username, **kwargs):
+            await release.wait()
+            return True, f"{username}: {command}"
+
+        execute = AsyncMock(side_effect=execute_command)
+        saved = ssh.single_flight.saved
+
+        with patch("src.api.tools.ssh.__execute_command", execute):
+            tasks = [
+                asyncio.create_task(ssh.run_command("ps:inspect app-1", use_log=False))
+                for _ in range(3)
+            ]
+            tasks.append(
+                asyncio.create_task(
+                    ssh.run_command_as_root("ps:inspect app-1", use_log=False)
+                )
+            )
+            await asyncio.sleep(0)
+            release.set()
+            results = await asyncio.gather(*tasks)
+
+        self.assertEqual(execute.await_count, 2)
+        self.assertEqual(ssh.single_flight.saved - saved, 2)
+        self.assertEqual(results[:3], [(True, "dokku: ps:inspect app-1")] * 3)
+        self.assertEqual(results[3], (True, "root: ps:inspect app-1"))
+
+    async def test_mutating_commands_are_not_coalesced(self):
+        execute = AsyncMock(return_value=(True, ""))
+
+        with patch("src.api.tools.ssh.__execute_command", execute):
+            await asyncio.gather(
+                *[ssh.run_command("ps:restart app-1", use_log=False) for _ in range(2)]
+            )
+
+        self.assertEqual(execute.await_count, 2)
+
+
+class TestCommandsBatch(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        ssh.command_cache.invalidate([])
+        ssh._root_login_refused.clear()
+
+    def test_batch_script_quotes_arguments(self):
+        script = ssh._build_batch_script(
+            ["ps:inspect app-1", "apps:info app;touch /tmp/x", "config:get 'a b'"],
+            "__BATCH__",
+        )
+
+        self.assertIn("dokku ps:inspect app-1 <", script)
+        self.assertIn("dokku apps:info 'app;touch' /tmp/x <", script)
+        self.assertIn("dokku config:get 'a b' <", script)
+
+    def test_parse_batch_output(self):
+        delimiter = "__BATCH__"
+        output = "\n".join(
+            [
+                "__BATCH__ OUT 0",
+                "app-1",
+                "",
+                "__BATCH__ ERR 0",
+                "",
+                "__BATCH__ END 0 0",
+                "__BATCH__ OUT 1",
+                "",
+                "__BATCH__ ERR 1",
+                "App app-2 does not exist",
+                "__BATCH__ END 1 1",
+                "__BATCH__ OUT 2",
+                "partial",
+            ]
+        )
+
+        results = ssh._parse_batch_output(output, delimiter, 4)
+
+        self.assertEqual(results[0], (True, "app-1"))
+        self.assertEqual(results[1], (False, "App app-2 does not exist"))
+        self.assertEqual(results[2], (False, "The command was interrupted"))
+        self.assertIsNone(results[3])
+
+    async def test_batch_runs_in_a_single_round_trip(self):
+        async def run_on_pool(script, username):
+            self.assertEqual(username, "root")
+            self.assertIn("dokku ps:inspect app-1", script)
+            self.assertIn("dokku ps:inspect app-2", script)
+
+            delimiter = script.split("echo '", 1)[1].split(" OUT", 1)[0]
+            stdout = "\n".join(
+                [
+                    f"{delimiter} OUT 0",
+                    "[]",
+                    f"{delimiter} ERR 0",
+                    f"{delimiter} END 0 0",
+                    f"{delimiter} OUT 1",
+                    f"{delimiter} ERR 1",
+                    f"{delimiter} END 1 1",
+                ]
+            )
+            return MagicMock(exit_status=0, stdout=stdout, stderr="")
+
+        with patch("src.api.tools.ssh._run_on_pool", side_effect=run_on_pool) as mock:
+            results = await ssh.run_commands_batch(
+                ["ps:inspect app-1", "ps:inspect app-2"], use_log=False
+            )
+
+        self.assertEqual(mock.await_count, 1)
+        self.assertEqual(
+            results, [(True, "[]"), (False, "Command failed with exit code 1")]
+        )
+
+    async def test_batch_falls_back_to_single_commands(self):
+        async def run_on_pool(command, username):
+            if username == "root":
+                raise asyncssh.PermissionDenied("Permission denied")
+            return MagicMock(exit_status=0, stdout=f"ran {command}", stderr="")
+
+        with patch("src.api.tools.ssh._run_on_pool", side_effect=run_on_pool):
+            results = await ssh.run_commands_batch(
+                ["apps:list", "network:list"], use_log=False
+            )
+
+        self.assertEqual(results, [(True, "ran apps:list"), (True, "ran network:list")])
+
+    async def test_interrupted_mutations_are_not_run_again(self):
+        async def run_on_pool(command, username):
+            if username == "root":
+                delimiter = command.split("echo '", 1)[1].split(" OUT", 1)[0]
+                raise asyncssh.TimeoutError(
+                    None, None, None, None, None, None, f"{delimiter} OUT 0", ""
+                )
+            return MagicMock(exit_status=0, stdout=f"ran {command}", stderr="")
+
+        with patch("src.api.tools.ssh._run_on_pool", side_effect=run_on_pool) as mock:
+            results = await ssh.run_commands_batch(
+                ["ps:stop app-1", "ps:stop app-2", "ps:report app-3"], use_log=False
+            )
+
+        self.assertEqual(
+            results,
+            [
+                (False, "The command was interrupted"),
+                (False, "The command was interrupted"),
+                (True, "ran ps:report app-3"),
+            ],
+        )
+        self.assertEqual(mock.await_count, 2)
+
+    async def test_refused_root_login_is_remembered(self):
+        async def run_on_pool(command, username):
+            if username == "root":
+                raise asyncssh.PermissionDenied("Permission denied")
+            return MagicMock(exit_status=0, stdout=f"ran {command}", stderr="")
+
+        with patch("src.api.tools.ssh._run_on_pool", side_effect=run_on_pool) as mock:
+            await ssh.run_commands_batch(["apps:list", "network:list"], use_log=False)
+            await ssh.run_commands_batch(["apps:list", "network:list"], use_log=False)
+
+        usernames = [call.args[1] for call in mock.await_args_list]
+        self.assertEqual(usernames.count("root"), 1)
+        self.assertEqual(usernames.count("dokku"), 4)
+
+
+class TestStreamCommand(unittest.IsolatedAsyncioTestCase):
+    def mock_process(self, chunks, stderr="", exit_status=0):
+        process = MagicMock()
+        process.stdout.read = AsyncMock(side_effect=chunks + [""])
+        process.stderr.read = AsyncMock(return_value=stderr)
+        process.wait_closed = AsyncMock()
+        process.exit_status = exit_status
+
+        @asynccontextmanager
+        async def open_process(command, username, **kwargs):
+            yield process
+
+        return open_process
+
+    async def test_stream_yields_chunks_as_they_arrive(self):
+        open_process = self.mock_process(["line 1\n", "line 2\n"])
+
+        with patch("src.api.tools.ssh._open_process", open_process):
+            success, stream = await ssh.start_stream("logs app", use_log=False)
+            chunks = [chunk async for chunk in stream]
+
+        self.assertTrue(success)
+        self.assertEqual(chunks, ["line 1\n", "line 2\n"])
+        self.assertEqual(stream.exit_status, 0)
+
+    async def test_stream_failing_before_output_returns_error(self):
+        open_process = self.mock_process(
+            [], stderr="App does not exist\n", exit_status=1
+        )
+
+        with patch("src.api.tools.ssh._open_process", open_process):
+            result = await ssh.start_stream("logs app", use_log=False)
+
+        self.assertEqual(result, (False, "App does not exist"))
@@ -72,6 +72,11 @@ class TestValidators(unittest.TestCase):
 
         validate_user_credentials(self.mock_request, payload)
 
+    def test_validate_user_credentials_without_body(self):
+        self.mock_request.state.session_user = MagicMock()
+
+        validate_user_credentials(self.mock_request, None)
+
     def test_validate_user_credentials_invalid(self):
         self.mock_request.state.session_user = None
 